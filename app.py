@@ -1,20 +1,21 @@
-from flask import Flask, render_template, jsonify, request
-from flask_socketio import SocketIO, emit
-from threading import Thread, Event
+from flask import Flask, Response, render_template, jsonify, request
+from flask_socketio import SocketIO, emit, join_room
+from threading import Event
 from camera import CameraStream
 from core.constants import *
 from processing import process_camera_streams, run_calibration_session, run_unified_training_session
 from calibration.data import CalibrationData
 from database.repository import TrainingRepository
+from pipeline.pose_pool import pose_pool
+from pipeline.mjpeg import MJPEG_BOUNDARY
+from sessions import SessionManager
 
-processing_event = Event()
-analyzing_event = Event()
-processing_thread = None
 exercise_command_event = Event()
 exercise_command_type = [None]
 
 app = Flask(__name__)
 socketio = SocketIO(app, cors_allowed_origins="*")
+sessions = SessionManager(socketio)
 
 @app.route('/')
 def handle_index():
@@ -30,7 +31,7 @@ def handle_history():
 
 @app.route('/api/calibration-status')
 def handle_calibration_status():
-    calibration = CalibrationData.load()
+    calibration = CalibrationData.load(request.args.get('station'))
     if calibration and calibration.calibrated:
         date_str = calibration.calibration_date[:10] if calibration.calibration_date else "Nieznana data"
         return jsonify({'calibrated': True, 'date': date_str})
@@ -59,26 +60,60 @@ def handle_delete_training(session_id):
         return jsonify({'success': True})
     return jsonify({'error': 'Session not found'}), 404
 
+@app.route('/stream/<session_id>/<view>')
+def handle_stream(session_id, view):
+    session = sessions.find(session_id)
+    if session is None or view not in ('front', 'profile'):
+        return jsonify({'error': 'Stream not found'}), 404
+    return Response(
+        session.mjpeg_broadcaster.stream(view),
+        mimetype=f'multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}'
+    )
+
 @socketio.on('connect')
 def handle_connect():
-    print('Client connected')
+    session = sessions.open(request.sid)
+    join_room(session.room)
+    print(f'Client connected ({sessions.get_stats()})')
+    emit('state-snapshot', session.state_publisher.snapshot())
+
+@socketio.on('state-snapshot-request')
+def handle_state_snapshot_request():
+    session = sessions.get(request.sid)
+    if session:
+        emit('state-snapshot', session.state_publisher.snapshot())
+
+@socketio.on('preview-subscribe')
+def handle_preview_subscribe(data):
+    session = sessions.get(request.sid)
+    if session:
+        session.preview_subscribers.subscribe(request.sid, data.get('views', []))
+
+@socketio.on('preview-unsubscribe')
+def handle_preview_unsubscribe(data):
+    session = sessions.get(request.sid)
+    if session:
+        session.preview_subscribers.unsubscribe(request.sid, data.get('views'))
 
 @socketio.on('disconnect')
 def handle_disconnect():
-    global processing_thread
-    if processing_event.is_set():
+    session = sessions.close(request.sid)
+    if session is None:
         print('Tried to end a session that has not started')
         return
-    processing_event.set()
-    if processing_thread:
-        processing_thread.join()
-    print('Session ended')
+    print('Client disconnected')
 
 @socketio.on('start-session')
 def handle_start_session(data):
-    global processing_thread
-    if not processing_event.is_set():
-        print('Server can handle one session at a time')
+    session = sessions.get(request.sid)
+    if session is None:
+        return
+    if session.is_running:
+        print('Session is already running for this client')
+        return
+    if not sessions.admit(session):
+        print(f'Session rejected, server is at capacity ({sessions.get_stats()})')
+        emit('session-rejected', {'message': 'Serwer obsługuje już maksymalną liczbę stanowisk'})
         return
     
     camera_config = data.get('cameras', data)
@@ -89,11 +124,11 @@ def handle_start_session(data):
         'rounds': 3
     })
     force_calibration = training_settings.get('forceCalibration', False)
+    session.station_id = data.get('stationId')
     
     print(f'New {session_mode} session started')
     print(f'Training settings: {training_settings}')
     print(f'Camera config: {camera_config}')
-    processing_event.clear()
 
     try:
         front_config = camera_config.get('front', {})
@@ -119,55 +154,58 @@ def handle_start_session(data):
                 front_camera_stream.stop()
             if profile_camera_stream:
                 profile_camera_stream.stop()
-            processing_event.set()
+            session.stop_event.set()
             emit('connection-error', {'message': 'Nie można połączyć się z jedną lub obiema kamerami'})
             return
 
         if session_mode == 'calibration':
             target_fn = run_calibration_session
-            args = (socketio, front_camera_stream, profile_camera_stream, processing_event)
+            args = (front_camera_stream, profile_camera_stream)
         elif session_mode == 'unified':
             target_fn = run_unified_training_session
-            args = (socketio, front_camera_stream, profile_camera_stream, processing_event, analyzing_event, training_settings, force_calibration)
+            args = (front_camera_stream, profile_camera_stream, training_settings, force_calibration)
         else:
             exercise_type = data.get('exerciseType', 'bicep_curl')
             target_fn = process_camera_streams
-            args = (socketio, front_camera_stream, profile_camera_stream, processing_event, analyzing_event, exercise_type)
-
-        processing_thread = Thread(
-            target=target_fn,
-            args=args,
-            daemon=True
-        )
-        processing_thread.start()
+            args = (front_camera_stream, profile_camera_stream, exercise_type)
+
+        session.run(target_fn, args)
         
     except Exception as e:
         print(f'Error starting camera streams: {e}')
-        processing_event.set()
+        session.stop_event.set()
         emit('connection-error', {'message': f'Błąd inicjalizacji kamer: {str(e)}'})
 
 @socketio.on('end-session')
 def handle_end_session():
-    global processing_thread
-    if processing_event.is_set():
+    session = sessions.get(request.sid)
+    if session is None or not session.stop():
         print('Tried to end a session that has not started')
         return
-    processing_event.set()
-    analyzing_event.clear()
-    if processing_thread:
-        processing_thread.join()
     print('Session ended')
 
+@socketio.on('frame-ack')
+def handle_frame_ack(data):
+    session = sessions.get(request.sid)
+    if session:
+        session.preview_flow.acknowledge(data.get('id'), data.get('view'))
+
 @socketio.on('start-analysis')
 def handle_start_analysis():
-    analyzing_event.set()
-    print('Analysis started')
+    session = sessions.get(request.sid)
+    if session:
+        session.analyzing_event.set()
+        print('Analysis started')
 
 @socketio.on('stop-analysis')
 def handle_stop_analysis():
-    analyzing_event.clear()
-    print('Analysis stopped')
+    session = sessions.get(request.sid)
+    if session:
+        session.analyzing_event.clear()
+        print('Analysis stopped')
 
 if __name__ == '__main__':
-    processing_event.set()
-    socketio.run(app, host='0.0.0.0', port=5000)
\ No newline at end of file
+    if POSE_INFERENCE_MODE == 'thread':
+        pose_pool.warm_up()
+    print(f'Session capacity: {sessions.capacity}')
+    socketio.run(app, host='0.0.0.0', port=5000)
@@ -1,9 +1,19 @@
 import json
 import os
+import re
 from datetime import datetime
 
 
 CALIBRATION_FILE = 'user_calibration.json'
+CALIBRATION_DIR = 'calibrations'
+_STATION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+def calibration_path(station_id=None):
+    """Plik kalibracji stanowiska; bez (poprawnego) identyfikatora - wspólny plik wszystkich stanowisk."""
+    if station_id and _STATION_ID_PATTERN.match(station_id):
+        return os.path.join(CALIBRATION_DIR, f'{station_id}.json')
+    return CALIBRATION_FILE
 
 
 class CalibrationData:
@@ -102,17 +112,25 @@ class CalibrationData:
         self.calibrated = data.get('calibrated', False)
         self.calibration_date = data.get('calibration_date')
     
-    def save(self):
-        with open(CALIBRATION_FILE, 'w') as f:
+    def save(self, station_id=None):
+        path = calibration_path(station_id)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # zapis przez plik tymczasowy - równoczesny odczyt nie trafi na niepełny plik
+        temp_path = f'{path}.{os.getpid()}.{id(self)}.tmp'
+        with open(temp_path, 'w') as f:
             json.dump(self.to_dict(), f, indent=2)
+        os.replace(temp_path, path)
     
     @staticmethod
-    def load():
-        if not os.path.exists(CALIBRATION_FILE):
+    def load(station_id=None):
+        path = calibration_path(station_id)
+        if not os.path.exists(path):
             return None
         
         try:
-            with open(CALIBRATION_FILE, 'r') as f:
+            with open(path, 'r') as f:
                 data = json.load(f)
             
             calibration = CalibrationData()
@@ -1,22 +1,38 @@
 import time
 import cv2
-from threading import Thread, Lock
+from collections import namedtuple
+from threading import Thread, Lock, Condition
+from core.constants import CAMERA_FRAME_POOL_SIZE, FRAME_SYNC_TOLERANCE_MS
+
+
+CapturedFrame = namedtuple('CapturedFrame', ['image', 'seq', 'timestamp', 'dropped'])
+
+READ_RETRY_DELAY = 0.01
+READ_RETRY_MAX_DELAY = 0.1
+
 
 class CameraStream:
     """Obsługuje strumień wideo z kamery."""
-    def __init__(self, source, width, height):
+    def __init__(self, source, width, height, pool_size=CAMERA_FRAME_POOL_SIZE):
         self.stream = cv2.VideoCapture(source)
         self.stream.set(cv2.CAP_PROP_FRAME_WIDTH, width)
         self.stream.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
         self.stream.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-        self.frame = None
         self.lock = Lock()
+        self.frame_ready = Condition(self.lock)
         self.running = False
         self.thread = None
         self.is_connected = True
         self.consecutive_failures = 0
-        self.was_read = True
-    
+
+        self.pool_size = max(3, pool_size)
+        self._buffers = [None] * self.pool_size
+        self._slot_seq = [0] * self.pool_size
+        self._slot_timestamp = [0.0] * self.pool_size
+        self._latest_slot = -1
+        self._leased_slot = -1
+        self.seq = 0
+
     def start(self):
         self.running = True
         self.thread = Thread(target=self._read_video_stream, daemon=True)
@@ -25,26 +41,181 @@ class CameraStream:
 
     def _read_video_stream(self):
         while self.running:
-            ret, frame = self.stream.read()
-            if ret:
-                with self.lock:
-                    self.frame = frame
-                    self.consecutive_failures = 0
-                    self.was_read = False
-            else:
-                self.consecutive_failures += 1
-                if self.consecutive_failures > 60:
-                    self.is_connected = False
-                    self.running = False
-    
-    def get(self):
+            if not self.stream.grab():
+                self._register_failure()
+                continue
+            timestamp = time.monotonic()
+
+            slot = self._acquire_write_slot()
+            ret, image = self.stream.retrieve(self._buffers[slot])
+            if not ret or image is None:
+                self._register_failure()
+                continue
+
+            with self.lock:
+                self._buffers[slot] = image
+                self.seq += 1
+                self._slot_seq[slot] = self.seq
+                self._slot_timestamp[slot] = timestamp
+                self._latest_slot = slot
+                self.consecutive_failures = 0
+                self.frame_ready.notify_all()
+
+    def _register_failure(self):
+        self.consecutive_failures += 1
+        if self.consecutive_failures > 60:
+            self.is_connected = False
+            self.running = False
+            with self.lock:
+                self.frame_ready.notify_all()
+            return
+        time.sleep(min(READ_RETRY_MAX_DELAY, READ_RETRY_DELAY * self.consecutive_failures))
+
+    def _acquire_write_slot(self):
+        """Najstarszy slot, który nie jest ani najnowszą, ani wypożyczoną klatką."""
         with self.lock:
-            previous_was_read = self.was_read
-            self.was_read = True
-            return self.frame, previous_was_read
-        
+            for offset in range(1, self.pool_size + 1):
+                slot = (self._latest_slot + offset) % self.pool_size
+                if slot != self._latest_slot and slot != self._leased_slot:
+                    self._slot_seq[slot] = 0
+                    return slot
+        return 0
+
+    def _lease(self, slot, after_seq):
+        seq = self._slot_seq[slot]
+        if seq <= after_seq:
+            return None
+        self._leased_slot = slot
+        image = self._buffers[slot].view()
+        image.flags.writeable = False
+        dropped = seq - after_seq - 1 if after_seq else 0
+        return CapturedFrame(image, seq, self._slot_timestamp[slot], dropped)
+
+    def get_latest(self, after_seq=0):
+        """
+        Zwraca najnowszą klatkę nowszą niż after_seq (lub None).
+        Obraz jest widokiem tylko do odczytu na bufor z puli - pozostaje
+        ważny do następnego wywołania get_latest dla tego strumienia.
+        """
+        with self.lock:
+            if self._latest_slot < 0:
+                return None
+            return self._lease(self._latest_slot, after_seq)
+
+    def wait_for_frame(self, timeout=None, after_seq=0):
+        """Czeka bez odpytywania na klatkę nowszą niż after_seq; True, jeśli się pojawiła."""
+        with self.frame_ready:
+            self.frame_ready.wait_for(lambda: self.seq > after_seq or not self.running, timeout)
+            return self.seq > after_seq
+
+    def get_nearest(self, timestamp, after_seq=0):
+        """Klatka z puli najbliższa w czasie podanemu znacznikowi (nowsza niż after_seq)."""
+        with self.lock:
+            best = -1
+            for slot in range(self.pool_size):
+                if self._slot_seq[slot] <= after_seq:
+                    continue
+                if best < 0 or abs(self._slot_timestamp[slot] - timestamp) < abs(self._slot_timestamp[best] - timestamp):
+                    best = slot
+            if best < 0:
+                return None
+            return self._lease(best, after_seq)
+
     def stop(self):
         self.running = False
+        with self.lock:
+            self.frame_ready.notify_all()
         if self.thread:
             self.thread.join()
-        self.stream.release()
\ No newline at end of file
+        self.stream.release()
+
+
+class StreamSynchronizer:
+    """Łączy klatki z kamery przedniej i bocznej w pary według czasu przechwycenia."""
+    def __init__(self, front_stream, profile_stream, tolerance_ms=FRAME_SYNC_TOLERANCE_MS):
+        self.front_stream = front_stream
+        self.profile_stream = profile_stream
+        self.tolerance = tolerance_ms / 1000.0
+        self.front_seq = 0
+        self.profile_seq = 0
+
+        self.pairs = 0
+        self.unmatched_front = 0
+        self.unmatched_profile = 0
+        self.dropped_front = 0
+        self.dropped_profile = 0
+        self.last_skew = 0.0
+        self.max_skew = 0.0
+        self._skew_sum = 0.0
+        self._lagging = (front_stream, 0)
+
+    def next_pair(self, timeout=None):
+        """
+        Blokuje do pojawienia się pary klatek zgodnych w czasie.
+        Zwraca (front, profile) jako CapturedFrame lub None po upływie timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.front_stream.running and self.profile_stream.running:
+            pair = self._match()
+            if pair is not None:
+                return pair
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            stream, after_seq = self._lagging
+            stream.wait_for_frame(remaining, after_seq)
+        return None
+
+    def _match(self):
+        front = self.front_stream.get_latest(self.front_seq)
+        if front is None:
+            self._lagging = (self.front_stream, self.front_seq)
+            return None
+        profile = self.profile_stream.get_latest(self.profile_seq)
+        if profile is None:
+            self._lagging = (self.profile_stream, self.profile_seq)
+            return None
+
+        if front.timestamp >= profile.timestamp:
+            front = self.front_stream.get_nearest(profile.timestamp, self.front_seq) or front
+            profile_is_older = True
+        else:
+            profile = self.profile_stream.get_nearest(front.timestamp, self.profile_seq) or profile
+            profile_is_older = False
+
+        skew = front.timestamp - profile.timestamp
+        if abs(skew) > self.tolerance:
+            # Starsza klatka nie ma już pary w puli drugiej kamery - odrzucamy ją.
+            if profile_is_older:
+                self.profile_seq = profile.seq
+                self.unmatched_profile += 1
+                self._lagging = (self.profile_stream, self.profile_seq)
+            else:
+                self.front_seq = front.seq
+                self.unmatched_front += 1
+                self._lagging = (self.front_stream, self.front_seq)
+            return None
+
+        self.front_seq = front.seq
+        self.profile_seq = profile.seq
+        self.dropped_front += front.dropped
+        self.dropped_profile += profile.dropped
+        self.pairs += 1
+        self.last_skew = skew
+        self.max_skew = max(self.max_skew, abs(skew))
+        self._skew_sum += abs(skew)
+        return front, profile
+
+    def get_stats(self):
+        """Statystyki parowania (przesunięcia w ms)."""
+        mean_skew = self._skew_sum / self.pairs if self.pairs else 0.0
+        return {
+            'pairs': self.pairs,
+            'mean_skew_ms': round(mean_skew * 1000, 2),
+            'max_skew_ms': round(self.max_skew * 1000, 2),
+            'last_skew_ms': round(self.last_skew * 1000, 2),
+            'unmatched_front': self.unmatched_front,
+            'unmatched_profile': self.unmatched_profile,
+            'dropped_front': self.dropped_front,
+            'dropped_profile': self.dropped_profile,
+        }
@@ -1,47 +1,26 @@
 import math
 import numpy as np
-
-
-MIN_LANDMARK_VISIBILITY = 0.5
+from core.landmarks import LandmarkFrame, MIN_LANDMARK_VISIBILITY
+from core.constants import METRICS_REFERENCE_FPS
 
 
 def extract_pose_landmarks(results):
-    """Wyciąga landmarki z wyniku MediaPipe."""
-    landmarks = {}
-    try:
-        landmark_list = results.pose_landmarks.landmark
-    except Exception:
-        return landmarks
-    for i, lm in enumerate(landmark_list):
-        landmarks[i] = (lm.x, lm.y, getattr(lm, 'visibility', 0))
-    return landmarks
+    """LandmarkFrame dla wyniku pozy (wynik MediaPipe jest zamieniany na tablicę raz na klatkę)."""
+    return LandmarkFrame.from_results(results)
 
 
 def get_landmark_confidence(landmarks, indices):
     """Średnia widoczność wybranych punktów."""
     if not landmarks:
         return 0.0
-    
-    visibilities = []
-    for i in indices:
-        if i in landmarks:
-            visibilities.append(landmarks[i][2])
-    
-    return sum(visibilities) / len(visibilities) if visibilities else 0.0
+    return landmarks.confidence(indices)
 
 
 def check_landmarks_visible(landmarks, indices, min_visibility=None):
     """Sprawdza widoczność kluczowych punktów."""
-    if min_visibility is None:
-        min_visibility = MIN_LANDMARK_VISIBILITY
-    
     if not landmarks:
         return False
-    
-    for idx in indices:
-        if idx not in landmarks or landmarks[idx][2] < min_visibility:
-            return False
-    return True
+    return landmarks.is_visible(indices, min_visibility)
 
 
 def calculate_angle(point_a, point_b, point_c):
@@ -141,50 +120,96 @@ def exponential_moving_average(current_value, ema_value, alpha=0.3):
     return alpha * current_value + (1 - alpha) * ema_value
 
 
-class AdaptiveSmoother:
-    """Stanowy filtr adaptacyjny dla pojedynczego sygnału."""
-    
-    def __init__(self, base_smoothing=0.25, velocity_threshold=5.0, velocity_smoothing=0.3):
-        self.base_smoothing = base_smoothing
-        self.velocity_threshold = velocity_threshold
-        self.velocity_smoothing = velocity_smoothing
-        self.previous_value = None
-        self.smoothed_velocity = 0.0
-    
-    def update(self, current_value):
-        """Aktualizuje i zwraca wartość wygładzoną."""
-        if self.previous_value is None:
-            self.previous_value = current_value
-            return current_value
-        
-       
-        instant_velocity = abs(current_value - self.previous_value)
-        
+class SmootherBank:
+    """
+    Zestaw filtrów adaptacyjnych jednego widoku trzymany w tablicach NumPy.
+    Kanały są aktualizowane jednym zwektoryzowanym krokiem według znaczników czasu przechwycenia,
+    więc wynik nie zależy od liczby klatek na sekundę ani od pominiętych klatek.
+    channels: słownik nazwa -> parametry (base_smoothing, velocity_threshold, velocity_smoothing).
+    Progi prędkości są w jednostkach na sekundę, a współczynniki wygładzania odnoszą się do odstępu
+    1 / METRICS_REFERENCE_FPS i są przeliczane na rzeczywisty odstęp między klatkami.
+    smoothing=False przepuszcza wartości bez zmian (np. gdy landmarki są już filtrowane), prędkości są nadal liczone.
+    """
+    def __init__(self, channels, reference_fps=METRICS_REFERENCE_FPS, smoothing=True):
+        self.names = list(channels)
+        self.smoothing = smoothing
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.reference_interval = 1.0 / reference_fps
+        defaults = {'base_smoothing': 0.25, 'velocity_threshold': 5.0 * reference_fps, 'velocity_smoothing': 0.3}
+        params = [{**defaults, **channels[name]} for name in self.names]
+        self.base_smoothing = np.array([p['base_smoothing'] for p in params], dtype=np.float64)
+        self.velocity_threshold = np.array([p['velocity_threshold'] for p in params], dtype=np.float64)
+        self.velocity_smoothing = np.array([p['velocity_smoothing'] for p in params], dtype=np.float64)
+        self.reset()
+
+    def update(self, values, timestamp=None):
+        """
+        Aktualizuje wszystkie kanały (słownik nazwa -> wartość) i zwraca słownik wartości wygładzonych.
+        timestamp to czas przechwycenia klatki w sekundach; bez niego przyjmowany jest odstęp referencyjny.
+        Klatka nie nowsza od poprzedniej nie zmienia stanu.
+        """
+        if timestamp is None:
+            timestamp = (self.last_timestamp or 0.0) + self.reference_interval
+        current = np.array([values[name] for name in self.names], dtype=np.float64)
+        if not self.initialized:
+            self.previous_value = current
+            self.last_timestamp = timestamp
+            self.initialized = True
+            return dict(zip(self.names, current.tolist()))
+
+        dt = timestamp - self.last_timestamp
+        if dt <= 0:
+            return dict(zip(self.names, self.previous_value.tolist()))
+        self.last_timestamp = timestamp
+        steps = dt / self.reference_interval
+
+        instant_velocity = np.abs(current - self.previous_value) / dt
+        velocity_factor = 1 - (1 - self.velocity_smoothing) ** steps
         self.smoothed_velocity = (
-            self.velocity_smoothing * instant_velocity + 
-            (1 - self.velocity_smoothing) * self.smoothed_velocity
+            velocity_factor * instant_velocity +
+            (1 - velocity_factor) * self.smoothed_velocity
         )
-        
-        if self.smoothed_velocity > self.velocity_threshold:
-            ratio = min(2.0, self.smoothed_velocity / self.velocity_threshold)
-            adaptive_factor = min(0.6, self.base_smoothing * ratio)
+
+        ratio = self.smoothed_velocity / self.velocity_threshold
+        adaptive_factor = np.where(
+            self.smoothed_velocity > self.velocity_threshold,
+            np.minimum(0.6, self.base_smoothing * np.minimum(2.0, ratio)),
+            np.maximum(0.1, self.base_smoothing * (0.5 + 0.5 * ratio))
+        )
+        adaptive_factor = 1 - (1 - adaptive_factor) ** steps
+
+        if not self.smoothing:
+            self.previous_value = current
         else:
-            ratio = self.smoothed_velocity / self.velocity_threshold
-            adaptive_factor = max(0.1, self.base_smoothing * (0.5 + 0.5 * ratio))
-        
-        smoothed = adaptive_factor * current_value + (1 - adaptive_factor) * self.previous_value
-        self.previous_value = smoothed
-        
-        return smoothed
-    
+            self.previous_value = adaptive_factor * current + (1 - adaptive_factor) * self.previous_value
+        return dict(zip(self.names, self.previous_value.tolist()))
+
     def reset(self):
-        """Resetuje stan filtra."""
-        self.previous_value = None
-        self.smoothed_velocity = 0.0
-    
-    def get_velocity(self):
-        """Zwraca wygładzoną prędkość zmian."""
-        return self.smoothed_velocity
+        """Resetuje stan wszystkich kanałów."""
+        self.previous_value = np.zeros(len(self.names))
+        self.smoothed_velocity = np.zeros(len(self.names))
+        self.last_timestamp = None
+        self.initialized = False
+
+    def snapshot(self):
+        """Kopia stanu całego zestawu (do późniejszego restore)."""
+        return (self.previous_value.copy(), self.smoothed_velocity.copy(), self.last_timestamp, self.initialized)
+
+    def restore(self, snapshot):
+        """Przywraca stan zapisany przez snapshot()."""
+        previous_value, smoothed_velocity, last_timestamp, initialized = snapshot
+        self.previous_value = previous_value.copy()
+        self.smoothed_velocity = smoothed_velocity.copy()
+        self.last_timestamp = last_timestamp
+        self.initialized = initialized
+
+    def get_velocity(self, name):
+        """Wygładzona prędkość zmian kanału (jednostki na sekundę)."""
+        return float(self.smoothed_velocity[self.index[name]])
+
+    def get_velocities(self):
+        """Wygładzone prędkości wszystkich kanałów (nazwa -> jednostki na sekundę)."""
+        return dict(zip(self.names, self.smoothed_velocity.tolist()))
 
 
 def detect_phase(angle, flex_threshold=80, extend_threshold=120):
@@ -221,17 +246,30 @@ def detect_phase_with_hysteresis(angle, current_phase, flex_threshold=80, extend
 
 
 class PhaseDetector:
-    """Detektor fazy z pamięcią i stabilnością klatek."""
-    def __init__(self, flex_threshold=80, extend_threshold=120, hysteresis=10):
+    """
+    Detektor fazy z pamięcią. Czas trwania fazy liczony jest ze znaczników czasu przechwycenia,
+    więc stabilność nie zależy od liczby klatek na sekundę; bez znaczników każda klatka
+    trwa 1 / METRICS_REFERENCE_FPS.
+    """
+    def __init__(self, flex_threshold=80, extend_threshold=120, hysteresis=10, reference_fps=METRICS_REFERENCE_FPS):
         self.flex_threshold = flex_threshold
         self.extend_threshold = extend_threshold
         self.hysteresis = hysteresis
+        self.reference_interval = 1.0 / reference_fps
         self.current_phase = 'middle'
         self.phase_history = []
         self.frames_in_phase = 0
+        self.phase_started = None
+        self.last_timestamp = None
     
-    def update(self, angle):
-        """Aktualizuje fazę i zwraca jej nazwę."""
+    def update(self, angle, timestamp=None):
+        """Aktualizuje fazę i zwraca jej nazwę; klatka nie nowsza od poprzedniej nie zmienia stanu."""
+        if timestamp is None:
+            timestamp = (self.last_timestamp or 0.0) + self.reference_interval
+        elif self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return self.current_phase
+        self.last_timestamp = timestamp
+        
         previous_phase = self.current_phase
         self.current_phase = detect_phase_with_hysteresis(
             angle, 
@@ -248,6 +286,9 @@ class PhaseDetector:
             if len(self.phase_history) > 10:
                 self.phase_history.pop(0)
             self.frames_in_phase = 1
+            self.phase_started = timestamp
+        if self.phase_started is None:
+            self.phase_started = timestamp
         
         return self.current_phase
     
@@ -259,8 +300,20 @@ class PhaseDetector:
         """Czy faza trwa min. liczbę klatek."""
         return self.frames_in_phase >= min_frames
     
+    def phase_duration_ms(self):
+        """Czas od wejścia w bieżącą fazę do ostatniej klatki (ms)."""
+        if self.phase_started is None:
+            return 0.0
+        return (self.last_timestamp - self.phase_started) * 1000
+    
+    def is_stable_for(self, min_ms):
+        """Czy faza trwa co najmniej min_ms milisekund."""
+        return self.phase_duration_ms() >= min_ms
+    
     def reset(self):
         """Resetuje stan detektora."""
         self.current_phase = 'middle'
         self.phase_history = []
-        self.frames_in_phase = 0
\ No newline at end of file
+        self.frames_in_phase = 0
+        self.phase_started = None
+        self.last_timestamp = None
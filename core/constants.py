@@ -1,8 +1,58 @@
 CAMERA_FPS_LIMIT = 30
+CAMERA_FRAME_POOL_SIZE = 4
+FRAME_SYNC_TOLERANCE_MS = 20
+POSE_INFERENCE_MODE = 'thread'
+POSE_WORKER_SLOTS = 2
+POSE_WORKER_POLL_TIMEOUT = 0.5
+POSE_POOL_SIZE = 2
+POSE_ROI_ENABLED = True
+POSE_ROI_PADDING = 0.3
+POSE_ROI_MIN_SIZE = 0.35
+POSE_ROI_MIN_VISIBILITY = 0.5
+POSE_MIN_INFERENCE_FPS = 10
+MOTION_STILL_VELOCITY = 45.0
+MOTION_STILL_TIME = 1.0
+METRICS_REFERENCE_FPS = 30
+LANDMARK_FILTER = None
+ONE_EURO_MIN_CUTOFF = 2.0
+ONE_EURO_BETA = 10.0
+ONE_EURO_D_CUTOFF = 1.0
+KALMAN_PROCESS_NOISE = 1.0
+KALMAN_MEASUREMENT_NOISE = 0.004
+QOS_LATENCY_BUDGET_MS = 120
+QOS_HEADROOM_RATIO = 0.5
+QOS_DOWNGRADE_TIME = 1.0
+QOS_UPGRADE_TIME = 5.0
+QOS_SETTLE_TIME = 2.0
+PREVIEW_FORMAT = 'jpeg'
+PREVIEW_QUALITY = 70
+PREVIEW_CHROMA_SUBSAMPLING = '420'
+PREVIEW_MODE = 'video'
+PREVIEW_TRANSPORT = 'socketio'
+PREVIEW_LANDMARK_VIDEO_FPS = 5
+PREVIEW_MAX_IN_FLIGHT = 2
+PREVIEW_ACK_TIMEOUT = 1.0
+PREVIEW_MAX_AGE = 0.5
+PREVIEW_MIN_QUALITY = 35
+PREVIEW_FPS_LEVELS = [30, 20, 15, 10, 5]
+PREVIEW_RTT_LOW_MS = 80
+PREVIEW_RTT_HIGH_MS = 250
+PREVIEW_ADAPT_INTERVAL = 1.0
+STATE_PUBLISH_RATE = 10
+MAX_CONCURRENT_SESSIONS = 4
+SESSION_CORES = 2
 FRONT_CAMERA_WIDTH = 640
 FRONT_CAMERA_HEIGHT = 360
 PROFILE_CAMERA_WIDTH = 360
 PROFILE_CAMERA_HEIGHT = 640
+FRONT_INFERENCE_WIDTH = 640
+FRONT_INFERENCE_HEIGHT = 360
+PROFILE_INFERENCE_WIDTH = 360
+PROFILE_INFERENCE_HEIGHT = 640
+FRONT_PREVIEW_WIDTH = 640
+FRONT_PREVIEW_HEIGHT = 360
+PROFILE_PREVIEW_WIDTH = 360
+PROFILE_PREVIEW_HEIGHT = 640
 
 POSE_NOSE = 0
 POSE_RIGHT_SHOULDER = 12
@@ -0,0 +1,130 @@
+"""Zwektoryzowana geometria stawów: wszystkie kąty i dystanse widoku w jednym przebiegu."""
+import numpy as np
+from core.constants import (
+    POSE_RIGHT_SHOULDER, POSE_LEFT_SHOULDER, POSE_RIGHT_ELBOW, POSE_LEFT_ELBOW,
+    POSE_RIGHT_WRIST, POSE_LEFT_WRIST, POSE_RIGHT_HIP, POSE_LEFT_HIP
+)
+
+JOINT_ANGLES = {
+    'right_elbow_angle': (POSE_RIGHT_SHOULDER, POSE_RIGHT_ELBOW, POSE_RIGHT_WRIST),
+    'left_elbow_angle': (POSE_LEFT_SHOULDER, POSE_LEFT_ELBOW, POSE_LEFT_WRIST),
+    'right_elbow_forward_angle': (POSE_RIGHT_SHOULDER, POSE_RIGHT_ELBOW, POSE_RIGHT_HIP),
+}
+
+ARM_SEGMENTS = {
+    'right_arm_verticality': (POSE_RIGHT_SHOULDER, POSE_RIGHT_ELBOW),
+    'left_arm_verticality': (POSE_LEFT_SHOULDER, POSE_LEFT_ELBOW),
+}
+
+ELBOW_TORSO_DISTANCES = {
+    'right_elbow_torso_dist': POSE_RIGHT_ELBOW,
+    'left_elbow_torso_dist': POSE_LEFT_ELBOW,
+}
+
+JOINT_DISTANCES = {
+    'right_wrist_shoulder_dist': (POSE_RIGHT_WRIST, POSE_RIGHT_SHOULDER),
+    'left_wrist_shoulder_dist': (POSE_LEFT_WRIST, POSE_LEFT_SHOULDER),
+}
+
+GEOMETRY_NAMES = (
+    list(JOINT_ANGLES) + list(ARM_SEGMENTS) + list(ELBOW_TORSO_DISTANCES)
+    + list(JOINT_DISTANCES) + ['trunk_angle']
+)
+
+_ANGLE_INDEX = np.array(list(JOINT_ANGLES.values()))
+
+
+def _difference_matrix():
+    """
+    Stała macierz (V, 33): każdy wiersz to wektor potrzebny kernelowi jako kombinacja
+    liniowa landmarków, więc wszystkie wektory dostajemy jednym mnożeniem macierzy.
+    """
+    rows = []
+
+    def vector(*terms):
+        row = np.zeros(33)
+        for weight, index in terms:
+            row[index] += weight
+        rows.append(row)
+
+    shoulder_center = ((0.5, POSE_LEFT_SHOULDER), (0.5, POSE_RIGHT_SHOULDER))
+    hip_center = ((-0.5, POSE_LEFT_HIP), (-0.5, POSE_RIGHT_HIP))
+    for a, b, _ in JOINT_ANGLES.values():
+        vector((1, a), (-1, b))
+    for _, b, c in JOINT_ANGLES.values():
+        vector((1, c), (-1, b))
+    for shoulder, elbow in ARM_SEGMENTS.values():
+        vector((1, elbow), (-1, shoulder))
+    for elbow in ELBOW_TORSO_DISTANCES.values():
+        vector((1, elbow), *((-weight, index) for weight, index in shoulder_center))
+    vector((1, POSE_LEFT_SHOULDER), (-1, POSE_RIGHT_SHOULDER))
+    for a, b in JOINT_DISTANCES.values():
+        vector((1, a), (-1, b))
+    vector(*shoulder_center, *hip_center)
+    return np.array(rows)
+
+
+_DIFFERENCES = _difference_matrix()
+_ANGLES = slice(0, len(JOINT_ANGLES))
+_ANGLE_ARMS = slice(len(JOINT_ANGLES), 2 * len(JOINT_ANGLES))
+_SEGMENTS = slice(_ANGLE_ARMS.stop, _ANGLE_ARMS.stop + len(ARM_SEGMENTS))
+_ELBOWS = slice(_SEGMENTS.stop, _SEGMENTS.stop + len(ELBOW_TORSO_DISTANCES))
+_SHOULDER_WIDTH = _ELBOWS.stop
+_DISTANCES = slice(_SHOULDER_WIDTH + 1, _SHOULDER_WIDTH + 1 + len(JOINT_DISTANCES))
+_SPINE = _DISTANCES.stop
+
+
+def _xy(landmarks):
+    """Współrzędne x, y jako float64 (..., 33, 2); przyjmuje LandmarkFrame albo tablicę (33, C) / (T, 33, C)."""
+    return np.asarray(getattr(landmarks, 'array', landmarks), dtype=np.float64)[..., :2]
+
+
+def _angles(ba, bc):
+    """Kąty (stopnie) między parami wektorów; 0, gdy któryś ma zerową długość (jak calculate_angle)."""
+    denominator = np.hypot(ba[..., 0], ba[..., 1]) * np.hypot(bc[..., 0], bc[..., 1])
+    degenerate = denominator == 0
+    cos_angle = np.clip((ba * bc).sum(axis=-1) / np.where(degenerate, 1.0, denominator), -1, 1)
+    return np.where(degenerate, 0.0, np.degrees(np.arccos(cos_angle)))
+
+
+def joint_angles(landmarks, index):
+    """Kąty w stawie B (stopnie) dla tablicy trójek (K, 3) indeksów A, B, C; wynik (K,) albo (T, K)."""
+    xy = _xy(landmarks)
+    a = xy[..., index[:, 0], :]
+    b = xy[..., index[:, 1], :]
+    c = xy[..., index[:, 2], :]
+    return _angles(a - b, c - b)
+
+
+def joint_geometry(landmarks):
+    """
+    Wszystkie kąty, pionowość ramion, znormalizowane dystanse i kąt tułowia
+    używane przez oba ćwiczenia, liczone jednym zwektoryzowanym przebiegiem.
+    Dla pojedynczej klatki zwraca słownik nazwa -> float, dla partii (T, 33, C)
+    słownik nazwa -> tablica (T,). Wyniki odpowiadają funkcjom calculate_* z core.calculations.
+    """
+    xy = _xy(landmarks)
+    vectors = _DIFFERENCES @ xy
+    lengths = np.hypot(vectors[..., 0], vectors[..., 1])
+
+    angles = _angles(vectors[..., _ANGLES, :], vectors[..., _ANGLE_ARMS, :])
+
+    arm_length = lengths[..., _SEGMENTS]
+    degenerate = arm_length == 0
+    cos_vertical = np.clip(-vectors[..., _SEGMENTS, 1] / np.where(degenerate, 1.0, arm_length), -1, 1)
+    verticality = np.where(degenerate, 0.0, np.abs(180 - np.degrees(np.arccos(cos_vertical))))
+
+    shoulder_width = lengths[..., _SHOULDER_WIDTH, None]
+    elbow_torso = lengths[..., _ELBOWS] / np.where(shoulder_width == 0, 1.0, shoulder_width)
+
+    spine = vectors[..., _SPINE, :]
+    trunk = np.where(
+        lengths[..., _SPINE] == 0,
+        180.0,
+        180 + np.degrees(np.arctan2(spine[..., 0], -spine[..., 1]))
+    )
+
+    table = np.concatenate([angles, verticality, elbow_torso, lengths[..., _DISTANCES], trunk[..., None]], axis=-1)
+    if table.ndim == 1:
+        return dict(zip(GEOMETRY_NAMES, table.tolist()))
+    return {name: table[:, i] for i, name in enumerate(GEOMETRY_NAMES)}
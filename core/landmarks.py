@@ -0,0 +1,79 @@
+"""Kompaktowa reprezentacja landmarków pozy jako tablicy float32."""
+import numpy as np
+
+LANDMARK_COUNT = 33
+LANDMARK_FIELDS = 4
+LANDMARK_X = 0
+LANDMARK_Y = 1
+LANDMARK_VISIBILITY = 2
+LANDMARK_Z = 3
+
+MIN_LANDMARK_VISIBILITY = 0.5
+
+
+def landmarks_to_array(results, out=None):
+    """Zamienia wynik MediaPipe na tablicę (33, 4): x, y, visibility, z. None, gdy brak pozy."""
+    if results is None or not results.pose_landmarks:
+        return None
+    if out is None:
+        out = np.empty((LANDMARK_COUNT, LANDMARK_FIELDS), dtype=np.float32)
+    for i, lm in enumerate(results.pose_landmarks.landmark):
+        out[i, LANDMARK_X] = lm.x
+        out[i, LANDMARK_Y] = lm.y
+        out[i, LANDMARK_VISIBILITY] = getattr(lm, 'visibility', 0)
+        out[i, LANDMARK_Z] = lm.z
+    return out
+
+
+class LandmarkFrame:
+    """
+    Landmarki jednego widoku z jednej klatki, wspólne dla wszystkich odbiorców wyniku.
+    array to ciągła tablica float32 (33, 4) - x, y, visibility, z - albo None, gdy nie wykryto pozy.
+    frame[i] zwraca (x, y, visibility) jak dawny słownik z extract_pose_landmarks.
+    timestamp to czas przechwycenia klatki (time.monotonic, sekundy) albo None, gdy nieznany.
+    """
+    def __init__(self, array, timestamp=None):
+        self.array = array
+        self.timestamp = timestamp
+        self._rows = None
+        if array is None:
+            self.xy = None
+            self.visibility = None
+            self.visible = None
+        else:
+            self.xy = array[:, LANDMARK_X:LANDMARK_Y + 1]
+            self.visibility = array[:, LANDMARK_VISIBILITY]
+            self.visible = self.visibility >= MIN_LANDMARK_VISIBILITY
+
+    @classmethod
+    def from_results(cls, results):
+        """LandmarkFrame z wyniku pozy; wynik MediaPipe jest przechodzony tylko tutaj."""
+        if isinstance(results, cls):
+            return results
+        return cls(landmarks_to_array(results))
+
+    @property
+    def has_pose(self):
+        return self.array is not None
+
+    def __bool__(self):
+        return self.array is not None
+
+    def __getitem__(self, index):
+        if self._rows is None:
+            self._rows = self.array[:, :LANDMARK_Z].tolist()
+        return self._rows[index]
+
+    def is_visible(self, indices, min_visibility=None):
+        """Czy wszystkie wskazane landmarki są widoczne."""
+        if self.array is None:
+            return False
+        if min_visibility is None:
+            return bool(self.visible[indices].all())
+        return bool((self.visibility[indices] >= min_visibility).all())
+
+    def confidence(self, indices):
+        """Średnia widoczność wskazanych landmarków."""
+        if self.array is None or not len(indices):
+            return 0.0
+        return float(self.visibility[indices].mean(dtype=np.float64))
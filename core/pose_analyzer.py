@@ -1,13 +1,30 @@
 from collections import deque
 
 
+def _is_new_frame(analyzer, results):
+    """
+    False dla wyniku, którego czas przechwycenia nie jest późniejszy od ostatnio analizowanego
+    (ten sam wynik podany ponownie po pominiętej inferencji albo klatka spóźniona).
+    """
+    timestamp = getattr(results, 'timestamp', None)
+    if timestamp is None:
+        return True
+    if analyzer.last_timestamp is not None and timestamp <= analyzer.last_timestamp:
+        return False
+    analyzer.last_timestamp = timestamp
+    return True
+
+
 class PoseAnalyzer:
     """Analizuje pozycję na podstawie klatek."""
     def __init__(self, calculation_fn, max_history=30):
         self.calculation_fn = calculation_fn
         self.history = deque(maxlen=max_history)
+        self.last_timestamp = None
     
     def process_frame(self, results):
+        if not _is_new_frame(self, results):
+            return
         metrics = self.calculation_fn(results, self.history)
         if metrics:
             self.history.append(metrics)
@@ -27,8 +44,11 @@ class EnhancedPoseAnalyzer:
         self.frames_since_valid = 0
         self.max_interpolation_frames = max_interpolation_frames
         self.numeric_keys = set()
+        self.last_timestamp = None
     
     def process_frame(self, results):
+        if not _is_new_frame(self, results):
+            return
         metrics = self.calculation_fn(results, self.history)
         
         if metrics:
@@ -123,4 +143,5 @@ class EnhancedPoseAnalyzer:
         self.history.clear()
         self.confidence_history.clear()
         self.frames_since_valid = 0
-        self.numeric_keys.clear()
\ No newline at end of file
+        self.numeric_keys.clear()
+        self.last_timestamp = None
\ No newline at end of file
@@ -26,13 +26,14 @@ NORMAL_COLOR = (245, 117, 66)
 ERROR_COLOR = (0, 0, 255)
 
 
-def draw_pose_with_errors(frame, results, error_states):
-    """Rysuje pozę i podświetla błędy na obrazie."""
-    if not results.pose_landmarks:
+def draw_pose_with_errors(frame, landmarks, error_states):
+    """Rysuje pozę (LandmarkFrame) i podświetla błędy na obrazie."""
+    if not landmarks:
         return
     
-    landmarks = results.pose_landmarks.landmark
     h, w, _ = frame.shape
+    points = (landmarks.xy * (w, h)).astype(int).tolist()
+    visible = (landmarks.visibility > 0.5).tolist()
     
     current_time = time.time()
     
@@ -42,13 +43,8 @@ def draw_pose_with_errors(frame, results, error_states):
     
     for connection in RELEVANT_CONNECTIONS:
         start_idx, end_idx = connection
-        start_landmark = landmarks[start_idx]
-        end_landmark = landmarks[end_idx]
         
-        if start_landmark.visibility > 0.5 and end_landmark.visibility > 0.5:
-            start_point = (int(start_landmark.x * w), int(start_landmark.y * h))
-            end_point = (int(end_landmark.x * w), int(end_landmark.y * h))
-            
+        if visible[start_idx] and visible[end_idx]:
             color = NORMAL_COLOR
             if connection in LEFT_ARM_CONNECTIONS and left_arm_error:
                 color = ERROR_COLOR
@@ -57,13 +53,10 @@ def draw_pose_with_errors(frame, results, error_states):
             elif connection in TRUNK_CONNECTIONS and trunk_error:
                 color = ERROR_COLOR
             
-            cv2.line(frame, start_point, end_point, color, 2)
+            cv2.line(frame, tuple(points[start_idx]), tuple(points[end_idx]), color, 2)
     
     for idx in RELEVANT_LANDMARKS:
-        landmark = landmarks[idx]
-        if landmark.visibility > 0.5:
-            cx, cy = int(landmark.x * w), int(landmark.y * h)
-            
+        if visible[idx]:
             color = NORMAL_COLOR
             if idx in LEFT_ARM_LANDMARKS and left_arm_error:
                 color = ERROR_COLOR
@@ -72,4 +65,4 @@ def draw_pose_with_errors(frame, results, error_states):
             elif idx in TRUNK_LANDMARKS and trunk_error:
                 color = ERROR_COLOR
             
-            cv2.circle(frame, (cx, cy), 3, color, -1)
\ No newline at end of file
+            cv2.circle(frame, tuple(points[idx]), 3, color, -1)
@@ -4,6 +4,7 @@ PROFILE_FLEX_THRESHOLD = 80
 PROFILE_EXTEND_THRESHOLD = 130
 
 STABILITY_FRAMES = 3
+PHASE_STABLE_MS = 60
 
 FRONT_ANGLE_SMOOTHING = 0.9
 FRONT_ELBOW_DIST_SMOOTHING = 0.5
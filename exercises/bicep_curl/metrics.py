@@ -1,17 +1,14 @@
 """Oblicza metryki dla ćwiczenia bicepsów."""
+from threading import local
 from core.calculations import (
     extract_pose_landmarks,
     get_landmark_confidence,
     check_landmarks_visible,
-    calculate_angle,
-    calculate_arm_verticality,
-    calculate_elbow_to_torso_distance,
-    calculate_wrist_to_shoulder_distance,
-    calculate_trunk_angle,
-    AdaptiveSmoother,
+    SmootherBank,
     PhaseDetector,
     detect_phase_with_hysteresis
 )
+from core.geometry import joint_geometry
 from core.constants import *
 from exercises.bicep_curl.constants import *
 
@@ -28,46 +25,62 @@ PROFILE_REQUIRED_LANDMARKS = [
     POSE_RIGHT_HIP, POSE_LEFT_HIP
 ]
 
-_front_smoothers = {
-    'right_angle': AdaptiveSmoother(base_smoothing=0.3, velocity_threshold=8.0),
-    'left_angle': AdaptiveSmoother(base_smoothing=0.3, velocity_threshold=8.0),
-    'right_elbow_dist': AdaptiveSmoother(base_smoothing=0.4, velocity_threshold=0.05),
-    'left_elbow_dist': AdaptiveSmoother(base_smoothing=0.4, velocity_threshold=0.05),
-    'right_wrist_dist': AdaptiveSmoother(base_smoothing=0.35, velocity_threshold=0.03),
-    'left_wrist_dist': AdaptiveSmoother(base_smoothing=0.35, velocity_threshold=0.03),
-}
-
-_front_phase_detectors = {
-    'right': PhaseDetector(flex_threshold=FRONT_FLEX_THRESHOLD, extend_threshold=FRONT_EXTEND_THRESHOLD, hysteresis=10),
-    'left': PhaseDetector(flex_threshold=FRONT_FLEX_THRESHOLD, extend_threshold=FRONT_EXTEND_THRESHOLD, hysteresis=10),
-}
-
-_profile_smoothers = {
-    'right_angle': AdaptiveSmoother(base_smoothing=0.3, velocity_threshold=8.0),
-    'trunk_angle': AdaptiveSmoother(base_smoothing=0.4, velocity_threshold=3.0),
-    'right_wrist_dist': AdaptiveSmoother(base_smoothing=0.35, velocity_threshold=0.03),
-}
-
-_profile_phase_detector = PhaseDetector(
-    flex_threshold=PROFILE_FLEX_THRESHOLD, 
-    extend_threshold=PROFILE_EXTEND_THRESHOLD, 
-    hysteresis=10
-)
+_thread_state = local()
+
+
+def _create_state():
+    # progi prędkości w jednostkach na sekundę; przy filtrowaniu landmarków metryki nie są wygładzane drugi raz
+    return {
+        'front_smoothers': SmootherBank({
+            'right_angle': dict(base_smoothing=0.3, velocity_threshold=240.0),
+            'left_angle': dict(base_smoothing=0.3, velocity_threshold=240.0),
+            'right_elbow_dist': dict(base_smoothing=0.4, velocity_threshold=1.5),
+            'left_elbow_dist': dict(base_smoothing=0.4, velocity_threshold=1.5),
+            'right_wrist_dist': dict(base_smoothing=0.35, velocity_threshold=0.9),
+            'left_wrist_dist': dict(base_smoothing=0.35, velocity_threshold=0.9),
+        }, smoothing=LANDMARK_FILTER is None),
+        'front_phase_detectors': {
+            'right': PhaseDetector(flex_threshold=FRONT_FLEX_THRESHOLD, extend_threshold=FRONT_EXTEND_THRESHOLD, hysteresis=10),
+            'left': PhaseDetector(flex_threshold=FRONT_FLEX_THRESHOLD, extend_threshold=FRONT_EXTEND_THRESHOLD, hysteresis=10),
+        },
+        'profile_smoothers': SmootherBank({
+            'right_angle': dict(base_smoothing=0.3, velocity_threshold=240.0),
+            'trunk_angle': dict(base_smoothing=0.4, velocity_threshold=90.0),
+            'right_wrist_dist': dict(base_smoothing=0.35, velocity_threshold=0.9),
+        }, smoothing=LANDMARK_FILTER is None),
+        'profile_phase_detector': PhaseDetector(
+            flex_threshold=PROFILE_FLEX_THRESHOLD, 
+            extend_threshold=PROFILE_EXTEND_THRESHOLD, 
+            hysteresis=10
+        ),
+    }
 
 
-def reset_front_view_state():
-    """Resetuje stan filtrów i detektorów (widok przód)."""
-    for smoother in _front_smoothers.values():
-        smoother.reset()
-    for detector in _front_phase_detectors.values():
+def _state():
+    """Stan filtrów i detektorów wątku analizy (każda sesja analizuje we własnym wątku)."""
+    state = getattr(_thread_state, 'value', None)
+    if state is None:
+        state = _thread_state.value = _create_state()
+    return state
+
+
+def reset_front_view_state(smoothing=None):
+    """Resetuje stan filtrów i detektorów (widok przód); smoothing włącza lub wyłącza wygładzanie metryk (None - bez zmian)."""
+    state = _state()
+    state['front_smoothers'].reset()
+    if smoothing is not None:
+        state['front_smoothers'].smoothing = smoothing
+    for detector in state['front_phase_detectors'].values():
         detector.reset()
 
 
-def reset_profile_view_state():
-    """Resetuje stan filtrów i detektorów (widok profil)."""
-    for smoother in _profile_smoothers.values():
-        smoother.reset()
-    _profile_phase_detector.reset()
+def reset_profile_view_state(smoothing=None):
+    """Resetuje stan filtrów i detektorów (widok profil); smoothing włącza lub wyłącza wygładzanie metryk (None - bez zmian)."""
+    state = _state()
+    state['profile_smoothers'].reset()
+    if smoothing is not None:
+        state['profile_smoothers'].smoothing = smoothing
+    state['profile_phase_detector'].reset()
 
 
 def calculate_front_view(results, history):
@@ -80,39 +93,34 @@ def calculate_front_view(results, history):
         return None
     
     prev = history[-1] if history else {}
+    state = _state()
+    smoothers = state['front_smoothers']
+    phase_detectors = state['front_phase_detectors']
     
     confidence = get_landmark_confidence(landmarks, FRONT_REQUIRED_LANDMARKS)
     
-    right_shoulder = landmarks[POSE_RIGHT_SHOULDER]
-    left_shoulder = landmarks[POSE_LEFT_SHOULDER]
-    right_elbow = landmarks[POSE_RIGHT_ELBOW]
-    left_elbow = landmarks[POSE_LEFT_ELBOW]
-    right_wrist = landmarks[POSE_RIGHT_WRIST]
-    left_wrist = landmarks[POSE_LEFT_WRIST]
-
-    right_angle_raw = calculate_angle(right_shoulder, right_elbow, right_wrist)
-    left_angle_raw = calculate_angle(left_shoulder, left_elbow, left_wrist)
-    
-    right_angle_smooth = _front_smoothers['right_angle'].update(right_angle_raw)
-    left_angle_smooth = _front_smoothers['left_angle'].update(left_angle_raw)
-    
-    right_verticality = calculate_arm_verticality(right_shoulder, right_elbow)
-    left_verticality = calculate_arm_verticality(left_shoulder, left_elbow)
-    
-    right_dist_raw = calculate_elbow_to_torso_distance(right_elbow, right_shoulder, left_shoulder)
-    left_dist_raw = calculate_elbow_to_torso_distance(left_elbow, right_shoulder, left_shoulder)
-    
-    right_elbow_dist_smooth = _front_smoothers['right_elbow_dist'].update(right_dist_raw)
-    left_elbow_dist_smooth = _front_smoothers['left_elbow_dist'].update(left_dist_raw)
-    
-    right_wrist_dist_raw = calculate_wrist_to_shoulder_distance(right_wrist, right_shoulder)
-    left_wrist_dist_raw = calculate_wrist_to_shoulder_distance(left_wrist, left_shoulder)
-    
-    right_wrist_dist_smooth = _front_smoothers['right_wrist_dist'].update(right_wrist_dist_raw)
-    left_wrist_dist_smooth = _front_smoothers['left_wrist_dist'].update(left_wrist_dist_raw)
-    
-    right_phase = _front_phase_detectors['right'].update(right_angle_smooth)
-    left_phase = _front_phase_detectors['left'].update(left_angle_smooth)
+    geometry = joint_geometry(landmarks)
+
+    right_verticality = geometry['right_arm_verticality']
+    left_verticality = geometry['left_arm_verticality']
+    
+    smoothed = smoothers.update({
+        'right_angle': geometry['right_elbow_angle'],
+        'left_angle': geometry['left_elbow_angle'],
+        'right_elbow_dist': geometry['right_elbow_torso_dist'],
+        'left_elbow_dist': geometry['left_elbow_torso_dist'],
+        'right_wrist_dist': geometry['right_wrist_shoulder_dist'],
+        'left_wrist_dist': geometry['left_wrist_shoulder_dist'],
+    }, landmarks.timestamp)
+    right_angle_smooth = smoothed['right_angle']
+    left_angle_smooth = smoothed['left_angle']
+    right_elbow_dist_smooth = smoothed['right_elbow_dist']
+    left_elbow_dist_smooth = smoothed['left_elbow_dist']
+    right_wrist_dist_smooth = smoothed['right_wrist_dist']
+    left_wrist_dist_smooth = smoothed['left_wrist_dist']
+    
+    right_phase = phase_detectors['right'].update(right_angle_smooth, landmarks.timestamp)
+    left_phase = phase_detectors['left'].update(left_angle_smooth, landmarks.timestamp)
     
     right_reps = prev.get('right_reps', 0)
     right_rep_flag = prev.get('right_rep_flag', False)
@@ -124,9 +132,9 @@ def calculate_front_view(results, history):
     if right_verticality > VERTICAL_STANCE_THRESHOLD:
         right_stance_valid = False
     
-    if right_phase == 'flexed' and _front_phase_detectors['right'].is_stable(3):
+    if right_phase == 'flexed' and phase_detectors['right'].is_stable_for(PHASE_STABLE_MS):
         right_rep_flag = True
-    elif right_phase == 'extended' and right_rep_flag and _front_phase_detectors['right'].is_stable(3):
+    elif right_phase == 'extended' and right_rep_flag and phase_detectors['right'].is_stable_for(PHASE_STABLE_MS):
         right_reps += 1
         right_rep_flag = False
     
@@ -140,9 +148,9 @@ def calculate_front_view(results, history):
     if left_verticality > VERTICAL_STANCE_THRESHOLD:
         left_stance_valid = False
     
-    if left_phase == 'flexed' and _front_phase_detectors['left'].is_stable(3):
+    if left_phase == 'flexed' and phase_detectors['left'].is_stable_for(PHASE_STABLE_MS):
         left_rep_flag = True
-    elif left_phase == 'extended' and left_rep_flag and _front_phase_detectors['left'].is_stable(3):
+    elif left_phase == 'extended' and left_rep_flag and phase_detectors['left'].is_stable_for(PHASE_STABLE_MS):
         left_reps += 1
         left_rep_flag = False
     
@@ -169,8 +177,8 @@ def calculate_front_view(results, history):
         'left_wrist_dist_smooth': left_wrist_dist_smooth,
         'right_rep_flag': right_rep_flag,
         'left_rep_flag': left_rep_flag,
-        'right_velocity': _front_smoothers['right_angle'].get_velocity(),
-        'left_velocity': _front_smoothers['left_angle'].get_velocity(),
+        'right_velocity': smoothers.get_velocity('right_angle'),
+        'left_velocity': smoothers.get_velocity('left_angle'),
         'confidence': round(confidence, 2),
     }
 
@@ -185,38 +193,31 @@ def calculate_profile_view(results, history):
         return None
     
     prev = history[-1] if history else {}
+    state = _state()
+    smoothers = state['profile_smoothers']
+    phase_detector = state['profile_phase_detector']
     
     confidence = get_landmark_confidence(landmarks, PROFILE_REQUIRED_LANDMARKS)
         
-    right_shoulder = landmarks[POSE_RIGHT_SHOULDER]
-    left_shoulder = landmarks[POSE_LEFT_SHOULDER]
-    right_elbow = landmarks[POSE_RIGHT_ELBOW]
-    right_wrist = landmarks[POSE_RIGHT_WRIST]
-    right_hip = landmarks[POSE_RIGHT_HIP]
-    left_hip = landmarks[POSE_LEFT_HIP]
-    
-    right_angle_raw = calculate_angle(right_shoulder, right_elbow, right_wrist)
-    right_angle_smooth = _profile_smoothers['right_angle'].update(right_angle_raw)
-    
-    right_wrist_dist_raw = calculate_wrist_to_shoulder_distance(right_wrist, right_shoulder)
-    right_wrist_dist_smooth = _profile_smoothers['right_wrist_dist'].update(right_wrist_dist_raw)
-    
-    shoulder_mid = ((right_shoulder[0] + left_shoulder[0]) / 2, 
-                    (right_shoulder[1] + left_shoulder[1]) / 2)
-    hip_mid = ((right_hip[0] + left_hip[0]) / 2,
-               (right_hip[1] + left_hip[1]) / 2)
+    geometry = joint_geometry(landmarks)
     
-    trunk_angle_raw = calculate_trunk_angle(shoulder_mid, hip_mid)
-    trunk_angle_smooth = _profile_smoothers['trunk_angle'].update(trunk_angle_raw)
+    smoothed = smoothers.update({
+        'right_angle': geometry['right_elbow_angle'],
+        'trunk_angle': geometry['trunk_angle'],
+        'right_wrist_dist': geometry['right_wrist_shoulder_dist'],
+    }, landmarks.timestamp)
+    right_angle_smooth = smoothed['right_angle']
+    trunk_angle_smooth = smoothed['trunk_angle']
+    right_wrist_dist_smooth = smoothed['right_wrist_dist']
     
-    right_phase = _profile_phase_detector.update(right_angle_smooth)
+    right_phase = phase_detector.update(right_angle_smooth, landmarks.timestamp)
     
     right_reps = prev.get('right_reps', 0)
     right_rep_flag = prev.get('right_rep_flag', False)
     
-    if right_phase == 'flexed' and _profile_phase_detector.is_stable(3):
+    if right_phase == 'flexed' and phase_detector.is_stable_for(PHASE_STABLE_MS):
         right_rep_flag = True
-    elif right_phase == 'extended' and right_rep_flag and _profile_phase_detector.is_stable(3):
+    elif right_phase == 'extended' and right_rep_flag and phase_detector.is_stable_for(PHASE_STABLE_MS):
         right_reps += 1
         right_rep_flag = False
     
@@ -230,7 +231,7 @@ def calculate_profile_view(results, history):
         'trunk_angle_smooth': trunk_angle_smooth,
         'right_wrist_dist_smooth': right_wrist_dist_smooth,
         'right_rep_flag': right_rep_flag,
-        'right_velocity': _profile_smoothers['right_angle'].get_velocity(),
-        'trunk_velocity': _profile_smoothers['trunk_angle'].get_velocity(),
+        'right_velocity': smoothers.get_velocity('right_angle'),
+        'trunk_velocity': smoothers.get_velocity('trunk_angle'),
         'confidence': round(confidence, 2),
     }
\ No newline at end of file
@@ -4,6 +4,7 @@ PROFILE_FLEX_THRESHOLD = 90
 PROFILE_EXTEND_THRESHOLD = 160
 
 STABILITY_FRAMES = 3
+PHASE_STABLE_MS = 60
 
 FRONT_ANGLE_SMOOTHING = 0.9
 PROFILE_ANGLE_SMOOTHING = 0.9
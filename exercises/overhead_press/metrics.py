@@ -1,13 +1,13 @@
 """Oblicza metryki dla wyciskania nad głowę."""
+from threading import local
 from core.calculations import (
     extract_pose_landmarks,
     get_landmark_confidence,
     check_landmarks_visible,
-    calculate_angle,
-    calculate_trunk_angle,
-    AdaptiveSmoother,
+    SmootherBank,
     PhaseDetector
 )
+from core.geometry import joint_geometry
 from core.constants import *
 from exercises.overhead_press.constants import *
 
@@ -25,62 +25,79 @@ PROFILE_REQUIRED_LANDMARKS = [
     POSE_RIGHT_HIP, POSE_LEFT_HIP
 ]
 
-_front_smoothers = {
-    'right_angle': AdaptiveSmoother(base_smoothing=0.3, velocity_threshold=8.0),
-    'left_angle': AdaptiveSmoother(base_smoothing=0.3, velocity_threshold=8.0),
-    'right_wrist_y': AdaptiveSmoother(base_smoothing=0.3, velocity_threshold=0.05),
-    'left_wrist_y': AdaptiveSmoother(base_smoothing=0.3, velocity_threshold=0.05),
-}
+_thread_state = local()
 
-_front_phase_detector = PhaseDetector(
-    flex_threshold=FRONT_FLEX_THRESHOLD,
-    extend_threshold=FRONT_EXTEND_THRESHOLD,
-    hysteresis=15
-)
-
-_profile_smoothers = {
-    'right_angle': AdaptiveSmoother(base_smoothing=0.3, velocity_threshold=8.0),
-    'trunk_angle': AdaptiveSmoother(base_smoothing=0.4, velocity_threshold=3.0),
-}
-
-_profile_phase_detector = PhaseDetector(
-    flex_threshold=PROFILE_FLEX_THRESHOLD,
-    extend_threshold=PROFILE_EXTEND_THRESHOLD,
-    hysteresis=15
-)
-
-_active_zone_state = {
-    'in_active_zone': False,
-    'entered_start_position': False,
-    'frames_in_start_position': 0,
-    'frames_in_active_zone': 0,
-}
 
-
-def reset_front_view_state():
-    """Resetuje stan filtrów i strefy aktywnej (przód)."""
-    global _active_zone_state
-    for smoother in _front_smoothers.values():
-        smoother.reset()
-    _front_phase_detector.reset()
-    _active_zone_state = {
+def _create_active_zone_state():
+    return {
         'in_active_zone': False,
         'entered_start_position': False,
         'frames_in_start_position': 0,
-        'frames_in_active_zone': 0,
+        'active_zone_since': None,
+        'last_timestamp': None,
+    }
+
+
+def _create_state():
+    # progi prędkości w jednostkach na sekundę; przy filtrowaniu landmarków metryki nie są wygładzane drugi raz
+    return {
+        'front_smoothers': SmootherBank({
+            'right_angle': dict(base_smoothing=0.3, velocity_threshold=240.0),
+            'left_angle': dict(base_smoothing=0.3, velocity_threshold=240.0),
+            'right_wrist_y': dict(base_smoothing=0.3, velocity_threshold=1.5),
+            'left_wrist_y': dict(base_smoothing=0.3, velocity_threshold=1.5),
+        }, smoothing=LANDMARK_FILTER is None),
+        'front_phase_detector': PhaseDetector(
+            flex_threshold=FRONT_FLEX_THRESHOLD,
+            extend_threshold=FRONT_EXTEND_THRESHOLD,
+            hysteresis=15
+        ),
+        'profile_smoothers': SmootherBank({
+            'right_angle': dict(base_smoothing=0.3, velocity_threshold=240.0),
+            'trunk_angle': dict(base_smoothing=0.4, velocity_threshold=90.0),
+        }, smoothing=LANDMARK_FILTER is None),
+        'profile_phase_detector': PhaseDetector(
+            flex_threshold=PROFILE_FLEX_THRESHOLD,
+            extend_threshold=PROFILE_EXTEND_THRESHOLD,
+            hysteresis=15
+        ),
+        'active_zone': _create_active_zone_state(),
     }
 
 
-def reset_profile_view_state():
-    """Resetuje stan filtrów i detektora (profil)."""
-    for smoother in _profile_smoothers.values():
-        smoother.reset()
-    _profile_phase_detector.reset()
+def _state():
+    """Stan filtrów, detektorów i strefy aktywnej wątku analizy (każda sesja analizuje we własnym wątku)."""
+    state = getattr(_thread_state, 'value', None)
+    if state is None:
+        state = _thread_state.value = _create_state()
+    return state
+
+
+def reset_front_view_state(smoothing=None):
+    """Resetuje stan filtrów i strefy aktywnej (przód); smoothing włącza lub wyłącza wygładzanie metryk (None - bez zmian)."""
+    state = _state()
+    state['front_smoothers'].reset()
+    if smoothing is not None:
+        state['front_smoothers'].smoothing = smoothing
+    state['front_phase_detector'].reset()
+    state['active_zone'] = _create_active_zone_state()
+
+
+def reset_profile_view_state(smoothing=None):
+    """Resetuje stan filtrów i detektora (profil); smoothing włącza lub wyłącza wygładzanie metryk (None - bez zmian)."""
+    state = _state()
+    state['profile_smoothers'].reset()
+    if smoothing is not None:
+        state['profile_smoothers'].smoothing = smoothing
+    state['profile_phase_detector'].reset()
 
 
-def _check_in_active_zone(right_wrist_y, left_wrist_y, right_shoulder_y, left_shoulder_y, avg_angle, calibration=None):
-    """Sprawdza wejście do aktywnej strefy ruchu."""
-    global _active_zone_state
+def _check_in_active_zone(right_wrist_y, left_wrist_y, right_shoulder_y, left_shoulder_y, avg_angle, calibration=None, timestamp=None):
+    """Sprawdza wejście do aktywnej strefy ruchu (nadgarstki nad barkami przez PHASE_STABLE_MS)."""
+    active_zone_state = _state()['active_zone']
+    if timestamp is None:
+        timestamp = (active_zone_state['last_timestamp'] or 0.0) + 1.0 / METRICS_REFERENCE_FPS
+    active_zone_state['last_timestamp'] = timestamp
     
     avg_wrist_y = (right_wrist_y + left_wrist_y) / 2
     avg_shoulder_y = (right_shoulder_y + left_shoulder_y) / 2
@@ -90,14 +107,15 @@ def _check_in_active_zone(right_wrist_y, left_wrist_y, right_shoulder_y, left_sh
     in_start_position = wrists_above_shoulders and avg_angle < 120
     
     if wrists_above_shoulders:
-        _active_zone_state['frames_in_active_zone'] += 1
-        if _active_zone_state['frames_in_active_zone'] >= STABILITY_FRAMES:
-            _active_zone_state['in_active_zone'] = True
+        if active_zone_state['active_zone_since'] is None:
+            active_zone_state['active_zone_since'] = timestamp
+        if (timestamp - active_zone_state['active_zone_since']) * 1000 >= PHASE_STABLE_MS:
+            active_zone_state['in_active_zone'] = True
     else:
-        _active_zone_state['frames_in_active_zone'] = 0
-        _active_zone_state['in_active_zone'] = False
+        active_zone_state['active_zone_since'] = None
+        active_zone_state['in_active_zone'] = False
     
-    return _active_zone_state['in_active_zone'], in_start_position
+    return active_zone_state['in_active_zone'], in_start_position
 
 
 def calculate_front_view(results, history, calibration=None):
@@ -115,45 +133,49 @@ def calculate_front_view(results, history, calibration=None):
         return None
     
     prev = history[-1] if history else {}
+    state = _state()
+    smoothers = state['front_smoothers']
+    phase_detector = state['front_phase_detector']
     
     confidence = get_landmark_confidence(landmarks, basic_landmarks)
     
     right_shoulder = landmarks[POSE_RIGHT_SHOULDER]
     left_shoulder = landmarks[POSE_LEFT_SHOULDER]
-    right_elbow = landmarks[POSE_RIGHT_ELBOW]
-    left_elbow = landmarks[POSE_LEFT_ELBOW]
     right_wrist = landmarks[POSE_RIGHT_WRIST]
     left_wrist = landmarks[POSE_LEFT_WRIST]
+    geometry = joint_geometry(landmarks)
 
-    right_angle_raw = calculate_angle(right_shoulder, right_elbow, right_wrist)
-    left_angle_raw = calculate_angle(left_shoulder, left_elbow, left_wrist)
-    
-    right_angle_smooth = _front_smoothers['right_angle'].update(right_angle_raw)
-    left_angle_smooth = _front_smoothers['left_angle'].update(left_angle_raw)
+    smoothed = smoothers.update({
+        'right_angle': geometry['right_elbow_angle'],
+        'left_angle': geometry['left_elbow_angle'],
+        'right_wrist_y': right_wrist[1],
+        'left_wrist_y': left_wrist[1],
+    }, landmarks.timestamp)
+    right_angle_smooth = smoothed['right_angle']
+    left_angle_smooth = smoothed['left_angle']
+    right_wrist_y_smooth = smoothed['right_wrist_y']
+    left_wrist_y_smooth = smoothed['left_wrist_y']
     
     avg_angle = (right_angle_smooth + left_angle_smooth) / 2
     
-    right_wrist_y_smooth = _front_smoothers['right_wrist_y'].update(right_wrist[1])
-    left_wrist_y_smooth = _front_smoothers['left_wrist_y'].update(left_wrist[1])
-    
     arm_sync_diff = abs(right_angle_smooth - left_angle_smooth)
     wrist_y_diff = abs(right_wrist_y_smooth - left_wrist_y_smooth)
     
     in_active_zone, in_start_position = _check_in_active_zone(
         right_wrist_y_smooth, left_wrist_y_smooth,
         right_shoulder[1], left_shoulder[1],
-        avg_angle, calibration
+        avg_angle, calibration, landmarks.timestamp
     )
     
-    phase = _front_phase_detector.update(avg_angle)
+    phase = phase_detector.update(avg_angle, landmarks.timestamp)
     
     reps = prev.get('reps', 0)
     rep_flag = prev.get('rep_flag', False)
     
     if in_active_zone:
-        if phase == 'extended' and _front_phase_detector.is_stable(STABILITY_FRAMES):
+        if phase == 'extended' and phase_detector.is_stable_for(PHASE_STABLE_MS):
             rep_flag = True
-        elif phase == 'flexed' and rep_flag and _front_phase_detector.is_stable(STABILITY_FRAMES):
+        elif phase == 'flexed' and rep_flag and phase_detector.is_stable_for(PHASE_STABLE_MS):
             reps += 1
             rep_flag = False
     else:
@@ -168,8 +190,8 @@ def calculate_front_view(results, history, calibration=None):
         'reps': reps,
         'phase': phase,
         'rep_flag': rep_flag,
-        'right_velocity': _front_smoothers['right_angle'].get_velocity(),
-        'left_velocity': _front_smoothers['left_angle'].get_velocity(),
+        'right_velocity': smoothers.get_velocity('right_angle'),
+        'left_velocity': smoothers.get_velocity('left_angle'),
         'confidence': round(confidence, 2),
         'in_active_zone': in_active_zone,
         'in_start_position': in_start_position,
@@ -190,35 +212,31 @@ def calculate_profile_view(results, history, calibration=None):
         return None
     
     prev = history[-1] if history else {}
+    state = _state()
+    smoothers = state['profile_smoothers']
+    phase_detector = state['profile_phase_detector']
     
     confidence = get_landmark_confidence(landmarks, PROFILE_REQUIRED_LANDMARKS)
         
     right_shoulder = landmarks[POSE_RIGHT_SHOULDER]
-    left_shoulder = landmarks[POSE_LEFT_SHOULDER]
-    right_elbow = landmarks[POSE_RIGHT_ELBOW]
     right_wrist = landmarks[POSE_RIGHT_WRIST]
-    right_hip = landmarks[POSE_RIGHT_HIP]
-    left_hip = landmarks[POSE_LEFT_HIP]
-    
-    right_angle_raw = calculate_angle(right_shoulder, right_elbow, right_wrist)
-    right_angle_smooth = _profile_smoothers['right_angle'].update(right_angle_raw)
-    
-    shoulder_mid = ((right_shoulder[0] + left_shoulder[0]) / 2, 
-                    (right_shoulder[1] + left_shoulder[1]) / 2)
-    hip_mid = ((right_hip[0] + left_hip[0]) / 2,
-               (right_hip[1] + left_hip[1]) / 2)
+    geometry = joint_geometry(landmarks)
     
-    trunk_angle_raw = calculate_trunk_angle(shoulder_mid, hip_mid)
-    trunk_angle_smooth = _profile_smoothers['trunk_angle'].update(trunk_angle_raw)
+    smoothed = smoothers.update({
+        'right_angle': geometry['right_elbow_angle'],
+        'trunk_angle': geometry['trunk_angle'],
+    }, landmarks.timestamp)
+    right_angle_smooth = smoothed['right_angle']
+    trunk_angle_smooth = smoothed['trunk_angle']
     
     neutral_trunk = 180
     if calibration:
         neutral_trunk = calibration.neutral_trunk_angle
     trunk_deviation = abs(trunk_angle_smooth - neutral_trunk)
     
-    elbow_forward_angle = calculate_angle(right_shoulder, right_elbow, right_hip)
+    elbow_forward_angle = geometry['right_elbow_forward_angle']
     
-    phase = _profile_phase_detector.update(right_angle_smooth)
+    phase = phase_detector.update(right_angle_smooth, landmarks.timestamp)
     
     reps = prev.get('reps', 0)
     rep_flag = prev.get('rep_flag', False)
@@ -227,15 +245,15 @@ def calculate_profile_view(results, history, calibration=None):
     
     if wrist_above_shoulder:
         if REP_COUNT_AT_TOP:
-            if phase == 'flexed' and _profile_phase_detector.is_stable(STABILITY_FRAMES):
+            if phase == 'flexed' and phase_detector.is_stable_for(PHASE_STABLE_MS):
                 rep_flag = True
-            elif phase == 'extended' and rep_flag and _profile_phase_detector.is_stable(STABILITY_FRAMES):
+            elif phase == 'extended' and rep_flag and phase_detector.is_stable_for(PHASE_STABLE_MS):
                 reps += 1
                 rep_flag = False
         else:
-            if phase == 'extended' and _profile_phase_detector.is_stable(STABILITY_FRAMES):
+            if phase == 'extended' and phase_detector.is_stable_for(PHASE_STABLE_MS):
                 rep_flag = True
-            elif phase == 'flexed' and rep_flag and _profile_phase_detector.is_stable(STABILITY_FRAMES):
+            elif phase == 'flexed' and rep_flag and phase_detector.is_stable_for(PHASE_STABLE_MS):
                 reps += 1
                 rep_flag = False
     else:
@@ -249,8 +267,8 @@ def calculate_profile_view(results, history, calibration=None):
         'trunk_deviation': round(trunk_deviation, 1),
         'elbow_forward_angle': round(elbow_forward_angle or 0, 1),
         'rep_flag': rep_flag,
-        'right_velocity': _profile_smoothers['right_angle'].get_velocity(),
-        'trunk_velocity': _profile_smoothers['trunk_angle'].get_velocity(),
+        'right_velocity': smoothers.get_velocity('right_angle'),
+        'trunk_velocity': smoothers.get_velocity('trunk_angle'),
         'confidence': round(confidence, 2),
         'wrist_above_shoulder': wrist_above_shoulder,
     }
\ No newline at end of file
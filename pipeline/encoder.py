@@ -0,0 +1,89 @@
+"""Kodowanie klatek podglądu wysyłanych do przeglądarki."""
+import time
+import cv2
+from concurrent.futures import ThreadPoolExecutor
+from core.constants import PREVIEW_FORMAT, PREVIEW_QUALITY, PREVIEW_CHROMA_SUBSAMPLING
+
+PREVIEW_FORMATS = {
+    'jpeg': ('.jpg', 'image/jpeg'),
+    'webp': ('.webp', 'image/webp'),
+}
+
+CHROMA_SUBSAMPLING = {
+    '411': 'IMWRITE_JPEG_SAMPLING_FACTOR_411',
+    '420': 'IMWRITE_JPEG_SAMPLING_FACTOR_420',
+    '422': 'IMWRITE_JPEG_SAMPLING_FACTOR_422',
+    '444': 'IMWRITE_JPEG_SAMPLING_FACTOR_444',
+}
+
+
+def build_encode_params(format, quality, subsampling=None):
+    """Parametry cv2.imencode dla formatu, jakości (1-100) i podpróbkowania chrominancji JPEG."""
+    if format == 'webp':
+        return [cv2.IMWRITE_WEBP_QUALITY, int(quality)]
+
+    params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+    factor = getattr(cv2, CHROMA_SUBSAMPLING.get(subsampling, ''), None)
+    if factor is not None and hasattr(cv2, 'IMWRITE_JPEG_SAMPLING_FACTOR'):
+        params += [cv2.IMWRITE_JPEG_SAMPLING_FACTOR, factor]
+    return params
+
+
+class PreviewEncoder:
+    """
+    Koder podglądu obu widoków działający w etapie kodowania potoku.
+    Oba widoki są kodowane równolegle (cv2.imencode zwalnia GIL),
+    a jakość można zmieniać w trakcie sesji.
+    """
+    def __init__(self, format=PREVIEW_FORMAT, quality=PREVIEW_QUALITY, subsampling=PREVIEW_CHROMA_SUBSAMPLING):
+        if format not in PREVIEW_FORMATS:
+            raise ValueError(f"Unsupported preview format: {format}")
+        self.format = format
+        self.extension, self.mimetype = PREVIEW_FORMATS[format]
+        self.subsampling = subsampling
+        self.quality = quality
+        self.params = build_encode_params(format, quality, subsampling)
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='preview-encoder')
+        self.frames = 0
+        self.total_bytes = 0
+        self.busy_time = 0.0
+
+    def set_quality(self, quality):
+        quality = max(1, min(100, int(quality)))
+        if quality != self.quality:
+            self.quality = quality
+            self.params = build_encode_params(self.format, quality, self.subsampling)
+
+    def encode(self, image):
+        ok, encoded = cv2.imencode(self.extension, image, self.params)
+        if not ok:
+            return None
+        return encoded.tobytes()
+
+    def encode_pair(self, front_image, profile_image):
+        """Zwraca (front_bytes, profile_bytes); widok z obrazem None jest pomijany."""
+        start = time.perf_counter()
+        if front_image is not None and profile_image is not None:
+            profile_future = self.executor.submit(self.encode, profile_image)
+            front_bytes = self.encode(front_image)
+            profile_bytes = profile_future.result()
+        else:
+            front_bytes = self.encode(front_image) if front_image is not None else None
+            profile_bytes = self.encode(profile_image) if profile_image is not None else None
+
+        self.busy_time += time.perf_counter() - start
+        self.frames += 1
+        self.total_bytes += len(front_bytes or b'') + len(profile_bytes or b'')
+        return front_bytes, profile_bytes
+
+    def get_stats(self):
+        return {
+            'format': self.format,
+            'quality': self.quality,
+            'frames': self.frames,
+            'avg_ms': round(self.busy_time / self.frames * 1000, 2) if self.frames else 0.0,
+            'avg_kb': round(self.total_bytes / self.frames / 1024, 1) if self.frames else 0.0,
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=True)
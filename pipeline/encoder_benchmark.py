@@ -0,0 +1,93 @@
+"""
+Porównanie ustawień kodowania podglądu dla rozdzielczości podglądu obu kamer.
+Użycie: python -m pipeline.encoder_benchmark [ścieżka_obrazu_lub_indeks_kamery] [liczba_powtórzeń]
+"""
+import sys
+import time
+import cv2
+import numpy as np
+from core.constants import FRONT_PREVIEW_WIDTH, FRONT_PREVIEW_HEIGHT, PROFILE_PREVIEW_WIDTH, PROFILE_PREVIEW_HEIGHT
+from pipeline.encoder import PREVIEW_FORMATS, build_encode_params
+
+BENCHMARK_SETTINGS = [
+    ('jpeg', 95, '420'),
+    ('jpeg', 80, '420'),
+    ('jpeg', 70, '420'),
+    ('jpeg', 70, '444'),
+    ('jpeg', 50, '420'),
+    ('webp', 80, None),
+    ('webp', 60, None),
+]
+
+
+def load_sample(source=None):
+    """Klatka testowa: plik obrazu, kadr z kamery albo syntetyczny gradient z szumem."""
+    if source is not None:
+        if source.isdigit():
+            capture = cv2.VideoCapture(int(source))
+            ok, frame = capture.read()
+            capture.release()
+            if ok:
+                return frame
+        else:
+            frame = cv2.imread(source)
+            if frame is not None:
+                return frame
+        print(f"Could not read {source}, using a synthetic frame")
+
+    height, width = 720, 1280
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    frame = np.broadcast_to(gradient, (height, width, 3)).astype(np.uint8)
+    noise = np.random.default_rng(0).integers(0, 24, (height, width, 3), dtype=np.uint8)
+    frame = cv2.add(frame, noise)
+    cv2.circle(frame, (width // 2, height // 3), height // 8, (40, 160, 220), -1)
+    cv2.rectangle(frame, (width // 2 - 120, height // 2), (width // 2 + 120, height - 40), (90, 60, 30), -1)
+    return frame
+
+
+def fit_to(frame, width, height):
+    """Kadruje i skaluje klatkę do docelowej rozdzielczości tak jak robi to kamera."""
+    h, w = frame.shape[:2]
+    target_ratio = width / height
+    if w / h > target_ratio:
+        new_w = int(h * target_ratio)
+        x0 = (w - new_w) // 2
+        frame = frame[:, x0:x0 + new_w]
+    else:
+        new_h = int(w / target_ratio)
+        y0 = (h - new_h) // 2
+        frame = frame[y0:y0 + new_h]
+    return cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+
+def run_benchmark(sample, repeats=50):
+    views = {
+        'front': fit_to(sample, FRONT_PREVIEW_WIDTH, FRONT_PREVIEW_HEIGHT),
+        'profile': fit_to(sample, PROFILE_PREVIEW_WIDTH, PROFILE_PREVIEW_HEIGHT),
+    }
+    rows = []
+    for format, quality, subsampling in BENCHMARK_SETTINGS:
+        extension, _ = PREVIEW_FORMATS[format]
+        params = build_encode_params(format, quality, subsampling)
+        for view, image in views.items():
+            cv2.imencode(extension, image, params)
+            start = time.perf_counter()
+            for _ in range(repeats):
+                _, encoded = cv2.imencode(extension, image, params)
+            elapsed_ms = (time.perf_counter() - start) * 1000 / repeats
+            rows.append((view, f'{image.shape[1]}x{image.shape[0]}', format, quality, subsampling or '-', elapsed_ms, len(encoded)))
+    return rows
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else None
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    rows = run_benchmark(load_sample(source), repeats)
+
+    print(f"{'view':8} {'size':9} {'format':6} {'q':>3} {'chroma':6} {'ms':>7} {'KB':>7}")
+    for view, size, format, quality, subsampling, elapsed_ms, size_bytes in rows:
+        print(f"{view:8} {size:9} {format:6} {quality:>3} {subsampling:6} {elapsed_ms:7.2f} {size_bytes / 1024:7.1f}")
+
+
+if __name__ == '__main__':
+    main()
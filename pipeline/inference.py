@@ -0,0 +1,147 @@
+import time
+import cv2
+import mediapipe as mp
+from concurrent.futures import ThreadPoolExecutor
+from core.constants import POSE_INFERENCE_MODE, POSE_ROI_ENABLED
+from core.landmarks import LandmarkFrame, landmarks_to_array
+from pipeline.roi import RoiTracker
+
+mp_pose = mp.solutions.pose
+
+
+def create_pose(model_complexity=1):
+    """Tworzy estymator pozy MediaPipe z ustawieniami używanymi w sesjach."""
+    return mp_pose.Pose(
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5,
+        model_complexity=model_complexity
+    )
+
+
+def estimate_pose(pose, image):
+    """Konwersja BGR -> RGB i inferencja pozy dla jednej klatki."""
+    rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    rgb.flags.writeable = False
+    return pose.process(rgb)
+
+
+def estimate_landmarks(pose, image, tracker=None, out=None):
+    """
+    Inferencja na wycinku wokół poprzedniej pozy (gdy jest śledzona) z powrotem
+    do pełnej klatki po utracie pozy. Zwraca tablicę (33, 4) w układzie całej klatki albo None.
+    """
+    if tracker is None:
+        return landmarks_to_array(estimate_pose(pose, image), out)
+
+    crop, roi = tracker.crop(image)
+    landmarks = landmarks_to_array(estimate_pose(pose, crop), out)
+    if landmarks is None and roi is not None:
+        tracker.reset()
+        crop, roi = tracker.crop(image)
+        landmarks = landmarks_to_array(estimate_pose(pose, crop), out)
+
+    tracker.remap(landmarks, roi, image.shape)
+    tracker.update(landmarks, image.shape)
+    return landmarks
+
+
+class DualPoseInference:
+    """
+    Równoległa inferencja pozy dla widoku przedniego i bocznego.
+    MediaPipe zwalnia GIL podczas wykonywania grafu, więc dwa wątki robocze
+    skracają czas taktu do czasu wolniejszego z widoków.
+    """
+    def __init__(self, front_pose=None, profile_pose=None, use_roi=POSE_ROI_ENABLED, model_complexity=1, pool=None):
+        self.model_complexity = model_complexity
+        self.pool = pool
+        self.front_pose = front_pose or self._acquire_pose(model_complexity)
+        self.profile_pose = profile_pose or self._acquire_pose(model_complexity)
+        self.front_tracker = RoiTracker() if use_roi else None
+        self.profile_tracker = RoiTracker() if use_roi else None
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='pose-inference')
+        self.front_results = LandmarkFrame(None)
+        self.profile_results = LandmarkFrame(None)
+        self.front_ms = 0.0
+        self.profile_ms = 0.0
+        self.total_ms = 0.0
+
+    def _acquire_pose(self, model_complexity):
+        if self.pool is not None:
+            return self.pool.acquire(model_complexity)
+        return create_pose(model_complexity)
+
+    def _release_pose(self, pose, model_complexity):
+        if self.pool is not None:
+            self.pool.release(pose, model_complexity)
+        else:
+            pose.close()
+
+    @staticmethod
+    def _run(pose, tracker, image, timestamp):
+        start = time.perf_counter()
+        results = LandmarkFrame(estimate_landmarks(pose, image, tracker), timestamp)
+        return results, (time.perf_counter() - start) * 1000
+
+    def process(self, front_image, profile_image, front_timestamp=None, profile_timestamp=None):
+        """
+        Zwraca (front_results, profile_results) jako LandmarkFrame po zakończeniu obu inferencji.
+        Obraz None oznacza pominięcie widoku - zwracany jest wtedy jego poprzedni wynik (z poprzednim czasem przechwycenia).
+        """
+        start = time.perf_counter()
+        front_future = profile_future = None
+        if front_image is not None:
+            front_future = self.executor.submit(self._run, self.front_pose, self.front_tracker, front_image, front_timestamp)
+        if profile_image is not None:
+            profile_future = self.executor.submit(self._run, self.profile_pose, self.profile_tracker, profile_image, profile_timestamp)
+
+        if front_future is not None:
+            self.front_results, self.front_ms = front_future.result()
+        if profile_future is not None:
+            self.profile_results, self.profile_ms = profile_future.result()
+        self.total_ms = (time.perf_counter() - start) * 1000
+        return self.front_results, self.profile_results
+
+    def get_timings(self):
+        """Czasy ostatniego taktu w ms (per widok i łącznie)."""
+        return {
+            'front_ms': round(self.front_ms, 2),
+            'profile_ms': round(self.profile_ms, 2),
+            'total_ms': round(self.total_ms, 2),
+        }
+
+    def set_model_complexity(self, model_complexity):
+        """Podmienia estymatory na model o innej złożoności (wywoływać między taktami)."""
+        front_pose = self._acquire_pose(model_complexity)
+        try:
+            profile_pose = self._acquire_pose(model_complexity)
+        except Exception:
+            self._release_pose(front_pose, model_complexity)
+            raise
+        self._release_pose(self.front_pose, self.model_complexity)
+        self._release_pose(self.profile_pose, self.model_complexity)
+        self.front_pose = front_pose
+        self.profile_pose = profile_pose
+        self.model_complexity = model_complexity
+
+    def get_roi_stats(self):
+        """Statystyki przycinania wejścia dla obu widoków (None, gdy wyłączone)."""
+        if self.front_tracker is None:
+            return None
+        return {
+            'front': self.front_tracker.get_stats(),
+            'profile': self.profile_tracker.get_stats(),
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self._release_pose(self.front_pose, self.model_complexity)
+        self._release_pose(self.profile_pose, self.model_complexity)
+
+
+def create_pose_inference(mode=POSE_INFERENCE_MODE):
+    """Tworzy wykonawcę inferencji: 'thread' (pula wątków) lub 'process' (osobne procesy)."""
+    if mode == 'process':
+        from pipeline.pose_worker import ProcessDualPoseInference
+        return ProcessDualPoseInference()
+    from pipeline.pose_pool import pose_pool
+    return DualPoseInference(pool=pose_pool)
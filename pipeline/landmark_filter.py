@@ -0,0 +1,178 @@
+"""
+Filtrowanie landmarków pozy między inferencją a liczeniem metryk.
+Każdy landmark jest wygładzany raz (zamiast każdej metryki osobno), całą tablicą (33, 4) naraz.
+"""
+import math
+import time
+import numpy as np
+from core.landmarks import LandmarkFrame, LANDMARK_X, LANDMARK_Y, LANDMARK_Z
+from core.constants import (
+    LANDMARK_FILTER, METRICS_REFERENCE_FPS,
+    ONE_EURO_MIN_CUTOFF, ONE_EURO_BETA, ONE_EURO_D_CUTOFF,
+    KALMAN_PROCESS_NOISE, KALMAN_MEASUREMENT_NOISE
+)
+
+_COORDINATES = [LANDMARK_X, LANDMARK_Y, LANDMARK_Z]
+
+
+class _LandmarkFilter:
+    """
+    Wspólna obsługa czasu i ramek: filtrowane są tylko współrzędne x, y, z, widoczność przechodzi bez zmian.
+    Wynik nie nowszy od poprzedniego (ponownie podany po pominiętej inferencji) zwraca poprzednią ramkę,
+    a utrata pozy resetuje filtr.
+    """
+    def __init__(self, reference_fps=METRICS_REFERENCE_FPS):
+        self.reference_interval = 1.0 / reference_fps
+        self.reset()
+
+    def reset(self):
+        self.last_timestamp = None
+        self.last_frame = None
+        self._reset_state()
+
+    def filter(self, frame):
+        """Zwraca nowy LandmarkFrame z wygładzonymi współrzędnymi."""
+        if frame.array is None:
+            self.reset()
+            return frame
+        timestamp = frame.timestamp
+        if timestamp is None:
+            timestamp = (self.last_timestamp or 0.0) + self.reference_interval
+        elif self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return self.last_frame
+
+        measured = frame.array[:, _COORDINATES].astype(np.float64)
+        if self.last_timestamp is None:
+            filtered = self._start(measured)
+        else:
+            filtered = self._step(measured, timestamp - self.last_timestamp)
+        self.last_timestamp = timestamp
+
+        array = frame.array.copy()
+        array[:, _COORDINATES] = filtered
+        self.last_frame = LandmarkFrame(array, frame.timestamp)
+        return self.last_frame
+
+
+class OneEuroFilter(_LandmarkFilter):
+    """
+    Filtr One-Euro: dolnoprzepustowy z częstotliwością odcięcia rosnącą z prędkością.
+    min_cutoff (Hz) - mniejszy usuwa więcej drgań w bezruchu, beta - większa zmniejsza opóźnienie w ruchu.
+    """
+    def __init__(self, min_cutoff=ONE_EURO_MIN_CUTOFF, beta=ONE_EURO_BETA, d_cutoff=ONE_EURO_D_CUTOFF, **kwargs):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        super().__init__(**kwargs)
+
+    def _reset_state(self):
+        self.value = None
+        self.derivative = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        return 1.0 / (1.0 + 1.0 / (2 * math.pi * cutoff * dt))
+
+    def _start(self, measured):
+        self.value = measured
+        self.derivative = np.zeros_like(measured)
+        return measured
+
+    def _step(self, measured, dt):
+        derivative_alpha = self._alpha(self.d_cutoff, dt)
+        self.derivative = derivative_alpha * (measured - self.value) / dt + (1 - derivative_alpha) * self.derivative
+        cutoff = self.min_cutoff + self.beta * np.abs(self.derivative)
+        alpha = self._alpha(cutoff, dt)
+        self.value = alpha * measured + (1 - alpha) * self.value
+        return self.value
+
+
+class ConstantVelocityKalmanFilter(_LandmarkFilter):
+    """
+    Filtr Kalmana o stałej prędkości, niezależny dla każdej współrzędnej (stan: położenie, prędkość).
+    process_noise - odchylenie przyspieszenia (jednostki/s^2), measurement_noise - odchylenie pomiaru;
+    większy stosunek process_noise / measurement_noise to mniejsze opóźnienie i więcej drgań.
+    """
+    def __init__(self, process_noise=KALMAN_PROCESS_NOISE, measurement_noise=KALMAN_MEASUREMENT_NOISE, **kwargs):
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        super().__init__(**kwargs)
+
+    def _reset_state(self):
+        self.position = None
+        self.velocity = None
+        self.p00 = self.p01 = self.p11 = None
+
+    def _start(self, measured):
+        r = self.measurement_noise ** 2
+        self.position = measured
+        self.velocity = np.zeros_like(measured)
+        self.p00 = np.full_like(measured, r)
+        self.p01 = np.zeros_like(measured)
+        self.p11 = np.full_like(measured, (self.process_noise * self.reference_interval) ** 2 + r / self.reference_interval ** 2)
+        return measured
+
+    def _step(self, measured, dt):
+        q = self.process_noise ** 2
+        r = self.measurement_noise ** 2
+
+        position = self.position + self.velocity * dt
+        p00 = self.p00 + dt * (2 * self.p01 + dt * self.p11) + q * dt ** 4 / 4
+        p01 = self.p01 + dt * self.p11 + q * dt ** 3 / 2
+        p11 = self.p11 + q * dt ** 2
+
+        innovation = measured - position
+        gain_position = p00 / (p00 + r)
+        gain_velocity = p01 / (p00 + r)
+        self.position = position + gain_position * innovation
+        self.velocity = self.velocity + gain_velocity * innovation
+        self.p00 = (1 - gain_position) * p00
+        self.p01 = (1 - gain_position) * p01
+        self.p11 = p11 - gain_velocity * p01
+        return self.position
+
+
+LANDMARK_FILTERS = {
+    'one_euro': OneEuroFilter,
+    'kalman': ConstantVelocityKalmanFilter,
+}
+
+
+def create_landmark_filter(kind=LANDMARK_FILTER, **params):
+    """Filtr landmarków danego rodzaju albo None, gdy filtrowanie jest wyłączone."""
+    if kind is None:
+        return None
+    if kind not in LANDMARK_FILTERS:
+        raise ValueError(f"Unknown landmark filter: {kind}")
+    return LANDMARK_FILTERS[kind](**params)
+
+
+class LandmarkFilterStage:
+    """Filtry landmarków obu widoków; wyłączony etap (kind=None) nie zmienia wyników inferencji."""
+    def __init__(self, kind=LANDMARK_FILTER, **params):
+        self.kind = kind
+        self.front = create_landmark_filter(kind, **params)
+        self.profile = create_landmark_filter(kind, **params)
+        self.frames = 0
+        self.total_ms = 0.0
+
+    @property
+    def enabled(self):
+        return self.front is not None
+
+    def process(self, tick):
+        """Podmienia wyniki pozy taktu na przefiltrowane."""
+        if not self.enabled:
+            return
+        start = time.perf_counter()
+        tick.front_results = self.front.filter(tick.front_results)
+        tick.profile_results = self.profile.filter(tick.profile_results)
+        self.total_ms += (time.perf_counter() - start) * 1000
+        self.frames += 1
+
+    def get_stats(self):
+        return {
+            'kind': self.kind,
+            'frames': self.frames,
+            'avg_ms': round(self.total_ms / self.frames, 3) if self.frames else 0.0,
+        }
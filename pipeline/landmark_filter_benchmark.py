@@ -0,0 +1,248 @@
+"""
+Opóźnienie wykrycia powtórzeń: wygładzanie metryk kontra filtry landmarków.
+Użycie: python -m pipeline.landmark_filter_benchmark [nagranie.npz_lub_wideo] [bicep_curl|overhead_press]
+Nagranie .npz zawiera 'landmarks' (T, 33, 4; NaN, gdy brak pozy) i 'timestamps' (T,) w sekundach.
+Opóźnienie liczone jest względem powtórzeń wykrytych offline na przebiegu kąta wygładzonym bez przesunięcia w czasie.
+"""
+import sys
+import math
+import time
+import numpy as np
+from core.calculations import PhaseDetector
+from core.constants import (
+    POSE_RIGHT_SHOULDER, POSE_LEFT_SHOULDER, POSE_RIGHT_ELBOW, POSE_LEFT_ELBOW, POSE_RIGHT_WRIST, POSE_LEFT_WRIST,
+    POSE_RIGHT_HIP, POSE_LEFT_HIP, POSE_NOSE,
+    ONE_EURO_MIN_CUTOFF, ONE_EURO_BETA, KALMAN_PROCESS_NOISE, KALMAN_MEASUREMENT_NOISE
+)
+from core.geometry import joint_geometry
+from core.landmarks import LandmarkFrame, LANDMARK_COUNT, LANDMARK_FIELDS
+from core.pose_analyzer import EnhancedPoseAnalyzer
+from pipeline.landmark_filter import create_landmark_filter
+import exercises.bicep_curl.constants as bicep_curl
+import exercises.bicep_curl.metrics as bicep_curl_metrics
+import exercises.overhead_press.constants as overhead_press
+import exercises.overhead_press.metrics as overhead_press_metrics
+
+BENCHMARK_EXERCISES = {
+    'bicep_curl': dict(
+        metrics=bicep_curl_metrics, constants=bicep_curl, reps='right_reps', phase_angle='right_angle_smooth',
+        angles=['right_elbow_angle'], hysteresis=10, arming='flexed', completing='extended'
+    ),
+    'overhead_press': dict(
+        metrics=overhead_press_metrics, constants=overhead_press, reps='reps', phase_angle='avg_angle',
+        angles=['right_elbow_angle', 'left_elbow_angle'], hysteresis=15, arming='extended', completing='flexed'
+    ),
+}
+
+BENCHMARK_FILTERS = [
+    ('one_euro', dict(min_cutoff=ONE_EURO_MIN_CUTOFF, beta=ONE_EURO_BETA)),
+    ('one_euro', dict(min_cutoff=1.0, beta=5.0)),
+    ('one_euro', dict(min_cutoff=0.5, beta=2.0)),
+    ('kalman', dict(process_noise=KALMAN_PROCESS_NOISE, measurement_noise=KALMAN_MEASUREMENT_NOISE)),
+    ('kalman', dict(process_noise=3.0, measurement_noise=KALMAN_MEASUREMENT_NOISE)),
+    ('kalman', dict(process_noise=10.0, measurement_noise=KALMAN_MEASUREMENT_NOISE)),
+]
+
+REFERENCE_SMOOTHING_SECONDS = 0.05
+MATCH_WINDOW = (-0.3, 1.0)
+
+
+def load_recording(source=None, exercise='bicep_curl'):
+    """Nagranie landmarków: plik .npz, wideo przepuszczone przez MediaPipe albo syntetyczna seria z szumem."""
+    if source is not None:
+        if source.endswith('.npz'):
+            data = np.load(source)
+            return data['landmarks'].astype(np.float32), data['timestamps'].astype(np.float64)
+        recording = record_video(source)
+        if recording is not None:
+            return recording
+        print(f"Could not read {source}, using a synthetic recording")
+    return synthetic_recording(exercise)
+
+
+def record_video(path):
+    """Landmarki z pliku wideo (czas z pozycji klatki w pliku)."""
+    import cv2
+    from pipeline.inference import create_pose, estimate_landmarks
+    from pipeline.roi import RoiTracker
+
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        return None
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    pose = create_pose()
+    tracker = RoiTracker()
+    landmarks, timestamps = [], []
+    while True:
+        ok, image = capture.read()
+        if not ok:
+            break
+        position = capture.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        timestamps.append(position if position > 0 or not timestamps else len(timestamps) / fps)
+        array = estimate_landmarks(pose, image, tracker)
+        landmarks.append(array if array is not None else np.full((LANDMARK_COUNT, LANDMARK_FIELDS), np.nan, np.float32))
+    capture.release()
+    pose.close()
+    if not landmarks:
+        return None
+    return np.array(landmarks, dtype=np.float32), np.array(timestamps)
+
+
+def synthetic_recording(exercise, seconds=30.0, fps=30.0, noise=0.004, seed=0):
+    """Powtórzenia o zmiennym tempie z szumem landmarków i nierównymi odstępami klatek."""
+    rng = np.random.default_rng(seed)
+    timestamps = np.cumsum(rng.normal(1 / fps, 0.15 / fps, int(seconds * fps)).clip(0.5 / fps))
+    periods = rng.uniform(2.0, 3.2, int(seconds / 2.0) + 2)
+    boundaries = np.concatenate([[0.0], np.cumsum(periods)])
+    phase = 2 * np.pi * np.interp(timestamps, boundaries, np.arange(len(boundaries)))
+    landmarks = np.zeros((len(timestamps), LANDMARK_COUNT, LANDMARK_FIELDS), np.float32)
+    landmarks[..., 2] = 0.9
+    landmarks[:, POSE_RIGHT_SHOULDER, :2] = (0.4, 0.3)
+    landmarks[:, POSE_LEFT_SHOULDER, :2] = (0.6, 0.3)
+    landmarks[:, POSE_RIGHT_HIP, :2] = (0.42, 0.6)
+    landmarks[:, POSE_LEFT_HIP, :2] = (0.58, 0.6)
+    landmarks[:, POSE_NOSE, :2] = (0.5, 0.15)
+    for shoulder, elbow, wrist, side in ((POSE_RIGHT_SHOULDER, POSE_RIGHT_ELBOW, POSE_RIGHT_WRIST, -1),
+                                         (POSE_LEFT_SHOULDER, POSE_LEFT_ELBOW, POSE_LEFT_WRIST, 1)):
+        if exercise == 'bicep_curl':
+            angle = np.radians(90 + 75 * np.cos(phase))
+            landmarks[:, elbow, :2] = landmarks[:, shoulder, :2] + (0.0, 0.15)
+            landmarks[:, wrist, 0] = landmarks[:, elbow, 0] + side * 0.15 * np.sin(angle)
+            landmarks[:, wrist, 1] = landmarks[:, elbow, 1] - 0.15 * np.cos(angle)
+        else:
+            angle = np.radians(125 - 45 * np.cos(phase))
+            landmarks[:, elbow, :2] = landmarks[:, shoulder, :2] + (side * 0.12, 0.0)
+            landmarks[:, wrist, 0] = landmarks[:, elbow, 0] - side * 0.14 * np.cos(angle)
+            landmarks[:, wrist, 1] = landmarks[:, elbow, 1] - 0.14 * np.sin(angle)
+    landmarks[..., :2] += rng.normal(0, noise, landmarks[..., :2].shape)
+    return landmarks, timestamps
+
+
+def _frames(landmarks, timestamps):
+    return [LandmarkFrame(None if np.isnan(array[0, 0]) else array, timestamp) for array, timestamp in zip(landmarks, timestamps)]
+
+
+def _filtered(frames, kind, params):
+    landmark_filter = create_landmark_filter(kind, **params)
+    return [landmark_filter.filter(frame) for frame in frames]
+
+
+def _phase_angle(frame, angles):
+    if not frame:
+        return math.nan
+    geometry = joint_geometry(frame)
+    return sum(geometry[name] for name in angles) / len(angles)
+
+
+def reference_reps(frames, timestamps, exercise):
+    """
+    Powtórzenia na kącie wygładzonym centralnym oknem Gaussa (bez opóźnienia), wykryte logiką faz
+    ćwiczenia bez wymogu utrzymania fazy; strefa aktywna OHP jest tu pomijana.
+    """
+    config = BENCHMARK_EXERCISES[exercise]
+    angles = np.array([_phase_angle(frame, config['angles']) for frame in frames])
+    valid = ~np.isnan(angles)
+    times, angles = timestamps[valid], angles[valid]
+    window = 4 * REFERENCE_SMOOTHING_SECONDS
+    starts = np.searchsorted(times, times - window)
+    stops = np.searchsorted(times, times + window, side='right')
+    smoothed = np.empty_like(angles)
+    for i, (start, stop) in enumerate(zip(starts, stops)):
+        weights = np.exp(-0.5 * ((times[start:stop] - times[i]) / REFERENCE_SMOOTHING_SECONDS) ** 2)
+        smoothed[i] = (weights * angles[start:stop]).sum() / weights.sum()
+
+    constants = config['constants']
+    detector = PhaseDetector(constants.FRONT_FLEX_THRESHOLD, constants.FRONT_EXTEND_THRESHOLD, config['hysteresis'])
+    armed = False
+    reps = []
+    for timestamp, angle in zip(times, smoothed):
+        phase = detector.update(angle, timestamp)
+        if phase == config['arming']:
+            armed = True
+        elif phase == config['completing'] and armed:
+            reps.append(timestamp)
+            armed = False
+    return reps
+
+
+def metric_reps(frames, exercise, smoothing=True):
+    """Powtórzenia i kąt fazy z modułu metryk ćwiczenia (widok przodu), z wygładzaniem metryk albo bez."""
+    config = BENCHMARK_EXERCISES[exercise]
+    metrics_module = config['metrics']
+    metrics_module.reset_front_view_state(smoothing=smoothing)
+    analyzer = EnhancedPoseAnalyzer(metrics_module.calculate_front_view)
+    reps, angles, last_count = [], [], 0
+    for frame in frames:
+        analyzer.process_frame(frame)
+        metrics = analyzer.get_metrics()
+        count = metrics.get(config['reps'], 0)
+        if count > last_count:
+            reps.append(frame.timestamp)
+        last_count = count
+        angles.append(metrics.get(config['phase_angle'], math.nan))
+    return reps, np.array(angles, dtype=np.float64)
+
+
+def match_delays(reference, detected):
+    """Opóźnienia (ms) dopasowanych powtórzeń oraz liczba powtórzeń nadmiarowych."""
+    delays = []
+    remaining = list(detected)
+    for rep in reference:
+        match = next((t for t in remaining if MATCH_WINDOW[0] <= t - rep <= MATCH_WINDOW[1]), None)
+        if match is not None:
+            delays.append((match - rep) * 1000)
+            remaining.remove(match)
+    return delays, len(remaining)
+
+
+def jitter(angles):
+    """RMS drugiej różnicy kąta fazy (stopnie) - miara drgań sygnału po wygładzeniu."""
+    angles = angles[~np.isnan(angles)]
+    if len(angles) < 3:
+        return 0.0
+    return float(np.sqrt(np.mean(np.diff(angles, 2) ** 2)))
+
+
+def run_benchmark(landmarks, timestamps, exercise='bicep_curl'):
+    frames = _frames(landmarks, timestamps)
+    reference = reference_reps(frames, timestamps, exercise)
+
+    rows = [('metric smoothers', '-', *metric_reps(frames, exercise), 0.0)]
+    for kind, params in BENCHMARK_FILTERS:
+        start = time.perf_counter()
+        filtered = _filtered(frames, kind, params)
+        filter_ms = (time.perf_counter() - start) * 1000 / len(frames)
+        label = ' '.join(f'{key}={value}' for key, value in params.items())
+        rows.append((kind, label, *metric_reps(filtered, exercise, smoothing=False), filter_ms))
+        rows.append((f'{kind} + metric smoothers', label, *metric_reps(filtered, exercise), filter_ms))
+
+    results = []
+    for name, label, reps, angles, filter_ms in rows:
+        delays, extra = match_delays(reference, reps)
+        results.append((
+            name, label, len(delays), len(reference), extra,
+            float(np.mean(delays)) if delays else math.nan,
+            float(np.percentile(delays, 90)) if delays else math.nan,
+            jitter(angles), filter_ms,
+        ))
+    return results
+
+
+def main():
+    source, exercise = None, 'bicep_curl'
+    for arg in sys.argv[1:]:
+        if arg in BENCHMARK_EXERCISES:
+            exercise = arg
+        else:
+            source = arg
+    landmarks, timestamps = load_recording(source, exercise)
+    rows = run_benchmark(landmarks, timestamps, exercise)
+
+    print(f"{exercise}: {len(timestamps)} frames, {timestamps[-1] - timestamps[0]:.1f} s")
+    print(f"{'pipeline':27} {'params':41} {'reps':>7} {'extra':>5} {'mean ms':>8} {'p90 ms':>7} {'jitter':>7} {'filter ms':>9}")
+    for name, label, matched, expected, extra, mean_ms, p90_ms, jitter_deg, filter_ms in rows:
+        print(f"{name:27} {label:41} {f'{matched}/{expected}':>7} {extra:>5} {mean_ms:8.0f} {p90_ms:7.0f} {jitter_deg:7.2f} {filter_ms:9.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Kompaktowy binarny pakiet landmarków jednego widoku (tryb podglądu 'landmarks').
+
+Układ (little-endian):
+  u8  wersja
+  u8  flagi (bit 0: wykryto pozę)
+  u8  bity błędów (ERROR_PART_BITS)
+  u8  liczba landmarków N
+  u32 identyfikator taktu
+  u16 szerokość klatki, u16 wysokość klatki
+  N x (u16 x, u16 y, u8 visibility) - współrzędne znormalizowane skwantowane do 0..65535
+"""
+import struct
+import time
+import numpy as np
+from core.landmarks import LANDMARK_X, LANDMARK_Y, LANDMARK_VISIBILITY
+
+LANDMARK_PACKET_VERSION = 1
+LANDMARK_PACKET_HEADER = struct.Struct('<BBBBIHH')
+LANDMARK_PACKET_DTYPE = np.dtype([('x', '<u2'), ('y', '<u2'), ('visibility', 'u1')])
+
+ERROR_PART_BITS = {
+    'left_arm': 1,
+    'right_arm': 2,
+    'trunk': 4,
+}
+
+
+def error_bits(error_states, now=None):
+    """Maska aktualnie podświetlanych części ciała."""
+    now = time.time() if now is None else now
+    bits = 0
+    for part, bit in ERROR_PART_BITS.items():
+        if error_states.get(part, 0) > now:
+            bits |= bit
+    return bits
+
+
+def encode_landmark_packet(frame_id, results, error_states, width, height):
+    """Zwraca bajty pakietu dla wyniku pozy (LandmarkFrame) jednego widoku."""
+    array = results.array if results is not None else None
+    bits = error_bits(error_states)
+
+    if array is None:
+        return LANDMARK_PACKET_HEADER.pack(LANDMARK_PACKET_VERSION, 0, bits, 0, frame_id & 0xFFFFFFFF, width, height)
+
+    packed = np.empty(len(array), dtype=LANDMARK_PACKET_DTYPE)
+    packed['x'] = np.clip(array[:, LANDMARK_X], 0.0, 1.0) * 65535
+    packed['y'] = np.clip(array[:, LANDMARK_Y], 0.0, 1.0) * 65535
+    packed['visibility'] = np.clip(array[:, LANDMARK_VISIBILITY], 0.0, 1.0) * 255
+
+    header = LANDMARK_PACKET_HEADER.pack(LANDMARK_PACKET_VERSION, 1, bits, len(array), frame_id & 0xFFFFFFFF, width, height)
+    return header + packed.tobytes()
@@ -0,0 +1,71 @@
+"""Rozsyłanie zakodowanych klatek podglądu jako strumienie MJPEG (multipart/x-mixed-replace)."""
+from threading import Condition
+
+MJPEG_BOUNDARY = 'frame'
+MJPEG_WAIT_TIMEOUT = 1.0
+
+
+class MjpegBroadcaster:
+    """
+    Przechowuje ostatnią zakodowaną klatkę każdego widoku i budzi czekające strumienie.
+    Klatka jest kodowana raz i wysyłana do dowolnej liczby widzów; wolny widz
+    dostaje po prostu najnowszą klatkę, bez kolejkowania starych.
+    """
+    def __init__(self):
+        self._condition = Condition()
+        self.frames = {}
+        self.viewers = {}
+        self.generation = 0
+        self.published = 0
+
+    def has_viewers(self, view=None):
+        with self._condition:
+            if view is None:
+                return any(self.viewers.values())
+            return self.viewers.get(view, 0) > 0
+
+    def publish(self, view, data, mimetype='image/jpeg'):
+        with self._condition:
+            seq = self.frames[view][0] + 1 if view in self.frames else 1
+            self.frames[view] = (seq, data, mimetype)
+            self.published += 1
+            self._condition.notify_all()
+
+    def close(self):
+        """Kończy bieżące strumienie (koniec sesji)."""
+        with self._condition:
+            self.generation += 1
+            self.frames = {}
+            self._condition.notify_all()
+
+    def stream(self, view):
+        """Generator części multipart dla odpowiedzi HTTP jednego widza."""
+        with self._condition:
+            self.viewers[view] = self.viewers.get(view, 0) + 1
+            generation = self.generation
+        last_seq = 0
+
+        try:
+            while True:
+                with self._condition:
+                    self._condition.wait_for(
+                        lambda: self.generation != generation or (view in self.frames and self.frames[view][0] != last_seq),
+                        MJPEG_WAIT_TIMEOUT
+                    )
+                    if self.generation != generation:
+                        return
+                    if view not in self.frames or self.frames[view][0] == last_seq:
+                        continue
+                    last_seq, data, mimetype = self.frames[view]
+
+                yield (
+                    f'--{MJPEG_BOUNDARY}\r\nContent-Type: {mimetype}\r\nContent-Length: {len(data)}\r\n\r\n'.encode()
+                    + data + b'\r\n'
+                )
+        finally:
+            with self._condition:
+                self.viewers[view] -= 1
+
+    def get_stats(self):
+        with self._condition:
+            return {'viewers': dict(self.viewers), 'published': self.published}
@@ -0,0 +1,112 @@
+"""Dostosowanie częstotliwości inferencji pozy do ilości ruchu w każdym z widoków."""
+import time
+import numpy as np
+from core.calculations import SmootherBank
+from core.geometry import joint_angles
+from core.constants import (
+    CAMERA_FPS_LIMIT, POSE_MIN_INFERENCE_FPS, MOTION_STILL_VELOCITY, MOTION_STILL_TIME,
+    POSE_LEFT_SHOULDER, POSE_RIGHT_SHOULDER, POSE_LEFT_ELBOW, POSE_RIGHT_ELBOW,
+    POSE_LEFT_WRIST, POSE_RIGHT_WRIST, POSE_LEFT_HIP, POSE_RIGHT_HIP
+)
+
+MOTION_JOINTS = {
+    'left_elbow': (POSE_LEFT_SHOULDER, POSE_LEFT_ELBOW, POSE_LEFT_WRIST),
+    'right_elbow': (POSE_RIGHT_SHOULDER, POSE_RIGHT_ELBOW, POSE_RIGHT_WRIST),
+    'left_shoulder': (POSE_LEFT_HIP, POSE_LEFT_SHOULDER, POSE_LEFT_ELBOW),
+    'right_shoulder': (POSE_RIGHT_HIP, POSE_RIGHT_SHOULDER, POSE_RIGHT_ELBOW),
+}
+_MOTION_JOINT_INDEX = np.array(list(MOTION_JOINTS.values()))
+
+
+class _ViewSchedule:
+    """Stan harmonogramu jednego widoku."""
+    def __init__(self, name):
+        self.name = name
+        self.smoothers = SmootherBank({joint: {} for joint in MOTION_JOINTS})
+        self.interval = 1
+        self.min_interval = 1
+        self.ticks_since_inference = None
+        self.still_since = None
+        self.max_velocity = 0.0
+        self.inferred = 0
+        self.skipped = 0
+        self.switches = 0
+
+
+class MotionAdaptiveScheduler:
+    """
+    Decyduje, w których taktach uruchomić inferencję dla danego widoku.
+    Gdy prędkości kątów w stawach (stopnie na sekundę) są bliskie zeru przez MOTION_STILL_TIME,
+    widok przechodzi na obniżoną częstotliwość (nie niższą niż min_fps);
+    pierwszy wykryty ruch przywraca pełną częstotliwość.
+    """
+    def __init__(self, fps=CAMERA_FPS_LIMIT, min_fps=POSE_MIN_INFERENCE_FPS,
+                 still_velocity=MOTION_STILL_VELOCITY, still_time=MOTION_STILL_TIME):
+        self.reduced_interval = max(1, round(fps / min_fps))
+        self.still_velocity = still_velocity
+        self.still_time = still_time
+        self.views = {name: _ViewSchedule(name) for name in ('front', 'profile')}
+
+    def should_infer(self, view):
+        """True, jeśli w tym takcie należy uruchomić inferencję dla widoku."""
+        schedule = self.views[view]
+        if schedule.ticks_since_inference is not None:
+            schedule.ticks_since_inference += 1
+            if schedule.ticks_since_inference < max(schedule.interval, schedule.min_interval):
+                schedule.skipped += 1
+                return False
+        schedule.ticks_since_inference = 0
+        schedule.inferred += 1
+        return True
+
+    def observe(self, view, results):
+        """Aktualizuje prędkości na podstawie świeżego wyniku inferencji widoku."""
+        schedule = self.views[view]
+        now = getattr(results, 'timestamp', None)
+        if now is None:
+            now = time.monotonic()
+
+        if results is None or results.array is None:
+            schedule.smoothers.reset()
+            schedule.still_since = None
+            self._set_interval(schedule, 1, 'pose lost')
+            return
+
+        angles = joint_angles(results.array, _MOTION_JOINT_INDEX).tolist()
+        schedule.smoothers.update(dict(zip(MOTION_JOINTS, angles)), now)
+        velocity = max(schedule.smoothers.get_velocities().values())
+        schedule.max_velocity = velocity
+
+        if velocity > self.still_velocity:
+            schedule.still_since = None
+            self._set_interval(schedule, 1, f'motion {velocity:.0f} deg/s')
+            return
+
+        if schedule.still_since is None:
+            schedule.still_since = now
+        elif now - schedule.still_since >= self.still_time:
+            self._set_interval(schedule, self.reduced_interval, f'still for {now - schedule.still_since:.1f}s')
+
+    def set_min_interval(self, view, interval):
+        """Narzuca minimalny odstęp między inferencjami widoku niezależnie od ruchu (np. przy przeciążeniu)."""
+        self.views[view].min_interval = max(1, interval)
+
+    def _set_interval(self, schedule, interval, reason):
+        if schedule.interval == interval:
+            return
+        schedule.interval = interval
+        schedule.switches += 1
+        print(f"Motion scheduler: {schedule.name} -> every {interval} tick(s) ({reason})")
+
+    def get_stats(self):
+        return {
+            name: {
+                'interval': schedule.interval,
+                'min_interval': schedule.min_interval,
+                'inferred': schedule.inferred,
+                'skipped': schedule.skipped,
+                'switches': schedule.switches,
+                'velocity': round(schedule.max_velocity, 2),
+            }
+            for name, schedule in self.views.items()
+        }
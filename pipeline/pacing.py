@@ -0,0 +1,34 @@
+import time
+from core.constants import CAMERA_FPS_LIMIT
+
+
+class FramePacer:
+    """Utrzymuje docelowy FPS pętli przetwarzania na podstawie terminów (deadline)."""
+    def __init__(self, fps=CAMERA_FPS_LIMIT):
+        self.period = 1.0 / fps
+        self.next_deadline = None
+        self.late_ticks = 0
+
+    def wait(self, stop_event=None):
+        """
+        Usypia wątek do terminu kolejnego taktu.
+        Zwraca False, jeśli w trakcie czekania ustawiono stop_event.
+        """
+        now = time.monotonic()
+        if self.next_deadline is None:
+            self.next_deadline = now
+
+        delay = self.next_deadline - now
+        if delay > 0:
+            if stop_event is not None:
+                if stop_event.wait(delay):
+                    return False
+            else:
+                time.sleep(delay)
+        elif -delay > self.period:
+            # Spóźnienie ponad jeden okres - nie nadrabiamy seriami klatek, tylko przesuwamy harmonogram.
+            self.late_ticks += 1
+            self.next_deadline = now
+
+        self.next_deadline += self.period
+        return True
@@ -0,0 +1,70 @@
+"""Współdzielona przez sesje pula rozgrzanych estymatorów pozy."""
+import time
+import numpy as np
+from threading import Lock
+from core.constants import POSE_POOL_SIZE, FRONT_INFERENCE_WIDTH, FRONT_INFERENCE_HEIGHT
+from pipeline.inference import create_pose, estimate_pose
+
+
+class PosePool:
+    """
+    Estymatory pozy tworzone raz na proces i wypożyczane sesjom.
+    Zwrócony estymator dostaje pustą klatkę, dzięki czemu gubi śledzoną pozę
+    i następna sesja zaczyna od detekcji, ale bez ponownego ładowania modelu.
+    """
+    def __init__(self, max_idle=POSE_POOL_SIZE * 2):
+        self.max_idle = max_idle
+        self._idle = {}
+        self._lock = Lock()
+        self._blank = np.zeros((FRONT_INFERENCE_HEIGHT, FRONT_INFERENCE_WIDTH, 3), dtype=np.uint8)
+        self.created = 0
+        self.reused = 0
+
+    def _create(self, model_complexity):
+        pose = create_pose(model_complexity)
+        estimate_pose(pose, self._blank)
+        self.created += 1
+        return pose
+
+    def warm_up(self, count=POSE_POOL_SIZE, model_complexity=1):
+        """Tworzy i rozgrzewa estymatory przed pierwszą sesją; zwraca czas w ms."""
+        start = time.perf_counter()
+        poses = [self._create(model_complexity) for _ in range(count)]
+        for pose in poses:
+            self.release(pose, model_complexity, reset=False)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"Pose pool warmed up: {count} x complexity {model_complexity} in {elapsed_ms:.0f} ms")
+        return elapsed_ms
+
+    def acquire(self, model_complexity=1):
+        with self._lock:
+            idle = self._idle.get(model_complexity)
+            if idle:
+                self.reused += 1
+                return idle.pop()
+        return self._create(model_complexity)
+
+    def release(self, pose, model_complexity=1, reset=True):
+        if reset:
+            estimate_pose(pose, self._blank)
+        with self._lock:
+            idle = self._idle.setdefault(model_complexity, [])
+            if sum(len(poses) for poses in self._idle.values()) < self.max_idle:
+                idle.append(pose)
+                return
+        pose.close()
+
+    def close(self):
+        with self._lock:
+            poses = [pose for idle in self._idle.values() for pose in idle]
+            self._idle = {}
+        for pose in poses:
+            pose.close()
+
+    def get_stats(self):
+        with self._lock:
+            idle = {complexity: len(poses) for complexity, poses in self._idle.items()}
+        return {'created': self.created, 'reused': self.reused, 'idle': idle}
+
+
+pose_pool = PosePool()
@@ -0,0 +1,226 @@
+"""
+Inferencja pozy w osobnych procesach.
+Klatki trafiają do procesu roboczego przez sloty pamięci współdzielonej,
+a landmarki wracają jako tablice float32 - bez serializacji protobufów.
+"""
+import time
+import numpy as np
+import multiprocessing
+from multiprocessing import shared_memory
+from core.constants import POSE_WORKER_SLOTS, POSE_WORKER_POLL_TIMEOUT, POSE_ROI_ENABLED
+from core.landmarks import LANDMARK_COUNT, LANDMARK_FIELDS, LandmarkFrame
+
+
+def _worker_main(conn, model_complexity, use_roi):
+    from pipeline.inference import create_pose, estimate_landmarks
+    from pipeline.roi import RoiTracker
+
+    pose = create_pose(model_complexity)
+    tracker = RoiTracker() if use_roi else None
+    frames_shm = results_shm = None
+    frames = results = None
+
+    while True:
+        message = conn.recv()
+        kind = message[0]
+
+        if kind == 'frame':
+            slot = message[1]
+            found = estimate_landmarks(pose, frames[slot], tracker, out=results[slot]) is not None
+            conn.send((slot, found))
+        elif kind == 'frames':
+            _, name, slots, shape = message
+            if frames_shm is not None:
+                frames = None
+                frames_shm.close()
+            frames_shm = shared_memory.SharedMemory(name=name)
+            frames = np.ndarray((slots, *shape), dtype=np.uint8, buffer=frames_shm.buf)
+        elif kind == 'results':
+            _, name, slots = message
+            results_shm = shared_memory.SharedMemory(name=name)
+            results = np.ndarray((slots, LANDMARK_COUNT, LANDMARK_FIELDS), dtype=np.float32, buffer=results_shm.buf)
+        elif kind == 'complexity':
+            try:
+                new_pose = create_pose(message[1])
+            except Exception as e:
+                conn.send(str(e))
+                continue
+            pose.close()
+            pose = new_pose
+            conn.send(None)
+        elif kind == 'stats':
+            conn.send(tracker.get_stats() if tracker is not None else None)
+        elif kind == 'stop':
+            break
+
+    frames = results = None
+    for shm in (frames_shm, results_shm):
+        if shm is not None:
+            shm.close()
+    pose.close()
+
+
+class PoseWorkerError(RuntimeError):
+    """Proces roboczy przestał działać (zakończył się albo zerwał połączenie) - inferencja nie może być kontynuowana."""
+
+
+class PoseWorkerProcess:
+    """Estymator pozy jednej kamery działający we własnym procesie."""
+    def __init__(self, name, slots=POSE_WORKER_SLOTS, model_complexity=1, use_roi=POSE_ROI_ENABLED):
+        context = multiprocessing.get_context('spawn')
+        self._conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, model_complexity, use_roi),
+            name=f'pose-{name}',
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+        self.slots = slots
+        self._next_slot = 0
+        self._frame_shape = None
+        self._frames_shm = None
+        self._frames = None
+
+        self._results_shm = shared_memory.SharedMemory(
+            create=True,
+            size=slots * LANDMARK_COUNT * LANDMARK_FIELDS * np.dtype(np.float32).itemsize
+        )
+        self._results = np.ndarray((slots, LANDMARK_COUNT, LANDMARK_FIELDS), dtype=np.float32, buffer=self._results_shm.buf)
+        self._send(('results', self._results_shm.name, slots))
+
+    def _allocate_frames(self, shape):
+        if self._frames_shm is not None:
+            self._frames = None
+            self._frames_shm.close()
+            self._frames_shm.unlink()
+        self._frames_shm = shared_memory.SharedMemory(create=True, size=self.slots * int(np.prod(shape)))
+        self._frames = np.ndarray((self.slots, *shape), dtype=np.uint8, buffer=self._frames_shm.buf)
+        self._frame_shape = shape
+        self._send(('frames', self._frames_shm.name, self.slots, shape))
+
+    def _send(self, message):
+        try:
+            self._conn.send(message)
+        except (BrokenPipeError, EOFError, OSError) as e:
+            raise PoseWorkerError(f"{self.process.name} is not responding: {e}") from e
+
+    def _recv(self):
+        """Czeka na odpowiedź, sprawdzając przy tym, czy proces roboczy nadal działa."""
+        try:
+            while not self._conn.poll(POSE_WORKER_POLL_TIMEOUT):
+                if not self.process.is_alive():
+                    raise PoseWorkerError(f"{self.process.name} exited with code {self.process.exitcode}")
+            return self._conn.recv()
+        except (BrokenPipeError, EOFError, OSError) as e:
+            raise PoseWorkerError(f"{self.process.name} is not responding: {e}") from e
+
+    def submit(self, image):
+        """Kopiuje klatkę BGR do wolnego slotu i zleca inferencję."""
+        if image.shape != self._frame_shape:
+            self._allocate_frames(image.shape)
+        slot = self._next_slot
+        self._next_slot = (slot + 1) % self.slots
+        np.copyto(self._frames[slot], image)
+        self._send(('frame', slot))
+
+    def collect(self):
+        """Czeka na wynik ostatniego zlecenia; tablica (33, 4) albo None, gdy nie wykryto pozy (PoseWorkerError, gdy proces padł)."""
+        slot, found = self._recv()
+        if not found:
+            return None
+        return self._results[slot].copy()
+
+    def set_model_complexity(self, model_complexity):
+        """Podmienia estymator w procesie roboczym; RuntimeError, gdy model nie jest dostępny."""
+        self._send(('complexity', model_complexity))
+        error = self._recv()
+        if error is not None:
+            raise RuntimeError(error)
+
+    def get_roi_stats(self):
+        """Statystyki przycinania z procesu roboczego (wywoływać bez oczekujących zleceń)."""
+        try:
+            self._send(('stats',))
+            return self._recv()
+        except PoseWorkerError:
+            return None
+
+    def close(self):
+        try:
+            self._conn.send(('stop',))
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.terminate()
+        self._frames = None
+        self._results = None
+        for shm in (self._frames_shm, self._results_shm):
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+
+class ProcessDualPoseInference:
+    """Inferencja obu widoków w dwóch procesach roboczych (interfejs jak DualPoseInference)."""
+    def __init__(self, model_complexity=1):
+        self.model_complexity = model_complexity
+        self.front_worker = PoseWorkerProcess('front', model_complexity=model_complexity)
+        self.profile_worker = PoseWorkerProcess('profile', model_complexity=model_complexity)
+        self.front_results = LandmarkFrame(None)
+        self.profile_results = LandmarkFrame(None)
+        self.front_ms = 0.0
+        self.profile_ms = 0.0
+        self.total_ms = 0.0
+
+    def process(self, front_image, profile_image, front_timestamp=None, profile_timestamp=None):
+        """Zwraca (front_results, profile_results); obraz None pomija widok i zwraca jego poprzedni wynik."""
+        start = time.perf_counter()
+        if front_image is not None:
+            self.front_worker.submit(front_image)
+        if profile_image is not None:
+            self.profile_worker.submit(profile_image)
+
+        if front_image is not None:
+            self.front_results = LandmarkFrame(self.front_worker.collect(), front_timestamp)
+            self.front_ms = (time.perf_counter() - start) * 1000
+        if profile_image is not None:
+            self.profile_results = LandmarkFrame(self.profile_worker.collect(), profile_timestamp)
+            self.profile_ms = (time.perf_counter() - start) * 1000
+        self.total_ms = (time.perf_counter() - start) * 1000
+        return self.front_results, self.profile_results
+
+    def get_timings(self):
+        """Czasy ostatniego taktu w ms (per widok i łącznie)."""
+        return {
+            'front_ms': round(self.front_ms, 2),
+            'profile_ms': round(self.profile_ms, 2),
+            'total_ms': round(self.total_ms, 2),
+        }
+
+    def set_model_complexity(self, model_complexity):
+        """Podmienia estymatory w obu procesach roboczych (wywoływać między taktami)."""
+        self.front_worker.set_model_complexity(model_complexity)
+        try:
+            self.profile_worker.set_model_complexity(model_complexity)
+        except RuntimeError:
+            self.front_worker.set_model_complexity(self.model_complexity)
+            raise
+        self.model_complexity = model_complexity
+
+    def get_roi_stats(self):
+        """Statystyki przycinania wejścia dla obu widoków (None, gdy wyłączone)."""
+        front = self.front_worker.get_roi_stats()
+        if front is None:
+            return None
+        return {
+            'front': front,
+            'profile': self.profile_worker.get_roi_stats(),
+        }
+
+    def close(self):
+        self.front_worker.close()
+        self.profile_worker.close()
@@ -0,0 +1,128 @@
+"""Sterowanie przepływem podglądu na podstawie potwierdzeń wyświetlenia klatek przez klienta."""
+import time
+from threading import Lock
+from core.constants import (
+    PREVIEW_QUALITY, PREVIEW_MAX_IN_FLIGHT, PREVIEW_ACK_TIMEOUT, PREVIEW_MIN_QUALITY,
+    PREVIEW_FPS_LEVELS, PREVIEW_RTT_LOW_MS, PREVIEW_RTT_HIGH_MS, PREVIEW_ADAPT_INTERVAL
+)
+
+PREVIEW_VIEWS = ('front', 'profile')
+
+
+class PreviewFlowControl:
+    """
+    Pilnuje, by do klienta leciało najwyżej max_in_flight niepotwierdzonych klatek.
+    Na podstawie czasu od wysłania do potwierdzenia (RTT) obniża jakość i liczbę
+    klatek na sekundę przy słabym łączu oraz przywraca je, gdy łącze się poprawi.
+    """
+    def __init__(self, max_in_flight=PREVIEW_MAX_IN_FLIGHT, max_quality=PREVIEW_QUALITY):
+        self.max_in_flight = max_in_flight
+        self.max_quality = max_quality
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        """Czyści stan przed nową sesją."""
+        with self._lock:
+            self.in_flight = {}
+            self.next_id = 0
+            self.rtt_ms = None
+            self.quality = self.max_quality
+            self.fps_level = 0
+            self.last_sent = 0.0
+            self.last_adapt = time.monotonic()
+            self.sent = 0
+            self.acked = 0
+            self.skipped = 0
+            self.expired = 0
+            self.discarded = 0
+
+    @property
+    def fps(self):
+        return PREVIEW_FPS_LEVELS[self.fps_level]
+
+    def should_send(self):
+        """True, jeśli można teraz zakodować i wysłać kolejną klatkę."""
+        now = time.monotonic()
+        with self._lock:
+            for frame_id in [frame_id for frame_id, (sent_at, _) in self.in_flight.items() if now - sent_at > PREVIEW_ACK_TIMEOUT]:
+                del self.in_flight[frame_id]
+                self.expired += 1
+
+            if len(self.in_flight) >= self.max_in_flight or now - self.last_sent < 1.0 / self.fps:
+                self.skipped += 1
+                return False
+            return True
+
+    def register(self, views=PREVIEW_VIEWS):
+        """Rejestruje wysyłaną klatkę (z obrazami podanych widoków) i zwraca jej identyfikator."""
+        with self._lock:
+            frame_id = self.next_id
+            self.next_id += 1
+            now = time.monotonic()
+            self.in_flight[frame_id] = (now, set(views))
+            self.last_sent = now
+            self.sent += 1
+            return frame_id
+
+    def discard(self, frame_id):
+        """Wycofuje zarejestrowaną klatkę, która nie trafiła do klienta (np. porzucona w kolejce przed wysyłką)."""
+        with self._lock:
+            if self.in_flight.pop(frame_id, None) is not None:
+                self.sent -= 1
+                self.discarded += 1
+
+    def acknowledge(self, frame_id, view):
+        """Potwierdzenie wyświetlenia klatki danego widoku przez klienta."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self.in_flight.get(frame_id)
+            if entry is None:
+                return
+            sent_at, pending = entry
+            pending.discard(view)
+            if pending:
+                return
+
+            del self.in_flight[frame_id]
+            for older_id in [older_id for older_id in self.in_flight if older_id < frame_id]:
+                del self.in_flight[older_id]
+
+            self.acked += 1
+            rtt_ms = (now - sent_at) * 1000
+            self.rtt_ms = rtt_ms if self.rtt_ms is None else 0.8 * self.rtt_ms + 0.2 * rtt_ms
+            if now - self.last_adapt >= PREVIEW_ADAPT_INTERVAL:
+                self.last_adapt = now
+                self._adapt()
+
+    def _adapt(self):
+        if self.rtt_ms > PREVIEW_RTT_HIGH_MS:
+            if self.quality > PREVIEW_MIN_QUALITY:
+                self.quality = max(PREVIEW_MIN_QUALITY, self.quality - 10)
+            elif self.fps_level < len(PREVIEW_FPS_LEVELS) - 1:
+                self.fps_level += 1
+            else:
+                return
+            print(f"Preview flow: RTT {self.rtt_ms:.0f} ms -> quality {self.quality}, {self.fps} fps")
+        elif self.rtt_ms < PREVIEW_RTT_LOW_MS:
+            if self.fps_level > 0:
+                self.fps_level -= 1
+            elif self.quality < self.max_quality:
+                self.quality = min(self.max_quality, self.quality + 5)
+            else:
+                return
+            print(f"Preview flow: RTT {self.rtt_ms:.0f} ms -> quality {self.quality}, {self.fps} fps")
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'rtt_ms': round(self.rtt_ms, 1) if self.rtt_ms is not None else None,
+                'quality': self.quality,
+                'fps': self.fps,
+                'in_flight': len(self.in_flight),
+                'sent': self.sent,
+                'acked': self.acked,
+                'skipped': self.skipped,
+                'expired': self.expired,
+                'discarded': self.discarded,
+            }
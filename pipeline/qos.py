@@ -0,0 +1,105 @@
+"""Sterowanie jakością przetwarzania w zależności od opóźnienia taktów."""
+import time
+from core.constants import (
+    QOS_LATENCY_BUDGET_MS, QOS_HEADROOM_RATIO, QOS_DOWNGRADE_TIME, QOS_UPGRADE_TIME, QOS_SETTLE_TIME
+)
+
+QOS_LEVELS = [
+    {'name': 'high', 'model_complexity': 2, 'preview_interval': 1, 'profile_interval': 1},
+    {'name': 'normal', 'model_complexity': 1, 'preview_interval': 1, 'profile_interval': 1},
+    {'name': 'reduced_preview', 'model_complexity': 1, 'preview_interval': 2, 'profile_interval': 1},
+    {'name': 'reduced_profile', 'model_complexity': 1, 'preview_interval': 2, 'profile_interval': 2},
+    {'name': 'lite', 'model_complexity': 0, 'preview_interval': 2, 'profile_interval': 2},
+]
+QOS_DEFAULT_LEVEL = 1
+
+
+class QosGovernor:
+    """
+    Porównuje opóźnienie taktów (od przechwycenia klatki do końca analizy) z budżetem.
+    Przy przekroczeniu budżetu schodzi o poziom w dół drabiny QOS_LEVELS
+    (podgląd -> widok boczny -> lżejszy model), przy zapasie wraca w górę aż do modelu 2.
+    """
+    def __init__(self, budget_ms=QOS_LATENCY_BUDGET_MS, level=QOS_DEFAULT_LEVEL):
+        self.budget_ms = budget_ms
+        self.level = level
+        self.best_level = 0
+        self.worst_level = len(QOS_LEVELS) - 1
+        self.latency_ms = 0.0
+        self.samples = 0
+        self.over_since = None
+        self.under_since = None
+        self.settle_until = 0.0
+        self.switches = []
+
+    @property
+    def settings(self):
+        return QOS_LEVELS[self.level]
+
+    @property
+    def model_complexity(self):
+        return self.settings['model_complexity']
+
+    @property
+    def preview_interval(self):
+        return self.settings['preview_interval']
+
+    @property
+    def profile_interval(self):
+        return self.settings['profile_interval']
+
+    def record(self, latency_ms):
+        """Dodaje pomiar opóźnienia taktu i w razie potrzeby zmienia poziom."""
+        now = time.monotonic()
+        self.samples += 1
+        self.latency_ms = latency_ms if self.samples == 1 else 0.9 * self.latency_ms + 0.1 * latency_ms
+
+        if now < self.settle_until:
+            return
+
+        if self.latency_ms > self.budget_ms:
+            self.under_since = None
+            if self.over_since is None:
+                self.over_since = now
+            elif now - self.over_since >= QOS_DOWNGRADE_TIME and self.level < self.worst_level:
+                self._switch(self.level + 1, now)
+        elif self.latency_ms < self.budget_ms * QOS_HEADROOM_RATIO:
+            self.over_since = None
+            if self.under_since is None:
+                self.under_since = now
+            elif now - self.under_since >= QOS_UPGRADE_TIME and self.level > self.best_level:
+                self._switch(self.level - 1, now)
+        else:
+            self.over_since = None
+            self.under_since = None
+
+    def reject_level(self):
+        """
+        Wywoływane, gdy bieżącego poziomu nie da się zastosować (np. brak modelu) - wyklucza go na stałe.
+        Zwykle schodzi niżej, a gdy niżej nie ma już dostępnego poziomu (np. brak modelu lite), wraca wyżej.
+        """
+        now = time.monotonic()
+        if self.level < self.worst_level:
+            self.best_level = self.level + 1
+            self._switch(self.best_level, now, reason='level unavailable')
+        elif self.level > self.best_level:
+            self.worst_level = self.level - 1
+            self._switch(self.worst_level, now, reason='level unavailable')
+
+    def _switch(self, level, now, reason=None):
+        previous = QOS_LEVELS[self.level]['name']
+        self.level = level
+        self.over_since = None
+        self.under_since = None
+        self.settle_until = now + QOS_SETTLE_TIME
+        reason = reason or f'latency {self.latency_ms:.0f} ms, budget {self.budget_ms} ms'
+        self.switches.append((round(now, 2), previous, self.settings['name'], reason))
+        print(f"QoS: {previous} -> {self.settings['name']} ({reason})")
+
+    def get_stats(self):
+        return {
+            'level': self.settings['name'],
+            'latency_ms': round(self.latency_ms, 1),
+            'budget_ms': self.budget_ms,
+            'switches': self.switches,
+        }
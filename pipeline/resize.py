@@ -0,0 +1,33 @@
+"""Skalowanie klatek do rozdzielczości inferencji i podglądu."""
+import cv2
+import numpy as np
+
+
+class FrameResizer:
+    """
+    Skaluje klatki do stałej rozdzielczości w bufor wielokrotnego użytku.
+    Zwrócony bufor jest nadpisywany przy następnym wywołaniu - używać w obrębie jednego etapu.
+    """
+    def __init__(self, width, height, name=''):
+        self.size = (width, height)
+        self.name = name
+        self.buffer = None
+        self._aspect_checked = False
+
+    def resize(self, image):
+        h, w = image.shape[:2]
+        target_w, target_h = self.size
+        if (w, h) == self.size:
+            return image
+
+        if not self._aspect_checked:
+            self._aspect_checked = True
+            if abs(w / h - target_w / target_h) > 0.01:
+                print(f"Frame resizer {self.name}: aspect ratio {w}x{h} -> {target_w}x{target_h} distorts the image")
+
+        if self.buffer is None or self.buffer.shape != (target_h, target_w, image.shape[2]):
+            self.buffer = np.empty((target_h, target_w, image.shape[2]), dtype=image.dtype)
+
+        interpolation = cv2.INTER_AREA if target_w <= w and target_h <= h else cv2.INTER_LINEAR
+        cv2.resize(image, self.size, dst=self.buffer, interpolation=interpolation)
+        return self.buffer
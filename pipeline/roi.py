@@ -0,0 +1,98 @@
+"""Przycinanie wejścia inferencji do obszaru wokół pozy z poprzedniej klatki."""
+from core.constants import POSE_NOSE, POSE_ROI_PADDING, POSE_ROI_MIN_SIZE, POSE_ROI_MIN_VISIBILITY
+from core.pose_drawing import RELEVANT_LANDMARKS
+from core.landmarks import LANDMARK_X, LANDMARK_Y, LANDMARK_VISIBILITY, LANDMARK_Z
+
+ROI_LANDMARKS = [POSE_NOSE] + RELEVANT_LANDMARKS
+
+
+class RoiTracker:
+    """
+    Śledzi prostokąt (w pikselach) otaczający pewne landmarki górnej części ciała.
+    Kolejna klatka jest przycinana do tego prostokąta z marginesem, a wynik
+    jest przeliczany z powrotem na współrzędne całej klatki.
+    """
+    def __init__(self, padding=POSE_ROI_PADDING, min_size=POSE_ROI_MIN_SIZE, min_visibility=POSE_ROI_MIN_VISIBILITY):
+        self.padding = padding
+        self.min_size = min_size
+        self.min_visibility = min_visibility
+        self.roi = None
+        self.cropped_frames = 0
+        self.full_frames = 0
+        self.lost = 0
+
+    def reset(self):
+        if self.roi is not None:
+            self.lost += 1
+        self.roi = None
+
+    def crop(self, image):
+        """Zwraca (obraz wejściowy, roi); roi None oznacza pełną klatkę."""
+        if self.roi is None:
+            self.full_frames += 1
+            return image, None
+        x0, y0, x1, y1 = self.roi
+        self.cropped_frames += 1
+        return image[y0:y1, x0:x1], self.roi
+
+    @staticmethod
+    def remap(landmarks, roi, shape):
+        """Przelicza landmarki (33, 4) z układu wycinka na układ całej klatki (w miejscu)."""
+        if landmarks is None or roi is None:
+            return landmarks
+        h, w = shape[:2]
+        x0, y0, x1, y1 = roi
+        landmarks[:, LANDMARK_X] = (landmarks[:, LANDMARK_X] * (x1 - x0) + x0) / w
+        landmarks[:, LANDMARK_Y] = (landmarks[:, LANDMARK_Y] * (y1 - y0) + y0) / h
+        landmarks[:, LANDMARK_Z] *= (x1 - x0) / w
+        return landmarks
+
+    def update(self, landmarks, shape):
+        """Wyznacza prostokąt dla następnej klatki; bez pewnych landmarków wraca do pełnej klatki."""
+        if landmarks is None:
+            self.reset()
+            return
+
+        points = landmarks[ROI_LANDMARKS]
+        points = points[points[:, LANDMARK_VISIBILITY] >= self.min_visibility]
+        if len(points) < 3:
+            self.reset()
+            return
+
+        h, w = shape[:2]
+        px0 = points[:, LANDMARK_X].min() * w
+        px1 = points[:, LANDMARK_X].max() * w
+        py0 = points[:, LANDMARK_Y].min() * h
+        py1 = points[:, LANDMARK_Y].max() * h
+
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            margin_x = (x1 - x0) * self.padding * 0.25
+            margin_y = (y1 - y0) * self.padding * 0.25
+            inside = px0 - margin_x >= x0 and px1 + margin_x <= x1 and py0 - margin_y >= y0 and py1 + margin_y <= y1
+            oversized = (px1 - px0) * (py1 - py0) < 0.2 * (x1 - x0) * (y1 - y0)
+            if inside and not oversized:
+                return
+
+        pad = max(px1 - px0, py1 - py0) * self.padding
+        half_w = max((px1 - px0) / 2 + pad, w * self.min_size / 2)
+        half_h = max((py1 - py0) / 2 + pad, h * self.min_size / 2)
+        cx = (px0 + px1) / 2
+        cy = (py0 + py1) / 2
+
+        x0 = max(0, int(cx - half_w))
+        y0 = max(0, int(cy - half_h))
+        x1 = min(w, int(cx + half_w))
+        y1 = min(h, int(cy + half_h))
+        if x1 - x0 < 32 or y1 - y0 < 32:
+            self.reset()
+            return
+        self.roi = (x0, y0, x1, y1)
+
+    def get_stats(self):
+        return {
+            'cropped': self.cropped_frames,
+            'full': self.full_frames,
+            'lost': self.lost,
+            'roi': self.roi,
+        }
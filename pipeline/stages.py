@@ -0,0 +1,183 @@
+"""Potok przetwarzania złożony z etapów połączonych ograniczonymi kolejkami."""
+import time
+from collections import deque
+from threading import Thread, Event, Condition
+
+STAGE_POLL_TIMEOUT = 0.1
+
+
+class DropOldestQueue:
+    """
+    Ograniczona kolejka między etapami.
+    Przy zapełnieniu usuwa najstarszy element (drop_oldest=True) albo blokuje producenta.
+    """
+    def __init__(self, maxsize=2, drop_oldest=True, on_drop=None):
+        self.maxsize = maxsize
+        self.drop_oldest = drop_oldest
+        self.on_drop = on_drop
+        self.items = deque()
+        self.dropped = 0
+        self.closed = False
+        self._condition = Condition()
+
+    def put(self, item, timeout=None):
+        """Dodaje element; False, jeśli kolejka została zamknięta lub minął timeout."""
+        dropped_items = []
+        with self._condition:
+            if self.drop_oldest:
+                while len(self.items) >= self.maxsize:
+                    dropped_items.append(self.items.popleft())
+                    self.dropped += 1
+            elif not self._condition.wait_for(lambda: len(self.items) < self.maxsize or self.closed, timeout):
+                return False
+            if self.closed:
+                return False
+            self.items.append(item)
+            self._condition.notify_all()
+
+        if self.on_drop:
+            for dropped in dropped_items:
+                self.on_drop(dropped)
+        return True
+
+    def get(self, timeout=None):
+        """Pobiera najstarszy element albo None po upływie timeout."""
+        with self._condition:
+            self._condition.wait_for(lambda: self.items or self.closed, timeout)
+            if not self.items:
+                return None
+            item = self.items.popleft()
+            self._condition.notify_all()
+            return item
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+    def __len__(self):
+        return len(self.items)
+
+
+class Stage:
+    """Etap potoku; domyślnie działa we własnym wątku i czyta ze swojej kolejki wejściowej."""
+    def __init__(self, name, handler, queue_size=2, drop_oldest=True, threaded=True, on_drop=None):
+        self.name = name
+        self.handler = handler
+        self.input = DropOldestQueue(queue_size, drop_oldest, on_drop) if threaded else None
+        self.next = None
+        self.processed = 0
+        self.busy_time = 0.0
+        self.thread = None
+        self.stop_event = None
+
+    def submit(self, item):
+        """Przekazuje element do etapu (do kolejki albo bezpośrednio, gdy etap nie ma wątku)."""
+        if self.input is None:
+            self._handle(item)
+            return
+        while not self.input.put(item, timeout=STAGE_POLL_TIMEOUT):
+            if self.input.closed or self.stop_event.is_set():
+                return
+
+    def _handle(self, item):
+        start = time.perf_counter()
+        try:
+            result = self.handler(item)
+        except Exception as e:
+            print(f"Pipeline stage '{self.name}' error: {e}")
+            return
+        finally:
+            self.busy_time += time.perf_counter() - start
+            self.processed += 1
+
+        if result is not None and self.next is not None:
+            self.next.submit(result)
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            item = self.input.get(timeout=STAGE_POLL_TIMEOUT)
+            if item is not None:
+                self._handle(item)
+
+    def start(self, stop_event):
+        self.stop_event = stop_event
+        if self.input is not None:
+            self.thread = Thread(target=self._run, name=f'stage-{self.name}', daemon=True)
+            self.thread.start()
+
+    def get_stats(self):
+        return {
+            'depth': len(self.input) if self.input is not None else 0,
+            'dropped': self.input.dropped if self.input is not None else 0,
+            'processed': self.processed,
+            'avg_ms': round(self.busy_time / self.processed * 1000, 2) if self.processed else 0.0,
+        }
+
+
+class SourceStage(Stage):
+    """Pierwszy etap potoku - cyklicznie wywołuje producenta zamiast czytać kolejkę."""
+    def __init__(self, name, producer):
+        super().__init__(name, lambda _: producer(), threaded=True)
+        self.input = None
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            self._handle(None)
+
+    def start(self, stop_event):
+        self.stop_event = stop_event
+        self.thread = Thread(target=self._run, name=f'stage-{self.name}', daemon=True)
+        self.thread.start()
+
+
+class Pipeline:
+    """
+    Łańcuch etapów: źródło -> etap -> ... -> etap.
+    Przepustowość wyznacza najwolniejszy etap, a nie suma czasów wszystkich etapów.
+    """
+    def __init__(self, on_drop=None):
+        self.stages = []
+        self.on_drop = on_drop
+        self.stop_event = Event()
+        self.finished = Event()
+
+    def _append(self, stage):
+        if self.stages:
+            self.stages[-1].next = stage
+        self.stages.append(stage)
+        return stage
+
+    def add_source(self, name, producer):
+        return self._append(SourceStage(name, producer))
+
+    def add_stage(self, name, handler, queue_size=2, drop_oldest=True, threaded=True):
+        return self._append(Stage(name, handler, queue_size, drop_oldest, threaded, self.on_drop))
+
+    def start(self):
+        for stage in reversed(self.stages):
+            stage.start(self.stop_event)
+        return self
+
+    def finish(self):
+        """Sygnalizuje naturalny koniec sesji (wywoływane z wnętrza etapu)."""
+        self.finished.set()
+
+    def wait(self, external_stop_event):
+        """Blokuje do zakończenia potoku albo ustawienia zewnętrznego zdarzenia stopu."""
+        while not self.finished.is_set():
+            if external_stop_event.wait(STAGE_POLL_TIMEOUT):
+                break
+
+    def stop(self):
+        self.stop_event.set()
+        for stage in self.stages:
+            if stage.input is not None:
+                stage.input.close()
+        for stage in self.stages:
+            if stage.thread is not None:
+                stage.thread.join()
+
+    def get_stats(self):
+        """Głębokości kolejek, porzucone elementy i średni czas pracy każdego etapu."""
+        return {stage.name: stage.get_stats() for stage in self.stages}
@@ -0,0 +1,80 @@
+"""Wysyłanie stanu interfejsu (metryki, stan treningu, status) tylko przy zmianach."""
+import copy
+import time
+from threading import Lock
+from core.constants import STATE_PUBLISH_RATE
+
+
+class StatePublisher:
+    """
+    Przechowuje bieżący stan sekcji interfejsu i wersję ostatnio wysłanego stanu.
+    collect() zwraca tylko zmienione pola względem ostatniej wysyłki i nie częściej
+    niż rate razy na sekundę; snapshot() daje pełny stan dla nowo podłączonego klienta.
+    """
+    def __init__(self, rate=STATE_PUBLISH_RATE):
+        self.interval = 1.0 / rate
+        self._lock = Lock()
+        self.version = 0
+        self.reset()
+
+    def reset(self):
+        """Czyści stan przed nową sesją (wersja rośnie dalej, żeby klienci wykryli zmianę)."""
+        with self._lock:
+            self.current = {}
+            self.sent = {}
+            self.last_publish = 0.0
+            self.updates = 0
+            self.published = 0
+
+    def update(self, values):
+        """Nadpisuje sekcje stanu (np. {'metrics': {...}}) bez wysyłania."""
+        if not values:
+            return
+        with self._lock:
+            for section, value in values.items():
+                self.current[section] = copy.deepcopy(value)
+            self.updates += 1
+
+    def _delta(self):
+        delta = {}
+        for section, value in self.current.items():
+            previous = self.sent.get(section)
+            if isinstance(value, dict) and isinstance(previous, dict):
+                changed = {key: item for key, item in value.items() if previous.get(key, ...) != item}
+                changed.update({key: None for key in previous if key not in value})
+                if changed:
+                    delta[section] = changed
+            elif value != previous:
+                delta[section] = value
+        return delta
+
+    def due(self):
+        """True, jeśli są zmiany, które można już wysłać."""
+        with self._lock:
+            return time.monotonic() - self.last_publish >= self.interval and bool(self._delta())
+
+    def collect(self):
+        """Zwraca {'v', 'base', 'delta'} ze zmianami od ostatniej wysyłki albo None."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self.last_publish < self.interval:
+                return None
+            delta = self._delta()
+            if not delta:
+                return None
+
+            for section in delta:
+                self.sent[section] = copy.deepcopy(self.current[section])
+            self.version += 1
+            self.last_publish = now
+            self.published += 1
+            return {'v': self.version, 'base': self.version - 1, 'delta': delta}
+
+    def snapshot(self):
+        """Pełny wysłany stan z numerem wersji."""
+        with self._lock:
+            return {'v': self.version, 'full': copy.deepcopy(self.sent)}
+
+    def get_stats(self):
+        with self._lock:
+            return {'version': self.version, 'updates': self.updates, 'published': self.published}
@@ -0,0 +1,41 @@
+"""Śledzenie, którzy klienci oglądają które widoki podglądu."""
+from threading import Lock
+
+PREVIEW_VIEWS = ('front', 'profile')
+
+
+class PreviewSubscribers:
+    """
+    Subskrypcje widoków podglądu per klient (sid Socket.IO).
+    Klient subskrybuje widoki, gdy strona jest widoczna, i rezygnuje, gdy przechodzi w tło.
+    """
+    def __init__(self):
+        self._lock = Lock()
+        self.subscriptions = {}
+        self.skipped_renders = {view: 0 for view in PREVIEW_VIEWS}
+
+    def subscribe(self, sid, views):
+        with self._lock:
+            self.subscriptions.setdefault(sid, set()).update(view for view in views if view in PREVIEW_VIEWS)
+
+    def unsubscribe(self, sid, views=None):
+        with self._lock:
+            if views is None:
+                self.subscriptions.pop(sid, None)
+                return
+            self.subscriptions.get(sid, set()).difference_update(views)
+
+    def is_watched(self, view):
+        with self._lock:
+            return any(view in views for views in self.subscriptions.values())
+
+    def record_skip(self, view):
+        self.skipped_renders[view] += 1
+
+    def reset_stats(self):
+        self.skipped_renders = {view: 0 for view in PREVIEW_VIEWS}
+
+    def get_stats(self):
+        with self._lock:
+            watchers = {view: sum(view in views for views in self.subscriptions.values()) for view in PREVIEW_VIEWS}
+        return {'watchers': watchers, 'skipped_renders': dict(self.skipped_renders)}
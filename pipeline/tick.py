@@ -0,0 +1,60 @@
+import numpy as np
+from threading import Lock
+
+
+class FrameBufferPool:
+    """Pula buforów klatek wielokrotnego użytku współdzielona przez etapy potoku."""
+    def __init__(self, max_free=8):
+        self.max_free = max_free
+        self._free = []
+        self._lock = Lock()
+
+    def copy(self, image):
+        """Kopiuje obraz do bufora z puli (alokuje tylko, gdy brak wolnego bufora tego rozmiaru)."""
+        buffer = None
+        with self._lock:
+            for i, candidate in enumerate(self._free):
+                if candidate.shape == image.shape and candidate.dtype == image.dtype:
+                    buffer = self._free.pop(i)
+                    break
+        if buffer is None:
+            return image.copy()
+        np.copyto(buffer, image)
+        return buffer
+
+    def release(self, buffer):
+        if buffer is None:
+            return
+        with self._lock:
+            if len(self._free) < self.max_free:
+                self._free.append(buffer)
+
+
+class Tick:
+    """Dane jednego taktu (para klatek i ich wyniki) przekazywane między etapami potoku."""
+    def __init__(self, front_frame, profile_frame, pool):
+        self.timestamp = max(front_frame.timestamp, profile_frame.timestamp)
+        self.front_timestamp = front_frame.timestamp
+        self.profile_timestamp = profile_frame.timestamp
+        self.front_seq = front_frame.seq
+        self.profile_seq = profile_frame.seq
+        self.front_image = pool.copy(front_frame.image)
+        self.profile_image = pool.copy(profile_frame.image)
+        self.front_results = None
+        self.profile_results = None
+        self.error_states = {}
+        self.state = {}
+        self.front_jpeg = None
+        self.profile_jpeg = None
+        self.preview_id = None
+        self.front_packet = None
+        self.profile_packet = None
+        self._pool = pool
+
+    def release(self):
+        """Zwraca bufory obrazów do puli; obrazy nie są już potrzebne po zakodowaniu."""
+        self._pool.release(self.front_image)
+        self._pool.release(self.profile_image)
+        self.front_image = None
+        self.profile_image = None
+
@@ -0,0 +1,142 @@
+"""
+Jeden binarny pakiet na takt: podglądy obu widoków, pakiety landmarków oraz stan treningu.
+
+Układ (little-endian):
+  2B  'CT'
+  u8  wersja
+  u8  flagi sekcji (TICK_SECTION_BITS)
+  u32 identyfikator klatek podglądu (0, gdy pakiet nie zawiera obrazów)
+  dla każdej obecnej sekcji, w kolejności bitów: u32 długość + dane
+
+Sekcja stanu (zmiany z StatePublisher: {'v', 'base', 'delta'}) jest mapą w formacie MessagePack
+(podzbiór: nil, bool, int, float, str, bin, array, map).
+"""
+import struct
+
+TICK_PACKET_MAGIC = b'CT'
+TICK_PACKET_VERSION = 1
+TICK_PACKET_HEADER = struct.Struct('<2sBBI')
+TICK_SECTION_LENGTH = struct.Struct('<I')
+
+TICK_SECTION_BITS = [
+    ('front_image', 1),
+    ('profile_image', 2),
+    ('front_landmarks', 4),
+    ('profile_landmarks', 8),
+    ('state', 16),
+]
+
+
+def pack_value(value, out=None):
+    """Serializuje wartość do MessagePack (bez zależności od pakietu msgpack)."""
+    if out is None:
+        out = bytearray()
+
+    if value is None:
+        out.append(0xc0)
+    elif value is True:
+        out.append(0xc3)
+    elif value is False:
+        out.append(0xc2)
+    elif isinstance(value, int):
+        _pack_int(value, out)
+    elif isinstance(value, float):
+        out.append(0xcb)
+        out += struct.pack('>d', value)
+    elif isinstance(value, str):
+        data = value.encode('utf-8')
+        length = len(data)
+        if length < 32:
+            out.append(0xa0 | length)
+        elif length < 0x100:
+            out += struct.pack('>BB', 0xd9, length)
+        elif length < 0x10000:
+            out += struct.pack('>BH', 0xda, length)
+        else:
+            out += struct.pack('>BI', 0xdb, length)
+        out += data
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        length = len(value)
+        if length < 0x100:
+            out += struct.pack('>BB', 0xc4, length)
+        elif length < 0x10000:
+            out += struct.pack('>BH', 0xc5, length)
+        else:
+            out += struct.pack('>BI', 0xc6, length)
+        out += value
+    elif isinstance(value, (list, tuple)):
+        length = len(value)
+        if length < 16:
+            out.append(0x90 | length)
+        elif length < 0x10000:
+            out += struct.pack('>BH', 0xdc, length)
+        else:
+            out += struct.pack('>BI', 0xdd, length)
+        for item in value:
+            pack_value(item, out)
+    elif isinstance(value, dict):
+        length = len(value)
+        if length < 16:
+            out.append(0x80 | length)
+        elif length < 0x10000:
+            out += struct.pack('>BH', 0xde, length)
+        else:
+            out += struct.pack('>BI', 0xdf, length)
+        for key, item in value.items():
+            pack_value(str(key), out)
+            pack_value(item, out)
+    elif hasattr(value, 'item'):
+        pack_value(value.item(), out)
+    else:
+        raise TypeError(f"Cannot pack value of type {type(value).__name__}")
+    return out
+
+
+def _pack_int(value, out):
+    if 0 <= value < 0x80:
+        out.append(value)
+    elif -32 <= value < 0:
+        out += struct.pack('>b', value)
+    elif 0 <= value < 0x100:
+        out += struct.pack('>BB', 0xcc, value)
+    elif 0 <= value < 0x10000:
+        out += struct.pack('>BH', 0xcd, value)
+    elif 0 <= value < 0x100000000:
+        out += struct.pack('>BI', 0xce, value)
+    elif value >= 0:
+        out += struct.pack('>BQ', 0xcf, value)
+    elif value >= -0x80:
+        out += struct.pack('>Bb', 0xd0, value)
+    elif value >= -0x8000:
+        out += struct.pack('>Bh', 0xd1, value)
+    elif value >= -0x80000000:
+        out += struct.pack('>Bi', 0xd2, value)
+    else:
+        out += struct.pack('>Bq', 0xd3, value)
+
+
+def encode_tick_packet(frame_id=0, front_image=None, profile_image=None,
+                       front_landmarks=None, profile_landmarks=None, state=None):
+    """Składa pakiet taktu; pomija sekcje równe None. Zwraca None, gdy nie ma czego wysłać."""
+    sections = {
+        'front_image': front_image,
+        'profile_image': profile_image,
+        'front_landmarks': front_landmarks,
+        'profile_landmarks': profile_landmarks,
+        'state': pack_value(state) if state else None,
+    }
+
+    flags = 0
+    body = bytearray()
+    for name, bit in TICK_SECTION_BITS:
+        data = sections[name]
+        if data is None:
+            continue
+        flags |= bit
+        body += TICK_SECTION_LENGTH.pack(len(data))
+        body += data
+
+    if not flags:
+        return None
+    header = TICK_PACKET_HEADER.pack(TICK_PACKET_MAGIC, TICK_PACKET_VERSION, flags, (frame_id or 0) & 0xFFFFFFFF)
+    return bytes(header + body)
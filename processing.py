@@ -1,22 +1,38 @@
-import cv2
-import mediapipe as mp
-from threading import Thread, Event, Lock
+from threading import Thread, Lock
 import time
 from datetime import datetime
+from camera import StreamSynchronizer
+from pipeline.pacing import FramePacer
+from pipeline.inference import create_pose_inference
+from pipeline.pose_worker import PoseWorkerError
+from pipeline.stages import Pipeline
+from pipeline.tick import Tick, FrameBufferPool
+from pipeline.resize import FrameResizer
+from pipeline.motion import MotionAdaptiveScheduler
+from pipeline.landmark_filter import LandmarkFilterStage
+from pipeline.qos import QosGovernor
+from pipeline.encoder import PreviewEncoder
+from pipeline.landmark_packet import encode_landmark_packet
+from pipeline.tick_packet import encode_tick_packet
+from core.constants import (
+    PREVIEW_MAX_AGE, PREVIEW_MODE, PREVIEW_TRANSPORT, PREVIEW_LANDMARK_VIDEO_FPS,
+    FRONT_INFERENCE_WIDTH, FRONT_INFERENCE_HEIGHT, PROFILE_INFERENCE_WIDTH, PROFILE_INFERENCE_HEIGHT,
+    FRONT_PREVIEW_WIDTH, FRONT_PREVIEW_HEIGHT, PROFILE_PREVIEW_WIDTH, PROFILE_PREVIEW_HEIGHT
+)
 from audio import AudioHandler, listen_for_voice_commands, listen_for_voice_commands_unified
 from core.pose_drawing import draw_pose_with_errors
 from exercises.bicep_curl.controller import BicepCurlController
 from exercises.bicep_curl.metrics import reset_front_view_state as reset_bicep_front
 from exercises.bicep_curl.metrics import reset_profile_view_state as reset_bicep_profile
 from exercises.overhead_press.controller import OverheadPressController
-from exercises.overhead_press.metrics import reset_front_view_state as reset_overhead_front
-from exercises.overhead_press.metrics import reset_profile_view_state as reset_overhead_profile
 from calibration.controller import CalibrationController
 from calibration.data import CalibrationData
 from training.session_controller import TrainingSessionController, TrainingSettings, SessionPhase, get_reset_functions
 from database.repository import TrainingRepository
 
-mp_pose = mp.solutions.pose
+FRAME_WAIT_TIMEOUT = 0.5
+ERROR_COOLDOWN = 3.0
+ERROR_DISPLAY_DURATION = 2.5
 
 CALIBRATION_PHRASES = [
     "Rozpoczynam kalibrację",
@@ -54,265 +70,615 @@ for reps in [5, 10, 12, 15, 20, 25, 30]:
     TRAINING_PHRASES.append(f"{reps} powtórzeń")
 
 
-def run_calibration_session(socketio, front_stream, profile_stream, stop_event):
+class _ErrorFeedback:
+    """Sygnał dźwiękowy dla poprawnych powtórzeń, komunikaty i podświetlanie błędów techniki."""
+    def __init__(self, audio_handler):
+        self.audio_handler = audio_handler
+        self.error_states = {}
+        self.last_error_spoken = {}
+    
+    def handle(self, result):
+        if not result.get('rep_detected'):
+            return
+        
+        if result.get('valid'):
+            self.audio_handler.queue_beep()
+            return
+        
+        current_time = time.time()
+        message = result.get('error_message', '')
+        
+        if message:
+            last_spoken = self.last_error_spoken.get(message, 0)
+            if current_time - last_spoken >= ERROR_COOLDOWN:
+                self.audio_handler.queue_speech(message)
+                self.last_error_spoken[message] = current_time
+        
+        for part in result.get('error_parts', []):
+            self.error_states[part] = current_time + ERROR_DISPLAY_DURATION
+
+
+class _FreshResults:
     """
-    Uruchamia sesję kalibracji użytkownika.
-    Parametry:
-    - socketio: instancja SocketIO do komunikacji
-    - front_stream: strumień z kamery przedniej
-    - profile_stream: strumień z kamery bocznej
-    - stop_event: event zatrzymania
+    Wykrywa takty bez nowych wyników pozy: po pominiętej inferencji widok powtarza poprzednią ramkę
+    (z tym samym znacznikiem czasu), a ta sama próbka nie może trafić do pomiarów drugi raz.
     """
-    front_pose = mp_pose.Pose(
-        min_detection_confidence=0.5,
-        min_tracking_confidence=0.5,
-        model_complexity=1
-    )
-    profile_pose = mp_pose.Pose(
-        min_detection_confidence=0.5,
-        min_tracking_confidence=0.5,
-        model_complexity=1
-    )
-    
-    audio_handler = AudioHandler()
-    calibration = CalibrationController()
-    
-    audio_handler.preload_speech(CALIBRATION_PHRASES)
-    
-    reset_bicep_front()
-    reset_bicep_profile()
-    
-    audio_handler.queue_speech("Rozpoczynam kalibrację")
-    audio_handler.queue_speech(calibration.get_instructions())
-    
-    socketio.emit('calibration-step', {
-        'step': calibration.current_step,
-        'instruction': calibration.get_instructions()
-    })
-    
-    waiting_for_speech = True
-    processing_enabled = False
+    def __init__(self):
+        self.last_timestamps = (None, None)
+    
+    def check(self, tick):
+        """True, jeśli co najmniej jeden widok ma nowszy wynik niż ostatnio przetworzony."""
+        timestamps = (tick.front_results.timestamp, tick.profile_results.timestamp)
+        if timestamps == self.last_timestamps:
+            return False
+        self.last_timestamps = timestamps
+        return True
+
+
+class _CalibrationAnalysis:
+    """Etap analizy prowadzący kalibrację użytkownika krok po kroku."""
+    def __init__(self, session, audio_handler, completion_message):
+        self.station = session
+        self.audio_handler = audio_handler
+        self.completion_message = completion_message
+        self.calibration = CalibrationController()
+        self.calibration_data = None
+        self.waiting_for_speech = True
+        self.processing_enabled = False
+        self.metric_state_ready = False
+        self.fresh_results = _FreshResults()
+    
+    def start(self):
+        self.audio_handler.queue_speech("Rozpoczynam kalibrację")
+        self.audio_handler.queue_speech(self.calibration.get_instructions())
+        self._emit_step()
+    
+    def _emit_step(self):
+        self.station.emit('calibration-step', {
+            'step': self.calibration.current_step,
+            'instruction': self.calibration.get_instructions()
+        })
     
-    while not stop_event.is_set():
-        front_frame, front_was_read = front_stream.get()
-        profile_frame, profile_was_read = profile_stream.get()
+    def process(self, tick):
+        """Zwraca True, gdy kalibracja się zakończyła, a komunikat końcowy został wypowiedziany."""
+        if not self.metric_state_ready:
+            # Stan metryk jest lokalny dla wątku - resetowany w wątku etapu analizy, nie w wątku sesji
+            reset_bicep_front()
+            reset_bicep_profile()
+            self.metric_state_ready = True
         
-        if front_frame is None or profile_frame is None:
-            continue
+        speech_complete = self.audio_handler._speech_complete.is_set()
         
-        if waiting_for_speech:
-            if audio_handler._speech_complete.is_set():
-                waiting_for_speech = False
-                processing_enabled = True
+        if self.calibration_data is not None:
+            return speech_complete
         
-        if not front_was_read:
-            front_rgb = cv2.cvtColor(front_frame, cv2.COLOR_BGR2RGB)
-            front_rgb.flags.writeable = False
-            front_results = front_pose.process(front_rgb)
-            front_rgb.flags.writeable = True
-            draw_pose_with_errors(front_frame, front_results, {})
-        else:
-            front_results = None
-        
-        if not profile_was_read:
-            profile_rgb = cv2.cvtColor(profile_frame, cv2.COLOR_BGR2RGB)
-            profile_rgb.flags.writeable = False
-            profile_results = profile_pose.process(profile_rgb)
-            profile_rgb.flags.writeable = True
-            draw_pose_with_errors(profile_frame, profile_results, {})
+        if self.waiting_for_speech and speech_complete:
+            self.waiting_for_speech = False
+            self.processing_enabled = True
+        
+        if not self.processing_enabled or not self.fresh_results.check(tick):
+            return False
+        
+        step_complete, message = self.calibration.process_frames(tick.front_results, tick.profile_results)
+        if not step_complete:
+            return False
+        
+        self.processing_enabled = False
+        
+        if self.calibration.is_complete():
+            self.calibration_data = self.calibration.get_calibration_data()
+            self.calibration_data.save(self.station.station_id)
+            
+            self.audio_handler.queue_speech_priority(self.completion_message)
+            
+            self.station.emit('calibration-complete', {
+                'data': self.calibration_data.to_dict()
+            })
+            return False
+        
+        if message:
+            self.audio_handler.queue_speech_priority(message)
+            self.waiting_for_speech = True
+        
+        self._emit_step()
+        return False
+
+
+class _ExerciseAnalysis:
+    """Etap analizy pojedynczego ćwiczenia sterowanego poleceniami 'zacznij'/'pauza'."""
+    def __init__(self, session, audio_handler, analyzing_event, exercise_type):
+        self.station = session
+        self.audio_handler = audio_handler
+        self.analyzing_event = analyzing_event
+        self.exercise_type = exercise_type
+        self.feedback = _ErrorFeedback(audio_handler)
+        self.exercise = None
+        self.prev_analyzing_state = False
+        self.metric_state_ready = False
+        self.fresh_results = _FreshResults()
+    
+    def start(self):
+        self.station.emit('status', {'state': 'waiting'})
+        
+        calibration_data = CalibrationData.load(self.station.station_id)
+        
+        if self.exercise_type == 'overhead_press':
+            print("Initializing Overhead Press exercise")
+            self.exercise = OverheadPressController(calibration_data)
         else:
-            profile_results = None
+            print("Initializing Bicep Curl exercise")
+            self.exercise = BicepCurlController(calibration_data)
+    
+    def process(self, tick):
+        if not self.metric_state_ready:
+            # Stan metryk jest lokalny dla wątku - resetowany w wątku etapu analizy, nie w wątku sesji
+            reset_front, reset_profile = get_reset_functions(self.exercise_type)
+            reset_front()
+            reset_profile()
+            self.metric_state_ready = True
+        
+        if not self.analyzing_event.is_set():
+            if self.prev_analyzing_state:
+                tick.state['status'] = {'state': 'waiting'}
+                self.prev_analyzing_state = False
+            return False
+        
+        if not self.prev_analyzing_state:
+            tick.state['status'] = {'state': 'analyzing'}
+            self.prev_analyzing_state = True
+        
+        if not self.fresh_results.check(tick):
+            tick.error_states = dict(self.feedback.error_states)
+            return False
+        
+        result = self.exercise.process_frames(tick.front_results, tick.profile_results)
+        self.feedback.handle(result)
+        tick.error_states = dict(self.feedback.error_states)
+        
+        tick.state['metrics'] = {
+            'right_reps': result['right_reps'],
+            'left_reps': result['left_reps'],
+            'errors': []
+        }
+        return False
+
+
+class _UnifiedSessionAnalysis:
+    """
+    Etap analizy zintegrowanej sesji: najpierw kalibracja, potem kolejne
+    ćwiczenia i rundy sterowane poleceniami głosowymi.
+    """
+    def __init__(self, session, audio_handler, stop_event, analyzing_event, training_settings):
+        self.station = session
+        self.audio_handler = audio_handler
+        self.stop_event = stop_event
+        self.analyzing_event = analyzing_event
+        self.training_settings = training_settings
+        self.feedback = _ErrorFeedback(audio_handler)
+        
+        self.calibration = None
+        self.calibration_data = CalibrationData.load(session.station_id)
+        self.session = None
+        self.session_start_time = None
+        self.prev_analyzing_state = False
+        self.auto_advance_cooldown = 0
+        self.fresh_results = _FreshResults()
+        
+        self.exercise_command_lock = Lock()
+        self.pending_command = None
+    
+    def _exercise_command_callback(self, command):
+        with self.exercise_command_lock:
+            self.pending_command = command
+    
+    def start(self):
+        self.station.emit('session-phase', {'phase': 'calibration'})
+        self.calibration = _CalibrationAnalysis(
+            self.station,
+            self.audio_handler,
+            "Kalibracja zakończona. Zaczynamy trening."
+        )
+        self.calibration.start()
+    
+    def _start_training(self, tick):
+        self.calibration_data = self.calibration.calibration_data
+        self.calibration = None
+        
+        self.station.emit('session-phase', {'phase': 'exercise'})
+        self.session_start_time = time.time()
+        
+        settings = TrainingSettings.from_dict(self.training_settings)
+        self.session = TrainingSessionController(settings)
+        self.session.calibration_data = self.calibration_data
+        self.session.state.phase = SessionPhase.EXERCISE
+        self.session._init_current_exercise()
+        
+        self._reset_exercise_state()
+        
+        voice_thread = Thread(
+            target=listen_for_voice_commands_unified,
+            args=(self.audio_handler, self.stop_event, self.analyzing_event, self._exercise_command_callback),
+            daemon=True
+        )
+        voice_thread.start()
+        
+        self.audio_handler.queue_speech(self.session.get_announcement_for_start())
+        
+        tick.state['training_state'] = self.session.get_state_dict()
+        tick.state['status'] = {'state': 'waiting'}
+    
+    def _reset_exercise_state(self):
+        reset_front, reset_profile = get_reset_functions(self.session.get_current_exercise_type())
+        reset_front()
+        reset_profile()
+    
+    def _handle_command(self, tick):
+        with self.exercise_command_lock:
+            command = self.pending_command
+            self.pending_command = None
+        
+        if command == 'next':
+            event_result = self.session.go_to_next()
+            _handle_exercise_transition(self.audio_handler, event_result)
+            tick.state['training_state'] = self.session.get_state_dict()
+            self._reset_exercise_state()
+        elif command == 'previous':
+            event_result = self.session.go_to_previous()
+            if event_result['event'] != 'at_start':
+                _handle_exercise_transition(self.audio_handler, event_result)
+                tick.state['training_state'] = self.session.get_state_dict()
+                self._reset_exercise_state()
+    
+    def _complete_training(self):
+        self.audio_handler.queue_speech_priority("Trening zakończony.")
+        stats = self.session.get_completion_stats()
+        
+        detailed = self.session.get_detailed_results()
+        session_data = {
+            'timestamp': datetime.now().isoformat(),
+            'duration_seconds': int(time.time() - self.session_start_time),
+            'total_reps': detailed['total_reps'],
+            'total_errors': detailed['total_errors'],
+            'rounds': detailed['settings']['rounds'],
+            'exercises_config': detailed['settings'],
+            'exercise_results': detailed['exercise_results']
+        }
+        TrainingRepository.save_session(session_data)
+        
+        self.station.emit('training-complete', stats)
+        self.audio_handler.wait_for_speech(timeout=5)
+    
+    def process(self, tick):
+        """Zwraca True po zakończeniu całego treningu."""
+        if self.calibration is not None:
+            if self.calibration.process(tick):
+                self._start_training(tick)
+            return False
+        
+        self._handle_command(tick)
+        
+        if self.session.is_complete():
+            self._complete_training()
+            return True
+        
+        if not self.analyzing_event.is_set():
+            if self.prev_analyzing_state:
+                tick.state['status'] = {'state': 'waiting'}
+                self.prev_analyzing_state = False
+            return False
+        
+        if not self.prev_analyzing_state:
+            tick.state['status'] = {'state': 'analyzing'}
+            self.prev_analyzing_state = True
+        
+        if not self.fresh_results.check(tick):
+            tick.error_states = dict(self.feedback.error_states)
+            return False
+        
+        result = self.session.process_frame(tick.front_results, tick.profile_results)
+        self.feedback.handle(result)
+        tick.error_states = dict(self.feedback.error_states)
+        
+        tick.state['metrics'] = {
+            'right_reps': self.session.state.right_reps,
+            'left_reps': self.session.state.left_reps,
+            'errors': []
+        }
+        tick.state['training_state'] = self.session.get_state_dict()
+        
+        current_time = time.time()
+        if self.session.check_set_complete() and current_time > self.auto_advance_cooldown:
+            self.auto_advance_cooldown = current_time + 3.0
+            event_result = self.session.advance_to_next()
+            _handle_exercise_transition(self.audio_handler, event_result)
+            tick.state['training_state'] = self.session.get_state_dict()
+            if not self.session.is_complete():
+                self._reset_exercise_state()
+        
+        return False
+
+
+def _build_session_pipeline(session, synchronizer, inference, scheduler, landmark_filters, governor, encoder, analysis, startup):
+    """
+    Składa potok sesji: przechwycenie -> inferencja (i opcjonalne filtrowanie landmarków) -> analiza -> kodowanie -> wysyłka.
+    Etapy podglądu odrzucają najstarsze takty, analiza dostaje każdy zinferowany takt.
+    """
+    state_publisher = session.state_publisher
+    preview_flow = session.preview_flow
+    preview_subscribers = session.preview_subscribers
+    mjpeg_broadcaster = session.mjpeg_broadcaster
+    pacer = FramePacer()
+    buffer_pool = FrameBufferPool()
+    
+    def drop(tick):
+        """Porzucony takt zwalnia bufory, a jego klatka podglądu przestaje czekać na potwierdzenie."""
+        if tick.preview_id is not None:
+            preview_flow.discard(tick.preview_id)
+        tick.release()
+    
+    pipeline = Pipeline(on_drop=drop)
+    preview_ticks = [0]
+    last_video = [0.0]
+    front_inference_resizer = FrameResizer(FRONT_INFERENCE_WIDTH, FRONT_INFERENCE_HEIGHT, 'front-inference')
+    profile_inference_resizer = FrameResizer(PROFILE_INFERENCE_WIDTH, PROFILE_INFERENCE_HEIGHT, 'profile-inference')
+    front_preview_resizer = FrameResizer(FRONT_PREVIEW_WIDTH, FRONT_PREVIEW_HEIGHT, 'front-preview')
+    profile_preview_resizer = FrameResizer(PROFILE_PREVIEW_WIDTH, PROFILE_PREVIEW_HEIGHT, 'profile-preview')
+    
+    def capture(_=None):
+        if not pacer.wait(pipeline.stop_event):
+            return None
+        pair = synchronizer.next_pair(timeout=FRAME_WAIT_TIMEOUT)
+        if pair is None:
+            return None
+        front_frame, profile_frame = pair
+        return Tick(front_frame, profile_frame, buffer_pool)
+    
+    def infer(tick):
+        try:
+            return run_inference(tick)
+        except PoseWorkerError as e:
+            print(f"Pose inference stopped, ending session: {e}")
+            tick.release()
+            pipeline.finish()
+            return None
+    
+    def run_inference(tick):
+        if inference.model_complexity != governor.model_complexity:
+            try:
+                inference.set_model_complexity(governor.model_complexity)
+            except PoseWorkerError:
+                raise
+            except Exception as e:
+                print(f"Model complexity {governor.model_complexity} unavailable: {e}")
+                governor.reject_level()
+        scheduler.set_min_interval('profile', governor.profile_interval)
+        
+        run_front = scheduler.should_infer('front')
+        run_profile = scheduler.should_infer('profile')
+        tick.front_results, tick.profile_results = inference.process(
+            front_inference_resizer.resize(tick.front_image) if run_front else None,
+            profile_inference_resizer.resize(tick.profile_image) if run_profile else None,
+            tick.front_timestamp, tick.profile_timestamp
+        )
+        if run_front:
+            scheduler.observe('front', tick.front_results)
+        if run_profile:
+            scheduler.observe('profile', tick.profile_results)
+        landmark_filters.process(tick)
+        
+        if 'first_landmarks_ms' not in startup and (tick.front_results.has_pose or tick.profile_results.has_pose):
+            startup['first_landmarks_ms'] = round((time.monotonic() - startup['started']) * 1000)
+            print(f"First landmarks {startup['first_landmarks_ms']} ms after session start")
+        return tick
+    
+    def analyze(tick):
+        if analysis.process(tick):
+            pipeline.finish()
+        state_publisher.update(tick.state)
+        governor.record((time.monotonic() - tick.timestamp) * 1000)
+        return tick
+    
+    def encode(tick):
+        preview_ticks[0] += 1
+        if preview_ticks[0] % governor.preview_interval:
+            return state_only(tick)
+        
+        front_watched = is_watched('front')
+        profile_watched = is_watched('profile')
+        if not front_watched:
+            preview_subscribers.record_skip('front')
+        if not profile_watched:
+            preview_subscribers.record_skip('profile')
+        if not front_watched and not profile_watched:
+            return state_only(tick)
+        
+        if PREVIEW_MODE == 'landmarks':
+            return encode_landmarks(tick, front_watched, profile_watched)
+        if time.monotonic() - tick.timestamp > PREVIEW_MAX_AGE or not can_send_images():
+            return state_only(tick)
+        
+        encoder.set_quality(preview_flow.quality)
+        front_preview = profile_preview = None
+        if front_watched:
+            front_preview = front_preview_resizer.resize(tick.front_image)
+            draw_pose_with_errors(front_preview, tick.front_results, tick.error_states)
+        if profile_watched:
+            profile_preview = profile_preview_resizer.resize(tick.profile_image)
+            draw_pose_with_errors(profile_preview, tick.profile_results, tick.error_states)
+        
+        front_jpeg, profile_jpeg = encoder.encode_pair(front_preview, profile_preview)
+        if not deliver_images(tick, front_jpeg, profile_jpeg) or PREVIEW_TRANSPORT == 'mjpeg':
+            return state_only(tick)
+        tick.release()
+        return tick
+    
+    def state_only(tick):
+        """Takt bez podglądu idzie dalej tylko wtedy, gdy czeka stan do wysłania."""
+        tick.release()
+        return tick if state_publisher.due() else None
+    
+    def is_watched(view):
+        """Czy ktokolwiek ogląda widok (subskrypcja widocznej strony albo otwarty strumień MJPEG)."""
+        if PREVIEW_TRANSPORT == 'mjpeg':
+            return mjpeg_broadcaster.has_viewers(view)
+        return preview_subscribers.is_watched(view)
+    
+    def can_send_images():
+        if PREVIEW_TRANSPORT == 'mjpeg':
+            return mjpeg_broadcaster.has_viewers()
+        return preview_flow.should_send()
+    
+    def deliver_images(tick, front_jpeg, profile_jpeg):
+        """Obrazy trafiają do pakietu taktu albo, w transporcie MJPEG, do strumieni HTTP."""
+        if front_jpeg is None and profile_jpeg is None:
+            return False
+        if PREVIEW_TRANSPORT == 'mjpeg':
+            if front_jpeg is not None:
+                mjpeg_broadcaster.publish('front', front_jpeg, encoder.mimetype)
+            if profile_jpeg is not None:
+                mjpeg_broadcaster.publish('profile', profile_jpeg, encoder.mimetype)
+            return True
+        tick.front_jpeg, tick.profile_jpeg = front_jpeg, profile_jpeg
+        views = [view for view, data in (('front', front_jpeg), ('profile', profile_jpeg)) if data is not None]
+        tick.preview_id = preview_flow.register(views)
+        return True
+    
+    def encode_landmarks(tick, front_watched, profile_watched):
+        """Tryb 'landmarks': pakiet landmarków w każdym takcie, nierysowany obraz tła z niską częstotliwością."""
+        if front_watched:
+            tick.front_packet = encode_landmark_packet(preview_ticks[0], tick.front_results, tick.error_states, FRONT_PREVIEW_WIDTH, FRONT_PREVIEW_HEIGHT)
+        if profile_watched:
+            tick.profile_packet = encode_landmark_packet(preview_ticks[0], tick.profile_results, tick.error_states, PROFILE_PREVIEW_WIDTH, PROFILE_PREVIEW_HEIGHT)
+        
+        now = time.monotonic()
+        if now - last_video[0] >= 1.0 / PREVIEW_LANDMARK_VIDEO_FPS and now - tick.timestamp <= PREVIEW_MAX_AGE and can_send_images():
+            encoder.set_quality(preview_flow.quality)
+            front_jpeg, profile_jpeg = encoder.encode_pair(
+                front_preview_resizer.resize(tick.front_image) if front_watched else None,
+                profile_preview_resizer.resize(tick.profile_image) if profile_watched else None
+            )
+            if deliver_images(tick, front_jpeg, profile_jpeg):
+                last_video[0] = now
         
-        if processing_enabled and front_results and profile_results:
-            step_complete, message = calibration.process_frames(front_results, profile_results)
+        tick.release()
+        return tick
+    
+    def emit(tick):
+        has_images = tick.front_jpeg is not None or tick.profile_jpeg is not None
+        packet = encode_tick_packet(
+            tick.preview_id if has_images else 0,
+            tick.front_jpeg,
+            tick.profile_jpeg,
+            tick.front_packet,
+            tick.profile_packet,
+            state_publisher.collect()
+        )
+        if packet is not None:
+            session.emit('tick', packet)
+    
+    pipeline.add_source('capture', capture)
+    pipeline.add_stage('inference', infer, queue_size=1)
+    pipeline.add_stage('analysis', analyze, queue_size=4, drop_oldest=False)
+    pipeline.add_stage('encode', encode, queue_size=1)
+    pipeline.add_stage('emit', emit, queue_size=2)
+    return pipeline
+
+
+def _run_session_pipeline(session, front_stream, profile_stream, audio_handler, analysis):
+    """Uruchamia potok sesji dla danego etapu analizy i sprząta po jego zakończeniu (także po błędzie)."""
+    startup = {'started': time.monotonic()}
+    session.preview_flow.reset()
+    session.state_publisher.reset()
+    session.preview_subscribers.reset_stats()
+    inference = encoder = pipeline = None
+    try:
+        synchronizer = StreamSynchronizer(front_stream, profile_stream)
+        inference = create_pose_inference()
+        startup['inference_ready_ms'] = round((time.monotonic() - startup['started']) * 1000)
+        scheduler = MotionAdaptiveScheduler()
+        landmark_filters = LandmarkFilterStage()
+        governor = QosGovernor()
+        encoder = PreviewEncoder()
+        pipeline = _build_session_pipeline(session, synchronizer, inference, scheduler, landmark_filters, governor, encoder, analysis, startup)
+        
+        session.emit('preview-format', {
+            'mimetype': encoder.mimetype,
+            'mode': PREVIEW_MODE,
+            'transport': PREVIEW_TRANSPORT,
+            'stream': f'/stream/{session.id}'
+        })
+        
+        analysis.start()
+        pipeline.start()
+        pipeline.wait(session.stop_event)
+    finally:
+        if pipeline is not None:
+            pipeline.stop()
             
-            if step_complete:
-                processing_enabled = False
-                
-                if calibration.is_complete():
-                    calibration_data = calibration.get_calibration_data()
-                    calibration_data.save()
-                    
-                    audio_handler.queue_speech_priority("Kalibracja zakończona")
-                    
-                    socketio.emit('calibration-complete', {
-                        'data': calibration_data.to_dict()
-                    })
-                    
-                    audio_handler.wait_for_speech()
-                    break
-                else:
-                    if message:
-                        audio_handler.queue_speech_priority(message)
-                        waiting_for_speech = True
-                    
-                    socketio.emit('calibration-step', {
-                        'step': calibration.current_step,
-                        'instruction': calibration.get_instructions()
-                    })
-        
-        _, front_img = cv2.imencode('.jpg', front_frame)
-        _, profile_img = cv2.imencode('.jpg', profile_frame)
-        
-        socketio.emit('front-frame', front_img.tobytes())
-        socketio.emit('profile-frame', profile_img.tobytes())
-    
-    socketio.emit('session-ended')
-    audio_handler.stop()
-    front_stream.stop()
-    profile_stream.stop()
+            print(f'Frame sync stats: {synchronizer.get_stats()}')
+            print(f'Pipeline stats: {pipeline.get_stats()}')
+            print(f'Pose ROI stats: {inference.get_roi_stats()}')
+            print(f'Motion scheduler stats: {scheduler.get_stats()}')
+            if landmark_filters.enabled:
+                print(f'Landmark filter stats: {landmark_filters.get_stats()}')
+            print(f'QoS stats: {governor.get_stats()}')
+            print(f'Preview encoder stats: {encoder.get_stats()}')
+            print(f'Preview flow stats: {session.preview_flow.get_stats()}')
+            print(f'State publisher stats: {session.state_publisher.get_stats()}')
+            print(f'MJPEG stats: {session.mjpeg_broadcaster.get_stats()}')
+            print(f'Preview subscribers: {session.preview_subscribers.get_stats()}')
+            print(f"Startup latency: inference ready {startup['inference_ready_ms']} ms, first landmarks {startup.get('first_landmarks_ms')} ms")
+        session.mjpeg_broadcaster.close()
+        session.state_publisher.reset()
+        session.emit('session-ended')
+        audio_handler.stop()
+        if inference is not None:
+            inference.close()
+        if encoder is not None:
+            encoder.close()
+        front_stream.stop()
+        profile_stream.stop()
+
+
+def run_calibration_session(session, front_stream, profile_stream):
+    """
+    Uruchamia sesję kalibracji użytkownika.
+    Parametry:
+    - session: sesja stanowiska (pokój Socket.IO, eventy zatrzymania i analizy)
+    - front_stream: strumień z kamery przedniej
+    - profile_stream: strumień z kamery bocznej
+    """
+    audio_handler = AudioHandler()
+    audio_handler.preload_speech(CALIBRATION_PHRASES)
+    
+    analysis = _CalibrationAnalysis(session, audio_handler, "Kalibracja zakończona")
+    _run_session_pipeline(session, front_stream, profile_stream, audio_handler, analysis)
 
 
-def process_camera_streams(socketio, front_stream, profile_stream, stop_event, analyzing_event, exercise_type='bicep_curl'):
+def process_camera_streams(session, front_stream, profile_stream, exercise_type='bicep_curl'):
     """
     Przetwarza strumienie kamer dla pojedynczego ćwiczenia.
     Parametry:
-    - socketio: instancja SocketIO do komunikacji
+    - session: sesja stanowiska (pokój Socket.IO, eventy zatrzymania i analizy)
     - front_stream: strumień z kamery przedniej
     - profile_stream: strumień z kamery bocznej
-    - stop_event: event zatrzymania
-    - analyzing_event: event analizy
     - exercise_type: typ ćwiczenia
     """
-    front_pose = mp_pose.Pose(
-        min_detection_confidence=0.5,
-        min_tracking_confidence=0.5,
-        model_complexity=1
-    )
-    profile_pose = mp_pose.Pose(
-        """
-        Uruchamia zintegrowaną sesję treningową (kalibracja + ćwiczenia).
-        Parametry:
-        - socketio: instancja SocketIO do komunikacji
-        - front_stream: strumień z kamery przedniej
-        - profile_stream: strumień z kamery bocznej
-        - stop_event: event zatrzymania
-        - analyzing_event: event analizy
-        - training_settings: ustawienia treningu
-        - force_calibration: wymuszenie kalibracji
-        """
-        min_detection_confidence=0.5,
-        min_tracking_confidence=0.5,
-        model_complexity=1
-    )
-    
     audio_handler = AudioHandler()
-    
     audio_handler.queue_speech("Powiedz 'zacznij' aby rozpocząć")
     
     voice_thread = Thread(
         target=listen_for_voice_commands,
-        args=(audio_handler, stop_event, analyzing_event),
+        args=(audio_handler, session.stop_event, session.analyzing_event),
         daemon=True
     )
     voice_thread.start()
     
-    socketio.emit('status', {'state': 'waiting'})
-    
-    calibration_data = CalibrationData.load()
-    
-    if exercise_type == 'overhead_press':
-        print("Initializing Overhead Press exercise")
-        exercise = OverheadPressController(calibration_data)
-        reset_overhead_front()
-        reset_overhead_profile()
-    else:
-        print("Initializing Bicep Curl exercise")
-        exercise = BicepCurlController(calibration_data)
-        reset_bicep_front()
-        reset_bicep_profile()
-    
-    error_states = {}
-    last_error_spoken = {}
-    ERROR_COOLDOWN = 3.0
-    ERROR_DISPLAY_DURATION = 2.5
-    
-    prev_analyzing_state = False
-
-    while not stop_event.is_set():
-        front_frame, front_was_read = front_stream.get()
-        profile_frame, profile_was_read = profile_stream.get()
-        
-        if front_frame is None or profile_frame is None:
-            continue
+    analysis = _ExerciseAnalysis(session, audio_handler, session.analyzing_event, exercise_type)
+    _run_session_pipeline(session, front_stream, profile_stream, audio_handler, analysis)
 
-        if analyzing_event.is_set():
-            if not prev_analyzing_state:
-                socketio.emit('status', {'state': 'analyzing'})
-                prev_analyzing_state = True
-            
-            if not front_was_read:
-                front_rgb = cv2.cvtColor(front_frame, cv2.COLOR_BGR2RGB)
-                front_rgb.flags.writeable = False
-                front_results = front_pose.process(front_rgb)
-                front_rgb.flags.writeable = True
-                draw_pose_with_errors(front_frame, front_results, error_states)
-            else:
-                front_results = None
 
-            if not profile_was_read:
-                profile_rgb = cv2.cvtColor(profile_frame, cv2.COLOR_BGR2RGB)
-                profile_rgb.flags.writeable = False
-                profile_results = profile_pose.process(profile_rgb)
-                profile_rgb.flags.writeable = True
-                draw_pose_with_errors(profile_frame, profile_results, error_states)
-            else:
-                profile_results = None
-            
-            if front_results and profile_results:
-                result = exercise.process_frames(front_results, profile_results)
-                
-                if result['rep_detected']:
-                    if result['valid']:
-                        audio_handler.queue_beep()
-                    else:
-                        current_time = time.time()
-                        message = result['error_message']
-                        
-                        last_spoken = last_error_spoken.get(message, 0)
-                        if current_time - last_spoken >= ERROR_COOLDOWN:
-                            audio_handler.queue_speech(message)
-                            last_error_spoken[message] = current_time
-                        
-                        for part in result['error_parts']:
-                            error_states[part] = current_time + ERROR_DISPLAY_DURATION
-                
-                socketio.emit('metrics', {
-                    'right_reps': result['right_reps'],
-                    'left_reps': result['left_reps'],
-                    'errors': []
-                })
-                
-        else:
-            if prev_analyzing_state:
-                socketio.emit('status', {'state': 'waiting'})
-                prev_analyzing_state = False
-            
-            front_rgb = cv2.cvtColor(front_frame, cv2.COLOR_BGR2RGB)
-            front_rgb.flags.writeable = False
-            front_results = front_pose.process(front_rgb)
-            front_rgb.flags.writeable = True
-            draw_pose_with_errors(front_frame, front_results, {})
-            
-            profile_rgb = cv2.cvtColor(profile_frame, cv2.COLOR_BGR2RGB)
-            profile_rgb.flags.writeable = False
-            profile_results = profile_pose.process(profile_rgb)
-            profile_rgb.flags.writeable = True
-            draw_pose_with_errors(profile_frame, profile_results, {})
-
-        _, front_img = cv2.imencode('.jpg', front_frame)
-        _, profile_img = cv2.imencode('.jpg', profile_frame)
-
-        socketio.emit('front-frame', front_img.tobytes())
-        socketio.emit('profile-frame', profile_img.tobytes())
-
-    socketio.emit('session-ended')
-    audio_handler.stop()
-    front_stream.stop()
-    profile_stream.stop()
-
-
-def run_unified_training_session(socketio, front_stream, profile_stream, stop_event, analyzing_event, training_settings, force_calibration=False):
+def run_unified_training_session(session, front_stream, profile_stream, training_settings, force_calibration=False):
     """
     Ujednolicona sesja treningowa obejmująca:
     1. Kalibrację (w razie potrzeby lub konieczności)
@@ -320,291 +686,15 @@ def run_unified_training_session(socketio, front_stream, profile_stream, stop_ev
     3. Kilka rund (podejść)
     4. Polecenia głosowe do nawigacji
     """
-    
-    front_pose = mp_pose.Pose(
-        min_detection_confidence=0.5,
-        min_tracking_confidence=0.5,
-        model_complexity=1
-    )
-    profile_pose = mp_pose.Pose(
-        min_detection_confidence=0.5,
-        min_tracking_confidence=0.5,
-        model_complexity=1
-    )
-    
     audio_handler = AudioHandler()
-    
     audio_handler.preload_speech(CALIBRATION_PHRASES + TRAINING_PHRASES)
     
-    calibration_data = CalibrationData.load()
-    needs_calibration = True
-    
-    exercise_command_lock = Lock()
-    pending_command = [None]
-    
-    def exercise_command_callback(command):
-        with exercise_command_lock:
-            pending_command[0] = command
-    
-    if needs_calibration:
-        socketio.emit('session-phase', {'phase': 'calibration'})
-        
-        calibration = CalibrationController()
-        reset_bicep_front()
-        reset_bicep_profile()
-        
-        audio_handler.queue_speech("Rozpoczynam kalibrację")
-        audio_handler.queue_speech(calibration.get_instructions())
-        
-        socketio.emit('calibration-step', {
-            'step': calibration.current_step,
-            'instruction': calibration.get_instructions()
-        })
-        
-        waiting_for_speech = True
-        processing_enabled = False
-        
-        while not stop_event.is_set():
-            front_frame, front_was_read = front_stream.get()
-            profile_frame, profile_was_read = profile_stream.get()
-            
-            if front_frame is None or profile_frame is None:
-                continue
-            
-            if waiting_for_speech:
-                if audio_handler._speech_complete.is_set():
-                    waiting_for_speech = False
-                    processing_enabled = True
-            
-            if not front_was_read:
-                front_rgb = cv2.cvtColor(front_frame, cv2.COLOR_BGR2RGB)
-                front_rgb.flags.writeable = False
-                front_results = front_pose.process(front_rgb)
-                front_rgb.flags.writeable = True
-                draw_pose_with_errors(front_frame, front_results, {})
-            else:
-                front_results = None
-            
-            if not profile_was_read:
-                profile_rgb = cv2.cvtColor(profile_frame, cv2.COLOR_BGR2RGB)
-                profile_rgb.flags.writeable = False
-                profile_results = profile_pose.process(profile_rgb)
-                profile_rgb.flags.writeable = True
-                draw_pose_with_errors(profile_frame, profile_results, {})
-            else:
-                profile_results = None
-            
-            if processing_enabled and front_results and profile_results:
-                step_complete, message = calibration.process_frames(front_results, profile_results)
-                
-                if step_complete:
-                    processing_enabled = False
-                    
-                    if calibration.is_complete():
-                        calibration_data = calibration.get_calibration_data()
-                        calibration_data.save()
-                        
-                        audio_handler.queue_speech_priority("Kalibracja zakończona. Zaczynamy trening.")
-                        
-                        socketio.emit('calibration-complete', {
-                            'data': calibration_data.to_dict()
-                        })
-                        
-                        audio_handler.wait_for_speech()
-                        break
-                    else:
-                        if message:
-                            audio_handler.queue_speech_priority(message)
-                            waiting_for_speech = True
-                        
-                        socketio.emit('calibration-step', {
-                            'step': calibration.current_step,
-                            'instruction': calibration.get_instructions()
-                        })
-            
-            _, front_img = cv2.imencode('.jpg', front_frame)
-            _, profile_img = cv2.imencode('.jpg', profile_frame)
-            
-            socketio.emit('front-frame', front_img.tobytes())
-            socketio.emit('profile-frame', profile_img.tobytes())
-        
-        if stop_event.is_set():
-            socketio.emit('session-ended')
-            audio_handler.stop()
-            front_stream.stop()
-            profile_stream.stop()
-            return
-    
-    socketio.emit('session-phase', {'phase': 'exercise'})
-    session_start_time = time.time()
-    
-    settings = TrainingSettings.from_dict(training_settings)
-    session = TrainingSessionController(settings)
-    session.calibration_data = calibration_data
-    session.state.phase = SessionPhase.EXERCISE
-    session._init_current_exercise()
-    
-    reset_front, reset_profile = get_reset_functions(session.get_current_exercise_type())
-    reset_front()
-    reset_profile()
-    
-    voice_thread = Thread(
-        target=listen_for_voice_commands_unified,
-        args=(audio_handler, stop_event, analyzing_event, exercise_command_callback),
-        daemon=True
-    )
-    voice_thread.start()
-    
-    audio_handler.queue_speech(session.get_announcement_for_start())
-    
-    socketio.emit('training-state', session.get_state_dict())
-    socketio.emit('status', {'state': 'waiting'})
-    
-    error_states = {}
-    last_error_spoken = {}
-    ERROR_COOLDOWN = 3.0
-    ERROR_DISPLAY_DURATION = 2.5
-    
-    prev_analyzing_state = False
-    auto_advance_cooldown = 0
-    
-    while not stop_event.is_set():
-        front_frame, front_was_read = front_stream.get()
-        profile_frame, profile_was_read = profile_stream.get()
-        
-        if front_frame is None or profile_frame is None:
-            continue
-        
-        with exercise_command_lock:
-            command = pending_command[0]
-            pending_command[0] = None
-        
-        if command:
-            if command == 'next':
-                event_result = session.go_to_next()
-                _handle_exercise_transition(socketio, audio_handler, session, event_result, stop_event)
-                reset_front, reset_profile = get_reset_functions(session.get_current_exercise_type())
-                reset_front()
-                reset_profile()
-            elif command == 'previous':
-                event_result = session.go_to_previous()
-                if event_result['event'] != 'at_start':
-                    _handle_exercise_transition(socketio, audio_handler, session, event_result, stop_event)
-                    reset_front, reset_profile = get_reset_functions(session.get_current_exercise_type())
-                    reset_front()
-                    reset_profile()
-        
-        if session.is_complete():
-            audio_handler.queue_speech_priority("Trening zakończony.")
-            stats = session.get_completion_stats()
-            
-            detailed = session.get_detailed_results()
-            session_data = {
-                'timestamp': datetime.now().isoformat(),
-                'duration_seconds': int(time.time() - session_start_time),
-                'total_reps': detailed['total_reps'],
-                'total_errors': detailed['total_errors'],
-                'rounds': detailed['settings']['rounds'],
-                'exercises_config': detailed['settings'],
-                'exercise_results': detailed['exercise_results']
-            }
-            TrainingRepository.save_session(session_data)
-            
-            socketio.emit('training-complete', stats)
-            audio_handler.wait_for_speech(timeout=5)
-            break
-        
-        if analyzing_event.is_set():
-            if not prev_analyzing_state:
-                socketio.emit('status', {'state': 'analyzing'})
-                prev_analyzing_state = True
-            
-            if not front_was_read:
-                front_rgb = cv2.cvtColor(front_frame, cv2.COLOR_BGR2RGB)
-                front_rgb.flags.writeable = False
-                front_results = front_pose.process(front_rgb)
-                front_rgb.flags.writeable = True
-                draw_pose_with_errors(front_frame, front_results, error_states)
-            else:
-                front_results = None
-
-            if not profile_was_read:
-                profile_rgb = cv2.cvtColor(profile_frame, cv2.COLOR_BGR2RGB)
-                profile_rgb.flags.writeable = False
-                profile_results = profile_pose.process(profile_rgb)
-                profile_rgb.flags.writeable = True
-                draw_pose_with_errors(profile_frame, profile_results, error_states)
-            else:
-                profile_results = None
-            
-            if front_results and profile_results:
-                result = session.process_frame(front_results, profile_results)
-                
-                if result.get('rep_detected'):
-                    if result.get('valid'):
-                        audio_handler.queue_beep()
-                    else:
-                        current_time = time.time()
-                        message = result.get('error_message', '')
-                        
-                        if message:
-                            last_spoken = last_error_spoken.get(message, 0)
-                            if current_time - last_spoken >= ERROR_COOLDOWN:
-                                audio_handler.queue_speech(message)
-                                last_error_spoken[message] = current_time
-                        
-                        for part in result.get('error_parts', []):
-                            error_states[part] = current_time + ERROR_DISPLAY_DURATION
-                
-                socketio.emit('metrics', {
-                    'right_reps': session.state.right_reps,
-                    'left_reps': session.state.left_reps,
-                    'errors': []
-                })
-                
-                socketio.emit('training-state', session.get_state_dict())
-                
-                current_time = time.time()
-                if session.check_set_complete() and current_time > auto_advance_cooldown:
-                    auto_advance_cooldown = current_time + 3.0
-                    event_result = session.advance_to_next()
-                    _handle_exercise_transition(socketio, audio_handler, session, event_result, stop_event)
-                    if not session.is_complete():
-                        reset_front, reset_profile = get_reset_functions(session.get_current_exercise_type())
-                        reset_front()
-                        reset_profile()
-                
-        else:
-            if prev_analyzing_state:
-                socketio.emit('status', {'state': 'waiting'})
-                prev_analyzing_state = False
-            
-            front_rgb = cv2.cvtColor(front_frame, cv2.COLOR_BGR2RGB)
-            front_rgb.flags.writeable = False
-            front_results = front_pose.process(front_rgb)
-            front_rgb.flags.writeable = True
-            draw_pose_with_errors(front_frame, front_results, {})
-            
-            profile_rgb = cv2.cvtColor(profile_frame, cv2.COLOR_BGR2RGB)
-            profile_rgb.flags.writeable = False
-            profile_results = profile_pose.process(profile_rgb)
-            profile_rgb.flags.writeable = True
-            draw_pose_with_errors(profile_frame, profile_results, {})
-        
-        _, front_img = cv2.imencode('.jpg', front_frame)
-        _, profile_img = cv2.imencode('.jpg', profile_frame)
-        
-        socketio.emit('front-frame', front_img.tobytes())
-        socketio.emit('profile-frame', profile_img.tobytes())
-    
-    socketio.emit('session-ended')
-    audio_handler.stop()
-    front_stream.stop()
-    profile_stream.stop()
+    analysis = _UnifiedSessionAnalysis(session, audio_handler, session.stop_event, session.analyzing_event, training_settings)
+    _run_session_pipeline(session, front_stream, profile_stream, audio_handler, analysis)
 
 
-def _handle_exercise_transition(socketio, audio_handler, session, event_result, stop_event):
-    """Obsługa komunikatów i aktualizacji interfejsu użytkownika podczas przejść między ćwiczeniami."""
+def _handle_exercise_transition(audio_handler, event_result):
+    """Komunikaty głosowe przy przejściach między ćwiczeniami (stan interfejsu trafia do pakietu taktu)."""
     event = event_result.get('event')
     
     if event == 'training_complete':
@@ -629,6 +719,4 @@ def _handle_exercise_transition(socketio, audio_handler, session, event_result,
     elif event == 'previous_round':
         exercise = event_result['exercise']
         round_num = event_result['round']
-        audio_handler.queue_speech_priority(f"Runda {round_num}. {exercise}.")
-    
-    socketio.emit('training-state', session.get_state_dict())
\ No newline at end of file
+        audio_handler.queue_speech_priority(f"Runda {round_num}. {exercise}.")
\ No newline at end of file
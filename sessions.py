@@ -0,0 +1,130 @@
+"""Sesje treningowe prowadzone równolegle przez jeden serwer, po jednej na klienta Socket.IO."""
+import os
+import uuid
+from threading import Thread, Event, Lock
+from core.constants import MAX_CONCURRENT_SESSIONS, SESSION_CORES
+from pipeline.preview_flow import PreviewFlowControl
+from pipeline.state_publisher import StatePublisher
+from pipeline.subscribers import PreviewSubscribers
+from pipeline.mjpeg import MjpegBroadcaster
+
+
+class Session:
+    """
+    Stan jednego stanowiska: zdarzenia sterujące, wątek przetwarzania, pokój Socket.IO
+    oraz własne sterowanie podglądem i publikacja stanu interfejsu.
+    Żyje od połączenia klienta do jego rozłączenia, więc wersja stanu rośnie między sesjami.
+    station_id (stały identyfikator przeglądarki stanowiska) wskazuje plik kalibracji stanowiska.
+    """
+    def __init__(self, socketio, sid):
+        self.socketio = socketio
+        self.sid = sid
+        self.id = uuid.uuid4().hex
+        self.room = f'session-{self.id}'
+        self.station_id = None
+        self.stop_event = Event()
+        self.stop_event.set()
+        self.analyzing_event = Event()
+        self.thread = None
+        self.preview_flow = PreviewFlowControl()
+        self.state_publisher = StatePublisher()
+        self.preview_subscribers = PreviewSubscribers()
+        self.mjpeg_broadcaster = MjpegBroadcaster()
+
+    @property
+    def is_running(self):
+        return not self.stop_event.is_set()
+
+    def emit(self, event, *args):
+        """Wysyła zdarzenie tylko do pokoju tej sesji."""
+        self.socketio.emit(event, *args, to=self.room)
+
+    def run(self, target_fn, args):
+        """Uruchamia przetwarzanie sesji w osobnym wątku (sesja musi być już dopuszczona)."""
+        self.thread = Thread(target=self._run, args=(target_fn, args), daemon=True)
+        self.thread.start()
+
+    def _run(self, target_fn, args):
+        try:
+            target_fn(self, *args)
+        finally:
+            self.stop_event.set()
+            self.analyzing_event.clear()
+
+    def stop(self):
+        """Zatrzymuje przetwarzanie i czeka na zakończenie wątku; False, jeśli sesja nie działała."""
+        if not self.is_running:
+            return False
+        self.stop_event.set()
+        self.analyzing_event.clear()
+        thread = self.thread
+        if thread:
+            thread.join()
+        return True
+
+
+class SessionManager:
+    """
+    Sesje kluczowane sid klienta Socket.IO.
+    Liczba jednocześnie działających sesji jest ograniczona przez max_sessions
+    oraz przez liczbę rdzeni (cores_per_session rdzeni na sesję).
+    """
+    def __init__(self, socketio, max_sessions=MAX_CONCURRENT_SESSIONS, cores_per_session=SESSION_CORES):
+        self.socketio = socketio
+        self.capacity = max(1, min(max_sessions, (os.cpu_count() or 1) // cores_per_session))
+        self._lock = Lock()
+        self._sessions = {}
+        self.admitted = 0
+        self.rejected = 0
+
+    def open(self, sid):
+        """Tworzy sesję dla nowo podłączonego klienta."""
+        session = Session(self.socketio, sid)
+        with self._lock:
+            self._sessions[sid] = session
+        return session
+
+    def get(self, sid):
+        with self._lock:
+            return self._sessions.get(sid)
+
+    def find(self, session_id):
+        """Sesja o danym identyfikatorze (używanym w adresach strumieni MJPEG) albo None."""
+        with self._lock:
+            return next((session for session in self._sessions.values() if session.id == session_id), None)
+
+    def admit(self, session):
+        """
+        Rezerwuje miejsce dla sesji i oznacza ją jako działającą.
+        False, jeśli sesja już działa albo serwer osiągnął limit równoległych sesji.
+        """
+        with self._lock:
+            if session.is_running:
+                return False
+            if sum(s.is_running for s in self._sessions.values()) >= self.capacity:
+                self.rejected += 1
+                return False
+            session.stop_event.clear()
+            self.admitted += 1
+            return True
+
+    def close(self, sid):
+        """Zatrzymuje i usuwa sesję rozłączonego klienta."""
+        with self._lock:
+            session = self._sessions.pop(sid, None)
+        if session is None:
+            return None
+        session.stop()
+        session.mjpeg_broadcaster.close()
+        return session
+
+    def get_stats(self):
+        with self._lock:
+            running = sum(s.is_running for s in self._sessions.values())
+            return {
+                'capacity': self.capacity,
+                'connected': len(self._sessions),
+                'running': running,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+            }
@@ -189,8 +189,18 @@ function validateCameraSettings(settings) {
   return true;
 }
 
+function getStationId() {
+  let stationId = localStorage.getItem("stationId");
+  if (!stationId) {
+    stationId =
+      Date.now().toString(36) + Math.random().toString(36).slice(2, 10);
+    localStorage.setItem("stationId", stationId);
+  }
+  return stationId;
+}
+
 function checkCalibrationStatus() {
-  fetch("/api/calibration-status")
+  fetch(`/api/calibration-status?station=${encodeURIComponent(getStationId())}`)
     .then((res) => res.json())
     .then((data) => {
       if (data.calibrated) {
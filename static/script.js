@@ -13,6 +13,16 @@ const trainingSettings = JSON.parse(
 
 const sessionMode = localStorage.getItem("sessionMode") || "unified";
 
+function getStationId() {
+  let stationId = localStorage.getItem("stationId");
+  if (!stationId) {
+    stationId =
+      Date.now().toString(36) + Math.random().toString(36).slice(2, 10);
+    localStorage.setItem("stationId", stationId);
+  }
+  return stationId;
+}
+
 const EXERCISE_NAMES = {
   bicep_curl: "Uginanie przedramion",
   overhead_press: "Wyciskanie nad głowę",
@@ -43,8 +53,15 @@ let isConnected = false;
 let isAnalyzing = false;
 let isCalibrating = false;
 let currentPhase = "connecting";
+let previewMimeType = "image/jpeg";
+let previewMode = "video";
+let previewTransport = "socketio";
+let previewStreamPath = "/stream";
+let uiState = {};
+let uiStateVersion = 0;
 
-const socket = io("http://localhost:5000");
+const SERVER_URL = "http://localhost:5000";
+const socket = io(SERVER_URL);
 
 const cameraSettings = trainingSettings.cameraSettings;
 
@@ -60,6 +77,45 @@ const statusDotFront = document.getElementById("status-dot-front");
 const statusDotProfile = document.getElementById("status-dot-profile");
 const placeholderFront = document.getElementById("placeholder-front");
 const placeholderProfile = document.getElementById("placeholder-profile");
+const frontOverlay = document.getElementById("front-overlay");
+const profileOverlay = document.getElementById("profile-overlay");
+const previewDebug = new URLSearchParams(window.location.search).has("debug");
+const frontRenderer = createPreviewRenderer(
+  document.getElementById("front-canvas"),
+  frontImg,
+  placeholderFront,
+  document.getElementById("front-hud"),
+);
+const profileRenderer = createPreviewRenderer(
+  document.getElementById("profile-canvas"),
+  profileImg,
+  placeholderProfile,
+  document.getElementById("profile-hud"),
+);
+
+const ERROR_PART_BITS = { left_arm: 1, right_arm: 2, trunk: 4 };
+const POSE_CONNECTIONS = [
+  [11, 12, "trunk"],
+  [11, 13, "left_arm"],
+  [13, 15, "left_arm"],
+  [12, 14, "right_arm"],
+  [14, 16, "right_arm"],
+  [11, 23, "trunk"],
+  [12, 24, "trunk"],
+  [23, 24, "trunk"],
+];
+const POSE_LANDMARK_PARTS = {
+  11: ["left_arm", "trunk"],
+  12: ["right_arm", "trunk"],
+  13: ["left_arm"],
+  14: ["right_arm"],
+  15: ["left_arm"],
+  16: ["right_arm"],
+  23: ["trunk"],
+  24: ["trunk"],
+};
+const POSE_NORMAL_COLOR = "rgb(66, 117, 245)";
+const POSE_ERROR_COLOR = "rgb(255, 0, 0)";
 const voiceStatus = document.getElementById("voice-status");
 const calibrationBox = document.getElementById("calibration-box");
 const calibrationStepText = document.getElementById("calibration-step-text");
@@ -266,6 +322,7 @@ btnConnect.addEventListener("click", () => {
     cameras: cameraSettings,
     mode: sessionMode,
     trainingSettings: trainingSettings,
+    stationId: getStationId(),
   });
   btnDisconnect.disabled = false;
   isConnected = true;
@@ -301,7 +358,7 @@ function changeStateToConnected() {
   statusDotProfile.style.background = "var(--perfect)";
 }
 
-socket.on("status", (data) => {
+function handleStatus(data) {
   btnConnect.textContent = "POŁĄCZ";
   if (data.state === "waiting") {
     isAnalyzing = false;
@@ -313,7 +370,9 @@ socket.on("status", (data) => {
     );
     startTimer();
   }
-});
+}
+
+socket.on("status", handleStatus);
 
 socket.on("session-phase", (data) => {
   if (data.phase === "calibration") {
@@ -326,7 +385,7 @@ socket.on("session-phase", (data) => {
   }
 });
 
-socket.on("training-state", (data) => {
+function handleTrainingState(data) {
   if (exerciseNameSpan && data.currentExercise) {
     exerciseNameSpan.textContent = data.currentExercise;
   }
@@ -345,7 +404,9 @@ socket.on("training-state", (data) => {
   if (data.currentExerciseType) {
     updateExerciseDisplay(data.currentExerciseType);
   }
-});
+}
+
+socket.on("training-state", handleTrainingState);
 
 socket.on("training-complete", (data) => {
   showCompleteUI(data);
@@ -363,22 +424,121 @@ socket.on("connection-error", (data) => {
   }
 });
 
-socket.on("front-frame", (data) => {
-  if (!isConnected) return;
-  changeStateToConnected();
-  updateImage(frontImg, data, placeholderFront);
+socket.on("session-rejected", (data) => {
+  alert(`Nie można rozpocząć sesji: ${data.message}\nSpróbuj ponownie później.`);
+  fullDisconnect();
+  if (sessionMode === "calibration") {
+    hideCalibrationUI();
+  }
+});
+
+socket.on("preview-format", (data) => {
+  previewMimeType = data.mimetype;
+  previewMode = data.mode || "video";
+  const overlayDisplay = previewMode === "landmarks" ? "block" : "none";
+  if (frontOverlay) frontOverlay.style.display = overlayDisplay;
+  if (profileOverlay) profileOverlay.style.display = overlayDisplay;
+
+  previewTransport = data.transport || "socketio";
+  previewStreamPath = data.stream || "/stream";
+  if (previewTransport === "mjpeg") {
+    changeStateToConnected();
+    if (document.visibilityState === "visible") {
+      startMjpegStream(frontImg, "front", placeholderFront);
+      startMjpegStream(profileImg, "profile", placeholderProfile);
+    }
+  }
 });
 
-socket.on("profile-frame", (data) => {
+function updatePreviewSubscription() {
+  const visible = document.visibilityState === "visible";
+  socket.emit(visible ? "preview-subscribe" : "preview-unsubscribe", {
+    views: ["front", "profile"],
+  });
+
+  if (previewTransport !== "mjpeg") return;
+  if (!visible) {
+    if (frontImg) frontImg.src = "";
+    if (profileImg) profileImg.src = "";
+  } else if (isConnected) {
+    startMjpegStream(frontImg, "front", placeholderFront);
+    startMjpegStream(profileImg, "profile", placeholderProfile);
+  }
+}
+
+document.addEventListener("visibilitychange", updatePreviewSubscription);
+socket.on("connect", updatePreviewSubscription);
+
+function startMjpegStream(imgElement, view, placeholder) {
+  if (!imgElement) return;
+  if (placeholder) placeholder.style.display = "none";
+  imgElement.style.display = "block";
+  imgElement.src = `${SERVER_URL}${previewStreamPath}/${view}?t=${Date.now()}`;
+}
+
+socket.on("tick", (data) => {
   if (!isConnected) return;
-  changeStateToConnected();
-  updateImage(profileImg, data, placeholderProfile);
+  const packet = decodeTickPacket(data);
+  if (!packet) return;
+
+  if (packet.frontImage || packet.frontLandmarks) changeStateToConnected();
+
+  if (packet.frontImage) {
+    renderPreview(frontRenderer, packet.frontImage, () =>
+      socket.emit("frame-ack", { id: packet.frameId, view: "front" }),
+    );
+  }
+  if (packet.profileImage) {
+    renderPreview(profileRenderer, packet.profileImage, () =>
+      socket.emit("frame-ack", { id: packet.frameId, view: "profile" }),
+    );
+  }
+  if (packet.frontLandmarks) {
+    drawLandmarkOverlay(frontOverlay, decodeLandmarkPacket(packet.frontLandmarks));
+  }
+  if (packet.profileLandmarks) {
+    drawLandmarkOverlay(profileOverlay, decodeLandmarkPacket(packet.profileLandmarks));
+  }
+
+  if (packet.state) applyStateUpdate(packet.state);
+});
+
+function applyStateSections(sections) {
+  if (sections.status) handleStatus(uiState.status);
+  if (sections.training_state) handleTrainingState(uiState.training_state);
+  if (sections.metrics) handleMetrics(uiState.metrics);
+}
+
+function applyStateUpdate(update) {
+  if (update.v <= uiStateVersion) return;
+  if (update.base !== uiStateVersion) {
+    socket.emit("state-snapshot-request");
+    return;
+  }
+
+  for (const [section, changes] of Object.entries(update.delta)) {
+    if (changes && typeof changes === "object" && !Array.isArray(changes)) {
+      uiState[section] = Object.assign(uiState[section] || {}, changes);
+    } else {
+      uiState[section] = changes;
+    }
+  }
+  uiStateVersion = update.v;
+  applyStateSections(update.delta);
+}
+
+socket.on("state-snapshot", (data) => {
+  uiState = data.full;
+  uiStateVersion = data.v;
+  applyStateSections(uiState);
 });
 
-socket.on("metrics", (data) => {
+function handleMetrics(data) {
   if (rightRepsSpan) rightRepsSpan.textContent = data.right_reps;
   if (leftRepsSpan) leftRepsSpan.textContent = data.left_reps;
-});
+}
+
+socket.on("metrics", handleMetrics);
 
 socket.on("calibration-step", (data) => {
   showCalibrationUI();
@@ -421,20 +581,328 @@ function resetUI() {
     profileImg.src = "";
   }
 
+  resetPreviewRenderer(frontRenderer);
+  resetPreviewRenderer(profileRenderer);
+
   if (placeholderFront) placeholderFront.style.display = "block";
   if (placeholderProfile) placeholderProfile.style.display = "block";
 
+  clearLandmarkOverlay(frontOverlay);
+  clearLandmarkOverlay(profileOverlay);
+
   if (rightRepsSpan) rightRepsSpan.textContent = "0";
   if (leftRepsSpan) leftRepsSpan.textContent = "0";
 }
 
-function updateImage(imgElement, data, placeholder) {
+const TICK_SECTIONS = [
+  ["frontImage", 1],
+  ["profileImage", 2],
+  ["frontLandmarks", 4],
+  ["profileLandmarks", 8],
+  ["state", 16],
+];
+
+function decodeTickPacket(data) {
+  const bytes = new Uint8Array(data);
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+  if (bytes[0] !== 0x43 || bytes[1] !== 0x54 || view.getUint8(2) !== 1) {
+    return null;
+  }
+
+  const flags = view.getUint8(3);
+  const packet = { frameId: view.getUint32(4, true) };
+  let offset = 8;
+  for (const [name, bit] of TICK_SECTIONS) {
+    if (!(flags & bit)) continue;
+    const length = view.getUint32(offset, true);
+    packet[name] = bytes.subarray(offset + 4, offset + 4 + length);
+    offset += 4 + length;
+  }
+
+  if (packet.state) {
+    packet.state = unpackMessage(packet.state);
+  }
+  return packet;
+}
+
+function unpackMessage(bytes) {
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+  const decoder = new TextDecoder();
+  let offset = 0;
+
+  const readBytes = (length) => {
+    const slice = bytes.subarray(offset, offset + length);
+    offset += length;
+    return slice;
+  };
+  const readArray = (length) => {
+    const items = new Array(length);
+    for (let i = 0; i < length; i++) items[i] = read();
+    return items;
+  };
+  const readMap = (length) => {
+    const map = {};
+    for (let i = 0; i < length; i++) {
+      const key = read();
+      map[key] = read();
+    }
+    return map;
+  };
+
+  function read() {
+    const type = view.getUint8(offset++);
+    if (type < 0x80) return type;
+    if (type >= 0xe0) return type - 0x100;
+    if ((type & 0xf0) === 0x80) return readMap(type & 0x0f);
+    if ((type & 0xf0) === 0x90) return readArray(type & 0x0f);
+    if ((type & 0xe0) === 0xa0) return decoder.decode(readBytes(type & 0x1f));
+
+    let value;
+    switch (type) {
+      case 0xc0: return null;
+      case 0xc2: return false;
+      case 0xc3: return true;
+      case 0xc4: return readBytes(view.getUint8(offset++));
+      case 0xc5: value = view.getUint16(offset); offset += 2; return readBytes(value);
+      case 0xc6: value = view.getUint32(offset); offset += 4; return readBytes(value);
+      case 0xcb: value = view.getFloat64(offset); offset += 8; return value;
+      case 0xcc: return view.getUint8(offset++);
+      case 0xcd: value = view.getUint16(offset); offset += 2; return value;
+      case 0xce: value = view.getUint32(offset); offset += 4; return value;
+      case 0xcf: value = Number(view.getBigUint64(offset)); offset += 8; return value;
+      case 0xd0: return view.getInt8(offset++);
+      case 0xd1: value = view.getInt16(offset); offset += 2; return value;
+      case 0xd2: value = view.getInt32(offset); offset += 4; return value;
+      case 0xd3: value = Number(view.getBigInt64(offset)); offset += 8; return value;
+      case 0xd9: return decoder.decode(readBytes(view.getUint8(offset++)));
+      case 0xda: value = view.getUint16(offset); offset += 2; return decoder.decode(readBytes(value));
+      case 0xdb: value = view.getUint32(offset); offset += 4; return decoder.decode(readBytes(value));
+      case 0xdc: value = view.getUint16(offset); offset += 2; return readArray(value);
+      case 0xdd: value = view.getUint32(offset); offset += 4; return readArray(value);
+      case 0xde: value = view.getUint16(offset); offset += 2; return readMap(value);
+      case 0xdf: value = view.getUint32(offset); offset += 4; return readMap(value);
+      default: throw new Error(`Unsupported MessagePack type 0x${type.toString(16)}`);
+    }
+  }
+
+  return read();
+}
+
+function decodeLandmarkPacket(data) {
+  const bytes = new Uint8Array(data);
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+  const count = view.getUint8(3);
+  const packet = {
+    version: view.getUint8(0),
+    hasPose: (view.getUint8(1) & 1) === 1,
+    errorBits: view.getUint8(2),
+    frameId: view.getUint32(4, true),
+    width: view.getUint16(8, true),
+    height: view.getUint16(10, true),
+    landmarks: new Array(count),
+  };
+
+  for (let i = 0; i < count; i++) {
+    const offset = 12 + i * 5;
+    packet.landmarks[i] = {
+      x: view.getUint16(offset, true) / 65535,
+      y: view.getUint16(offset + 2, true) / 65535,
+      visibility: view.getUint8(offset + 4) / 255,
+    };
+  }
+  return packet;
+}
+
+function drawLandmarkOverlay(canvas, packet) {
+  if (!canvas) return;
+
+  const ratio = window.devicePixelRatio || 1;
+  const width = Math.round(canvas.clientWidth * ratio);
+  const height = Math.round(canvas.clientHeight * ratio);
+  if (canvas.width !== width || canvas.height !== height) {
+    canvas.width = width;
+    canvas.height = height;
+  }
+
+  const ctx = canvas.getContext("2d");
+  ctx.clearRect(0, 0, width, height);
+  if (!packet.hasPose || !packet.width || !packet.height) return;
+
+  const scale = Math.min(width / packet.width, height / packet.height);
+  const offsetX = (width - packet.width * scale) / 2;
+  const offsetY = (height - packet.height * scale) / 2;
+  const toPoint = (lm) => [
+    offsetX + lm.x * packet.width * scale,
+    offsetY + lm.y * packet.height * scale,
+  ];
+  const hasError = (part) => (packet.errorBits & ERROR_PART_BITS[part]) !== 0;
+
+  ctx.lineWidth = 2 * ratio;
+  for (const [startIdx, endIdx, part] of POSE_CONNECTIONS) {
+    const start = packet.landmarks[startIdx];
+    const end = packet.landmarks[endIdx];
+    if (start.visibility <= 0.5 || end.visibility <= 0.5) continue;
+
+    const [x1, y1] = toPoint(start);
+    const [x2, y2] = toPoint(end);
+    ctx.strokeStyle = hasError(part) ? POSE_ERROR_COLOR : POSE_NORMAL_COLOR;
+    ctx.beginPath();
+    ctx.moveTo(x1, y1);
+    ctx.lineTo(x2, y2);
+    ctx.stroke();
+  }
+
+  for (const [idx, parts] of Object.entries(POSE_LANDMARK_PARTS)) {
+    const landmark = packet.landmarks[idx];
+    if (landmark.visibility <= 0.5) continue;
+
+    const [x, y] = toPoint(landmark);
+    ctx.fillStyle = parts.some(hasError) ? POSE_ERROR_COLOR : POSE_NORMAL_COLOR;
+    ctx.beginPath();
+    ctx.arc(x, y, 3 * ratio, 0, 2 * Math.PI);
+    ctx.fill();
+  }
+}
+
+function clearLandmarkOverlay(canvas) {
+  if (!canvas) return;
+  canvas.getContext("2d").clearRect(0, 0, canvas.width, canvas.height);
+  canvas.style.display = "none";
+}
+
+function createPreviewRenderer(canvas, imgElement, placeholder, hud) {
+  const useBitmaps = !!canvas && typeof createImageBitmap === "function";
+  let context = null;
+  if (useBitmaps) {
+    context = canvas.getContext("bitmaprenderer") || canvas.getContext("2d");
+  }
+  if (hud) hud.style.display = previewDebug && useBitmaps ? "block" : "none";
+
+  return {
+    canvas,
+    context,
+    imgElement,
+    placeholder,
+    hud,
+    useBitmaps,
+    pending: null,
+    busy: false,
+    epoch: 0,
+    received: 0,
+    dropped: 0,
+    painted: 0,
+    decodeMs: 0,
+    paintMs: 0,
+    hudUpdatedAt: 0,
+  };
+}
+
+function renderPreview(renderer, data, onDisplayed) {
+  if (!renderer.useBitmaps) {
+    updateImage(renderer.imgElement, data, renderer.placeholder, onDisplayed);
+    return;
+  }
+
+  renderer.received++;
+  if (renderer.pending) renderer.dropped++;
+  renderer.pending = { data, onDisplayed };
+  if (!renderer.busy) drainPreviewRenderer(renderer);
+}
+
+async function drainPreviewRenderer(renderer) {
+  renderer.busy = true;
+  while (renderer.pending) {
+    const { data, onDisplayed } = renderer.pending;
+    renderer.pending = null;
+    const epoch = renderer.epoch;
+
+    const decodeStart = performance.now();
+    let bitmap;
+    try {
+      bitmap = await createImageBitmap(
+        new Blob([data], { type: previewMimeType }),
+      );
+    } catch (error) {
+      console.warn("Preview decode failed:", error);
+      continue;
+    }
+    const decodeMs = performance.now() - decodeStart;
+
+    await new Promise((resolve) => requestAnimationFrame(resolve));
+    if (epoch !== renderer.epoch) {
+      bitmap.close();
+      continue;
+    }
+
+    const paintStart = performance.now();
+    paintPreviewBitmap(renderer, bitmap);
+    const paintMs = performance.now() - paintStart;
+
+    renderer.painted++;
+    renderer.decodeMs = renderer.decodeMs ? 0.9 * renderer.decodeMs + 0.1 * decodeMs : decodeMs;
+    renderer.paintMs = renderer.paintMs ? 0.9 * renderer.paintMs + 0.1 * paintMs : paintMs;
+    updatePreviewHud(renderer);
+    if (onDisplayed) onDisplayed();
+  }
+  renderer.busy = false;
+}
+
+function paintPreviewBitmap(renderer, bitmap) {
+  const canvas = renderer.canvas;
+  if (canvas.width !== bitmap.width || canvas.height !== bitmap.height) {
+    canvas.width = bitmap.width;
+    canvas.height = bitmap.height;
+  }
+
+  if (renderer.context instanceof ImageBitmapRenderingContext) {
+    renderer.context.transferFromImageBitmap(bitmap);
+  } else {
+    renderer.context.drawImage(bitmap, 0, 0);
+    bitmap.close();
+  }
+
+  if (canvas.style.display !== "block") {
+    if (renderer.placeholder) renderer.placeholder.style.display = "none";
+    if (renderer.imgElement) renderer.imgElement.style.display = "none";
+    canvas.style.display = "block";
+  }
+}
+
+function updatePreviewHud(renderer) {
+  if (!previewDebug || !renderer.hud) return;
+  const now = performance.now();
+  if (now - renderer.hudUpdatedAt < 500) return;
+  renderer.hudUpdatedAt = now;
+  renderer.hud.textContent =
+    `decode ${renderer.decodeMs.toFixed(1)} ms | ` +
+    `paint ${renderer.paintMs.toFixed(1)} ms | ` +
+    `dropped ${renderer.dropped}/${renderer.received}`;
+}
+
+function resetPreviewRenderer(renderer) {
+  renderer.epoch++;
+  renderer.pending = null;
+  renderer.received = 0;
+  renderer.dropped = 0;
+  renderer.painted = 0;
+  renderer.decodeMs = 0;
+  renderer.paintMs = 0;
+  if (renderer.hud) renderer.hud.textContent = "";
+  if (!renderer.canvas) return;
+  renderer.canvas.style.display = "none";
+  if (renderer.context && !(renderer.context instanceof ImageBitmapRenderingContext)) {
+    renderer.context.clearRect(0, 0, renderer.canvas.width, renderer.canvas.height);
+  }
+}
+
+function updateImage(imgElement, data, placeholder, onDisplayed) {
   const arrayBufferView = new Uint8Array(data);
-  const blob = new Blob([arrayBufferView], { type: "image/jpeg" });
+  const blob = new Blob([arrayBufferView], { type: previewMimeType });
   const url = URL.createObjectURL(blob);
 
   imgElement.onload = function () {
     imgElement.onload = null;
+    if (onDisplayed) onDisplayed();
   };
 
   if (imgElement.src) {
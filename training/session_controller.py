@@ -6,6 +6,7 @@ from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Callable
 from enum import Enum
 from calibration.data import CalibrationData
+from core.landmarks import LandmarkFrame
 from exercises.bicep_curl.controller import BicepCurlController
 from exercises.overhead_press.controller import OverheadPressController
 
@@ -166,11 +167,10 @@ class TrainingSessionController:
         return metrics
     
     def _check_neutral_pose(self, front_results) -> bool:
-        if not front_results or not front_results.pose_landmarks:
+        landmarks = LandmarkFrame.from_results(front_results)
+        if not landmarks:
             return False
         
-        landmarks = front_results.pose_landmarks.landmark
-        
         try:
             r_shoulder = landmarks[12]
             r_elbow = landmarks[14]
@@ -182,8 +182,8 @@ class TrainingSessionController:
             import math
             
             def calc_angle(a, b, c):
-                ba = (a.x - b.x, a.y - b.y)
-                bc = (c.x - b.x, c.y - b.y)
+                ba = (a[0] - b[0], a[1] - b[1])
+                bc = (c[0] - b[0], c[1] - b[1])
                 dot = ba[0]*bc[0] + ba[1]*bc[1]
                 mag_ba = math.sqrt(ba[0]**2 + ba[1]**2)
                 mag_bc = math.sqrt(bc[0]**2 + bc[1]**2)